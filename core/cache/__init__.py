@@ -0,0 +1,33 @@
+from .pack import ThumbPack, close_packs, open_pack
+from .thumbs import (
+    DEFAULT_QUALITY,
+    DEFAULT_SIZE,
+    cache_policy_from_env,
+    cache_stats,
+    compact_cache,
+    ensure_thumbnail,
+    has_thumbnail,
+    load_thumbnail,
+    prune_cache,
+    render_thumbnail,
+    resolve_cache_dir,
+    thumbnail_key,
+)
+
+__all__ = [
+    "DEFAULT_QUALITY",
+    "DEFAULT_SIZE",
+    "ThumbPack",
+    "cache_policy_from_env",
+    "cache_stats",
+    "close_packs",
+    "compact_cache",
+    "ensure_thumbnail",
+    "has_thumbnail",
+    "load_thumbnail",
+    "open_pack",
+    "prune_cache",
+    "render_thumbnail",
+    "resolve_cache_dir",
+    "thumbnail_key",
+]
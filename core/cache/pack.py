@@ -0,0 +1,505 @@
+"""Append-only thumbnail pack files with an SQLite index.
+
+썸네일 수십만 개를 파일 하나씩 두면 정리/백업이 느리고 블록 낭비가 크다.
+여기서는 팩 파일(packs/pack-NNNNNN.dat)에 JPEG 바이트를 이어 붙이고,
+index.sqlite에 key → (pack_id, offset, length, last_access)를 기록한다.
+
+- 프로세스마다 자기 전용 팩 하나에만 append 한다 (스캔 워커 여러 개가 동시에 써도 안전).
+- 바이트를 먼저 쓰고 flush 한 뒤 인덱스를 커밋하므로, 인덱스가 가리키는 데이터는 항상 완전하다.
+- 읽기는 팩 파일을 mmap 해서 memoryview 조각을 그대로 돌려준다.
+- 삭제/덮어쓰기로 생긴 빈 공간은 compact()가 살아있는 항목만 새 팩으로 옮기며 회수한다.
+  워커마다 하나씩 생기는 작은 봉인 팩도 compact()가 현재 팩으로 합친다.
+- 개수/용량 합계는 트리거가 totals 행에 유지하고, last_access 인덱스 순서로 앞에서부터
+  지우므로 prune()은 캐시 크기가 아니라 지우는 개수에 비례한다.
+- 읽기 시각은 메모리에 모았다가 한 트랜잭션으로 기록한다.
+"""
+from __future__ import annotations
+
+import atexit
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+PACK_MAX_BYTES = 256 * 1024 * 1024
+# 봉인되지 않은 팩이라도 이 시간 동안 쓰기가 없으면 주인 프로세스가 끝난 것으로 본다.
+STALE_WRITER_SECONDS = 3600.0
+# 팩에서 죽은 바이트가 이 비율 이상이면 압축 대상.
+COMPACT_MIN_GARBAGE = 0.5
+# 이보다 작은 봉인 팩이 둘 이상이면 압축 때 하나로 합친다.
+PACK_MERGE_BYTES = 16 * 1024 * 1024
+# 읽기 시각(last_access)은 이 개수나 시간이 차면 한 번에 기록한다.
+ACCESS_FLUSH_BATCH = 512
+ACCESS_FLUSH_SECONDS = 5.0
+
+INDEX_NAME = "index.sqlite"
+PACK_DIR = "packs"
+
+_INDEX_SQL = """
+CREATE TABLE IF NOT EXISTS packs (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  size INTEGER NOT NULL DEFAULT 0,
+  live_bytes INTEGER NOT NULL DEFAULT 0,
+  sealed INTEGER NOT NULL DEFAULT 0,
+  updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS thumbs (
+  key TEXT PRIMARY KEY,
+  pack_id INTEGER NOT NULL,
+  offset INTEGER NOT NULL,
+  length INTEGER NOT NULL,
+  last_access REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_thumbs_pack ON thumbs(pack_id);
+CREATE INDEX IF NOT EXISTS idx_thumbs_access ON thumbs(last_access);
+
+CREATE TABLE IF NOT EXISTS totals (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  files INTEGER NOT NULL,
+  bytes INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO totals(id, files, bytes)
+  SELECT 1, COUNT(*), COALESCE(SUM(length), 0) FROM thumbs;
+
+CREATE TRIGGER IF NOT EXISTS trg_thumbs_insert AFTER INSERT ON thumbs BEGIN
+  UPDATE totals SET files = files + 1, bytes = bytes + NEW.length WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_thumbs_delete AFTER DELETE ON thumbs BEGIN
+  UPDATE totals SET files = files - 1, bytes = bytes - OLD.length WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_thumbs_length AFTER UPDATE OF length ON thumbs BEGIN
+  UPDATE totals SET bytes = bytes - OLD.length + NEW.length WHERE id = 1;
+END;
+"""
+
+
+class ThumbPack:
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.pack_dir = self.root / PACK_DIR
+        self.pack_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.root / INDEX_NAME),
+            timeout=30.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_INDEX_SQL)
+        self._writer: tuple[int, object] | None = None
+        self._maps: dict[int, mmap.mmap] = {}
+        self._compact_thread: threading.Thread | None = None
+        self._pending_access: dict[str, float] = {}
+        self._access_flushed_at = time.monotonic()
+
+    # ---- 내부 ----
+
+    def _pack_path(self, pack_id: int) -> Path:
+        return self.pack_dir / f"pack-{pack_id:06d}.dat"
+
+    def _begin(self) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def _ensure_writer(self, incoming: int):
+        if self._writer is not None:
+            pack_id, handle = self._writer
+            if handle.tell() == 0 or handle.tell() + incoming <= PACK_MAX_BYTES:
+                return pack_id, handle
+            self._seal_writer()
+        cur = self._conn.execute("INSERT INTO packs(updated_at) VALUES (?)", (time.time(),))
+        pack_id = int(cur.lastrowid)
+        handle = open(self._pack_path(pack_id), "ab")
+        self._writer = (pack_id, handle)
+        return pack_id, handle
+
+    def _drop_writer(self) -> None:
+        if self._writer is None:
+            return
+        _pack_id, handle = self._writer
+        self._writer = None
+        try:
+            handle.close()
+        except OSError:
+            pass
+
+    def _seal_writer(self) -> None:
+        if self._writer is None:
+            return
+        pack_id = self._writer[0]
+        self._drop_writer()
+        self._conn.execute("UPDATE packs SET sealed = 1 WHERE id = ?", (pack_id,))
+
+    def _write_entry(
+        self,
+        key: str,
+        data: bytes,
+        last_access: float,
+        expect: tuple[int, int] | None = None,
+    ) -> bool:
+        """data를 현재 팩 끝에 붙이고 인덱스를 갱신한다.
+
+        expect=(pack_id, offset)이면 인덱스가 아직 그 위치를 가리킬 때만 옮긴다 (압축용).
+        """
+        for _attempt in range(3):
+            pack_id, handle = self._ensure_writer(len(data))
+            offset = handle.tell()
+            handle.write(data)
+            handle.flush()
+            self._begin()
+            try:
+                cur = self._conn.execute(
+                    "UPDATE packs SET size = ?, updated_at = ? WHERE id = ? AND sealed = 0",
+                    (offset + len(data), time.time(), pack_id),
+                )
+                if cur.rowcount == 0:
+                    # 다른 프로세스가 오래 멈춘 팩으로 보고 봉인함 → 새 팩으로 다시 쓴다.
+                    self._conn.execute("ROLLBACK")
+                    self._drop_writer()
+                    continue
+                old = self._conn.execute(
+                    "SELECT pack_id, offset, length FROM thumbs WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if expect is not None and (old is None or (old[0], old[1]) != expect):
+                    self._conn.execute("COMMIT")
+                    return False
+                if old is not None:
+                    self._conn.execute(
+                        "UPDATE packs SET live_bytes = live_bytes - ? WHERE id = ?",
+                        (old[2], old[0]),
+                    )
+                self._conn.execute(
+                    """
+                    INSERT INTO thumbs(key, pack_id, offset, length, last_access)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                      pack_id=excluded.pack_id,
+                      offset=excluded.offset,
+                      length=excluded.length,
+                      last_access=excluded.last_access
+                    """,
+                    (key, pack_id, offset, len(data), last_access),
+                )
+                self._conn.execute(
+                    "UPDATE packs SET live_bytes = live_bytes + ? WHERE id = ?",
+                    (len(data), pack_id),
+                )
+                self._conn.execute("COMMIT")
+                return True
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        raise OSError("thumbnail pack is not writable")
+
+    def _flush_access(self) -> None:
+        if not self._pending_access:
+            return
+        rows = [(stamp, key) for key, stamp in self._pending_access.items()]
+        self._pending_access.clear()
+        self._access_flushed_at = time.monotonic()
+        self._begin()
+        try:
+            self._conn.executemany("UPDATE thumbs SET last_access = ? WHERE key = ?", rows)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _slice(self, pack_id: int, offset: int, length: int) -> memoryview | None:
+        end = offset + length
+        mapped = self._maps.get(pack_id)
+        if mapped is None or len(mapped) < end:
+            # 팩이 append로 커졌으면 다시 매핑한다. 이전 매핑은 쓰던 조각이 해제되면 닫힌다.
+            try:
+                with open(self._pack_path(pack_id), "rb") as handle:
+                    if os.fstat(handle.fileno()).st_size < end:
+                        return None
+                    mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return None
+            self._maps[pack_id] = mapped
+        return memoryview(mapped)[offset:end]
+
+    # ---- 공개 API ----
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM thumbs WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._write_entry(key, data, time.time())
+
+    def get(self, key: str) -> memoryview | None:
+        """mmap 된 팩의 조각을 반환. 조각을 쥐고 있는 동안 매핑이 유지된다."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pack_id, offset, length FROM thumbs WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            view = self._slice(int(row[0]), int(row[1]), int(row[2]))
+            if view is not None:
+                self._pending_access[key] = time.time()
+                if (
+                    len(self._pending_access) >= ACCESS_FLUSH_BATCH
+                    or time.monotonic() - self._access_flushed_at >= ACCESS_FLUSH_SECONDS
+                ):
+                    self._flush_access()
+        return view
+
+    def flush(self) -> None:
+        """모아둔 읽기 시각을 인덱스에 기록한다."""
+        with self._lock:
+            self._flush_access()
+
+    def stats(self) -> tuple[int, int]:
+        with self._lock:
+            row = self._conn.execute("SELECT files, bytes FROM totals WHERE id = 1").fetchone()
+        if row is None:
+            return 0, 0
+        return int(row[0]), int(row[1])
+
+    def prune(self, max_files: int | None = None, max_bytes: int | None = None) -> int:
+        """오래 안 쓴 항목부터 인덱스에서 지운다. 팩 공간은 compact()에서 회수."""
+        if max_files is None and max_bytes is None:
+            return 0
+        with self._lock:
+            count, total = self.stats()
+            if (max_files is None or count <= max_files) and (
+                max_bytes is None or total <= max_bytes
+            ):
+                return 0
+            self._flush_access()
+            victims: list[tuple[str, int, int]] = []
+            # idx_thumbs_access 순서로 읽다가 한도 안으로 들어오면 멈춘다.
+            rows = self._conn.execute(
+                "SELECT key, pack_id, length FROM thumbs ORDER BY last_access"
+            )
+            for key, pack_id, length in rows:
+                over_files = max_files is not None and count > max_files
+                over_bytes = max_bytes is not None and total > max_bytes
+                if not over_files and not over_bytes:
+                    break
+                victims.append((key, int(pack_id), int(length)))
+                count -= 1
+                total -= int(length)
+            rows.close()
+            if not victims:
+                return 0
+            self._begin()
+            try:
+                self._conn.executemany(
+                    "DELETE FROM thumbs WHERE key = ?",
+                    [(key,) for key, _pack_id, _length in victims],
+                )
+                self._conn.executemany(
+                    "UPDATE packs SET live_bytes = live_bytes - ? WHERE id = ?",
+                    [(length, pack_id) for _key, pack_id, length in victims],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(victims)
+
+    def _idle_packs(self) -> list[tuple[int, int, int]]:
+        """더 이상 append 되지 않는 팩 (봉인됐거나 주인이 오래 멈춤): (id, size, live_bytes)."""
+        active = self._writer[0] if self._writer is not None else -1
+        stale_before = time.time() - STALE_WRITER_SECONDS
+        return [
+            (int(pack_id), int(size), int(live))
+            for pack_id, size, live in self._conn.execute(
+                """
+                SELECT id, size, live_bytes FROM packs
+                WHERE id != ? AND (sealed = 1 OR updated_at < ?)
+                """,
+                (active, stale_before),
+            )
+        ]
+
+    def needs_merge(self) -> bool:
+        """합칠 만한 작은 봉인 팩이 둘 이상 있는지."""
+        with self._lock:
+            small = [row for row in self._idle_packs() if row[1] < PACK_MERGE_BYTES]
+        return len(small) >= 2
+
+    def compact(self, min_garbage: float = COMPACT_MIN_GARBAGE) -> int:
+        """빈 공간이 많은 팩과 작은 팩들의 살아있는 항목을 현재 팩으로 옮기고 지운다.
+
+        회수한 바이트 수 반환.
+        """
+        with self._lock:
+            candidates = self._idle_packs()
+        small = [row for row in candidates if row[1] < PACK_MERGE_BYTES]
+        merge = {pack_id for pack_id, _size, _live in small} if len(small) >= 2 else set()
+        reclaimed = 0
+        for pack_id, size, live in candidates:
+            if pack_id not in merge and size > 0 and live > size * (1.0 - min_garbage):
+                continue
+            reclaimed += size - self._compact_pack(pack_id)
+        self._remove_orphans()
+        return reclaimed
+
+    def _compact_pack(self, pack_id: int) -> int:
+        with self._lock:
+            self._flush_access()
+            self._begin()
+            try:
+                self._conn.execute("UPDATE packs SET sealed = 1 WHERE id = ?", (pack_id,))
+                rows = self._conn.execute(
+                    "SELECT key, offset, length, last_access FROM thumbs WHERE pack_id = ?",
+                    (pack_id,),
+                ).fetchall()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        moved = 0
+        if rows:
+            # 봉인된 팩은 더 이상 쓰이지 않으므로 락 없이 읽고, 항목별로만 락을 잡는다.
+            try:
+                with open(self._pack_path(pack_id), "rb") as src:
+                    for key, offset, length, last_access in rows:
+                        src.seek(int(offset))
+                        data = src.read(int(length))
+                        if len(data) != int(length):
+                            continue
+                        with self._lock:
+                            if self._write_entry(
+                                key, data, float(last_access), expect=(pack_id, int(offset))
+                            ):
+                                moved += len(data)
+            except FileNotFoundError:
+                pass
+
+        with self._lock:
+            self._begin()
+            try:
+                self._conn.execute("DELETE FROM thumbs WHERE pack_id = ?", (pack_id,))
+                self._conn.execute("DELETE FROM packs WHERE id = ?", (pack_id,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._maps.pop(pack_id, None)
+        try:
+            self._pack_path(pack_id).unlink()
+        except OSError:
+            # Windows에서 아직 매핑된 조각이 있으면 지울 수 없다 → 다음 압축 때 고아 파일로 정리.
+            pass
+        return moved
+
+    def _remove_orphans(self) -> None:
+        # 디렉터리를 먼저 읽는다. 다른 프로세스는 packs 행을 커밋한 뒤에 파일을 만들므로,
+        # 여기서 본 파일의 행은 아래 조회에 반드시 보인다 (순서가 반대면 새 팩을 지울 수 있다).
+        try:
+            entries = list(os.scandir(self.pack_dir))
+        except FileNotFoundError:
+            return
+        with self._lock:
+            known = {int(row[0]) for row in self._conn.execute("SELECT id FROM packs")}
+        for entry in entries:
+            name = entry.name
+            if not (name.startswith("pack-") and name.endswith(".dat")):
+                continue
+            try:
+                pack_id = int(name[5:-4])
+            except ValueError:
+                continue
+            if pack_id in known:
+                continue
+            with self._lock:
+                self._maps.pop(pack_id, None)
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
+    def _compact_quietly(self, min_garbage: float) -> None:
+        # 백그라운드 압축 실패는 다음 압축에서 다시 시도하면 되므로 무시한다.
+        try:
+            self.compact(min_garbage)
+        except (OSError, sqlite3.Error):
+            pass
+
+    def compact_in_background(self, min_garbage: float = COMPACT_MIN_GARBAGE) -> bool:
+        """압축을 데몬 스레드로 시작. 이미 실행 중이면 False."""
+        with self._lock:
+            if self._compact_thread is not None and self._compact_thread.is_alive():
+                return False
+            thread = threading.Thread(
+                target=self._compact_quietly,
+                args=(min_garbage,),
+                name="thumb-pack-compact",
+                daemon=True,
+            )
+            self._compact_thread = thread
+        thread.start()
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_access()
+            self._seal_writer()
+            self._conn.commit()
+            for mapped in self._maps.values():
+                try:
+                    mapped.close()
+                except BufferError:
+                    # 아직 쓰는 조각이 있으면 그 조각이 해제될 때 닫힌다.
+                    pass
+            self._maps.clear()
+            self._conn.close()
+
+
+_PACKS: dict[tuple[int, str], ThumbPack] = {}
+_PACKS_LOCK = threading.Lock()
+
+
+def open_pack(root: str | Path) -> ThumbPack:
+    """프로세스별로 캐시 폴더당 하나의 ThumbPack을 공유한다."""
+    key = (os.getpid(), str(Path(root).resolve()))
+    with _PACKS_LOCK:
+        pack = _PACKS.get(key)
+        if pack is None:
+            pack = ThumbPack(root)
+            _PACKS[key] = pack
+        return pack
+
+
+def close_packs(root: str | Path | None = None) -> None:
+    """open_pack으로 연 팩을 닫는다 (root를 주면 그 캐시 폴더만).
+
+    인덱스 DB/팩 파일 핸들이 열려 있으면 Windows에서 캐시 폴더를 지울 수 없다.
+    """
+    pid = os.getpid()
+    wanted = str(Path(root).resolve()) if root is not None else None
+    with _PACKS_LOCK:
+        keys = [key for key in _PACKS if key[0] == pid and (wanted is None or key[1] == wanted)]
+        packs = [_PACKS.pop(key) for key in keys]
+    for pack in packs:
+        try:
+            pack.close()
+        except (OSError, sqlite3.Error):
+            pass
+
+
+@atexit.register
+def _close_packs_at_exit() -> None:
+    # 읽기 시각을 기록하고 쓰던 팩을 봉인한다. 스캔 워커가 끝날 때 팩이 한 시간 동안
+    # 열린 채로 남지 않고 바로 압축/병합 대상이 된다.
+    close_packs()
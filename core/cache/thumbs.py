@@ -0,0 +1,200 @@
+"""Thumbnail cache (content-addressed JPEG bytes in the pack store under cache/thumbs/)."""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from PIL import Image
+
+from .pack import open_pack
+
+
+DEFAULT_SIZE = 256
+DEFAULT_QUALITY = 85
+
+# 키 계산 시 읽는 앞/뒤 구간 크기. 이보다 두 배 이하인 파일은 전체를 해시한다.
+_KEY_SAMPLE_BYTES = 256 * 1024
+
+
+def _parse_int(value: object) -> int | None:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def cache_policy_from_env() -> tuple[int | None, int | None]:
+    """NAI_THUMB_MAX_FILES / NAI_THUMB_MAX_BYTES (구 이름 NAI_CACHE_MAX_*도 허용)."""
+    max_files = _parse_int(os.environ.get("NAI_THUMB_MAX_FILES"))
+    if max_files is None:
+        max_files = _parse_int(os.environ.get("NAI_CACHE_MAX_FILES"))
+    max_bytes = _parse_int(os.environ.get("NAI_THUMB_MAX_BYTES"))
+    if max_bytes is None:
+        max_bytes = _parse_int(os.environ.get("NAI_CACHE_MAX_BYTES"))
+    return max_files, max_bytes
+
+
+def resolve_cache_dir(cache_dir: str | Path | None = None) -> Path:
+    if cache_dir:
+        path = Path(str(cache_dir))
+    else:
+        env_dir = os.environ.get("NAI_THUMB_DIR") or os.environ.get("NAI_CACHE_DIR")
+        if env_dir:
+            path = Path(env_dir)
+        else:
+            path = Path(__file__).resolve().parents[2] / "cache" / "thumbs"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@lru_cache(maxsize=65536)
+def _content_digest(path: str, mtime_ns: int, file_size: int) -> str:
+    # mtime_ns는 캐시 무효화용 인자. 키는 크기 + 앞/뒤 구간에서 계산해 큰 파일도 최대 512KiB만 읽는다.
+    # 앞부분만 보면 헤더가 같은 재인코딩 파일이 섞이고, PNG는 마지막 IDAT의 adler32/CRC가
+    # 픽셀 데이터 전체에 걸리므로 뒤 구간까지 보면 제자리 편집도 키가 바뀐다.
+    hasher = hashlib.sha1(str(file_size).encode("ascii"))
+    with open(path, "rb") as handle:
+        if file_size <= _KEY_SAMPLE_BYTES * 2:
+            hasher.update(handle.read())
+        else:
+            hasher.update(handle.read(_KEY_SAMPLE_BYTES))
+            handle.seek(file_size - _KEY_SAMPLE_BYTES)
+            hasher.update(handle.read(_KEY_SAMPLE_BYTES))
+    return hasher.hexdigest()
+
+
+def thumbnail_key(path: str | Path, size: int = DEFAULT_SIZE) -> str:
+    """파일 내용 기반 키. 이름 변경/폴더 이동 후에도 같은 썸네일을 가리킨다."""
+    path_str = str(path)
+    stat = os.stat(path_str)
+    digest = _content_digest(path_str, stat.st_mtime_ns, stat.st_size)
+    return f"{digest}-{int(size)}"
+
+
+def has_thumbnail(
+    path: str | Path,
+    cache_dir: str | Path | None = None,
+    size: int = DEFAULT_SIZE,
+) -> bool:
+    try:
+        key = thumbnail_key(path, size)
+    except OSError:
+        return False
+    return open_pack(resolve_cache_dir(cache_dir)).contains(key)
+
+
+def render_thumbnail(img: Image.Image, size: int, *, fast: bool = True) -> Image.Image:
+    """긴 변이 size 이하인 RGB 썸네일. 원본 img는 수정하지 않는다.
+
+    fast=True면 JPEG는 draft()로 DCT 단계에서 축소 디코딩하고, 그 외 포맷은
+    reduce()로 정수 배율 박스 축소를 먼저 한 뒤 LANCZOS로 마무리한다.
+    """
+    if fast and img.format == "JPEG":
+        # 아직 디코딩 전인 경우에만 효과가 있다 (이미 load된 이미지는 그대로).
+        img.draft("RGB", (size, size))
+
+    work = img
+    if work.mode not in ("RGB", "RGBA", "L"):
+        work = work.convert("RGBA" if "transparency" in work.info else "RGB")
+
+    width, height = work.size
+    longest = max(width, height)
+    if fast:
+        factor = longest // (size * 2)
+        if factor > 1:
+            work = work.reduce(factor)
+            width, height = work.size
+            longest = max(width, height)
+
+    if longest > size:
+        scale = size / longest
+        target = (max(1, round(width * scale)), max(1, round(height * scale)))
+        work = work.resize(target, Image.Resampling.LANCZOS)
+    if work.mode != "RGB":
+        work = work.convert("RGB")
+    if work is img:
+        work = work.copy()
+    return work
+
+
+def _encode_jpeg(thumb: Image.Image, quality: int) -> bytes:
+    buf = io.BytesIO()
+    thumb.save(buf, "JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def ensure_thumbnail(
+    path: str | Path,
+    cache_dir: str | Path | None = None,
+    *,
+    size: int = DEFAULT_SIZE,
+    quality: int = DEFAULT_QUALITY,
+    force: bool = False,
+    image: Image.Image | None = None,
+) -> str | None:
+    """썸네일 키를 반환 (없으면 생성해서 팩에 저장). 실패 시 None.
+
+    image가 주어지면 다시 열지 않고 그 픽셀로 만든다 (스캔 워커가 디코딩한 이미지 공유).
+    """
+    try:
+        key = thumbnail_key(path, size)
+    except OSError:
+        return None
+    pack = open_pack(resolve_cache_dir(cache_dir))
+    if not force and pack.contains(key):
+        return key
+
+    try:
+        if image is not None:
+            thumb = render_thumbnail(image, size)
+        else:
+            with Image.open(path) as img:
+                thumb = render_thumbnail(img, size)
+        pack.put(key, _encode_jpeg(thumb, quality))
+    except Exception:
+        return None
+    return key
+
+
+def load_thumbnail(
+    path: str | Path,
+    cache_dir: str | Path | None = None,
+    *,
+    size: int = DEFAULT_SIZE,
+    quality: int = DEFAULT_QUALITY,
+) -> memoryview | None:
+    """JPEG 바이트(팩 파일 mmap 조각)를 반환. 캐시에 없으면 생성한다."""
+    key = ensure_thumbnail(path, cache_dir, size=size, quality=quality)
+    if key is None:
+        return None
+    return open_pack(resolve_cache_dir(cache_dir)).get(key)
+
+
+def cache_stats(cache_dir: str | Path | None = None) -> tuple[int, int]:
+    return open_pack(resolve_cache_dir(cache_dir)).stats()
+
+
+def prune_cache(
+    cache_dir: str | Path | None = None,
+    max_files: int | None = None,
+    max_bytes: int | None = None,
+) -> int:
+    """오래 안 쓴 썸네일부터 지워서 개수/용량 한도 안으로 맞춘다. 삭제한 항목 수 반환.
+
+    팩 파일의 빈 공간과 작은 팩 병합은 백그라운드 압축으로 처리된다.
+    """
+    pack = open_pack(resolve_cache_dir(cache_dir))
+    removed = pack.prune(max_files=max_files, max_bytes=max_bytes)
+    if removed or pack.needs_merge():
+        pack.compact_in_background()
+    return removed
+
+
+def compact_cache(cache_dir: str | Path | None = None) -> int:
+    """팩 압축을 지금 실행 (회수한 바이트 수 반환)."""
+    return open_pack(resolve_cache_dir(cache_dir)).compact()
@@ -0,0 +1,182 @@
+"""SQL-side classification (태그를 Python으로 읽지 않고 SQLite 안에서 매칭)."""
+from __future__ import annotations
+
+import sqlite3
+from typing import Any, Iterable
+
+from .query import _get_schema_flags
+
+
+def load_classify_specs(conn: sqlite3.Connection, variable_specs: list[dict[str, Any]]) -> None:
+    """값별 태그 집합을 임시 테이블(temp.classify_values)에 올린다. 작업마다 한 번."""
+    conn.execute("DROP TABLE IF EXISTS temp.classify_values")
+    conn.execute(
+        """
+        CREATE TEMP TABLE classify_values (
+          spec_idx INTEGER NOT NULL,
+          value_idx INTEGER NOT NULL,
+          tag TEXT NOT NULL,
+          size INTEGER NOT NULL
+        )
+        """
+    )
+    rows: list[tuple[int, int, str, int]] = []
+    for spec_idx, spec in enumerate(variable_specs):
+        for value_idx, value in enumerate(spec["values"]):
+            tag_set = value["tag_set"]
+            for tag in tag_set:
+                rows.append((spec_idx, value_idx, tag, len(tag_set)))
+    conn.executemany("INSERT INTO temp.classify_values VALUES (?, ?, ?, ?)", rows)
+    conn.execute("CREATE INDEX temp.idx_classify_values ON classify_values(spec_idx, tag)")
+    conn.commit()
+
+
+def drop_classify_specs(conn: sqlite3.Connection) -> None:
+    conn.execute("DROP TABLE IF EXISTS temp.classify_values")
+    conn.execute("DROP TABLE IF EXISTS temp.classify_images")
+    conn.commit()
+
+
+def classify_paths_in_db(
+    conn: sqlite3.Connection,
+    paths: Iterable[str],
+    variable_specs: list[dict[str, Any]],
+    *,
+    include_negative: bool = False,
+    untagged: set[str] | None = None,
+) -> dict[str, dict[str, dict[str, Any]]]:
+    """DB에 태그 행이 있는 경로만 분류해서 {path: matches} 반환 (없는 경로는 빠진다).
+
+    untagged를 주면 images에는 있지만 태그 행이 없는 경로를 채운다. 빠진 경로 중 여기 없는 것은
+    DB에 없는 이미지라 호출 쪽이 DB를 다시 조회하지 않고 바로 파일에서 읽으면 된다.
+    load_classify_specs()를 먼저 호출해야 한다. 변수마다 쿼리 한 번:
+    이미지 태그 ⋈ 값 태그를 (이미지, 값)으로 묶어 맞은 태그 수가 값의 태그 수와 같은 것만 남긴다.
+    """
+    conn.execute("DROP TABLE IF EXISTS temp.classify_images")
+    conn.execute("CREATE TEMP TABLE classify_images (image_id INTEGER PRIMARY KEY, path TEXT NOT NULL)")
+    conn.execute("DROP TABLE IF EXISTS temp.classify_paths")
+    conn.execute("CREATE TEMP TABLE classify_paths (path TEXT PRIMARY KEY)")
+    conn.executemany("INSERT OR IGNORE INTO temp.classify_paths VALUES (?)", ((p,) for p in paths))
+    # 태그 행이 없는 이미지(구 스키마 등)는 Python 경로로 처리하도록 제외
+    conn.execute(
+        """
+        INSERT INTO temp.classify_images(image_id, path)
+        SELECT images.id, images.path
+        FROM temp.classify_paths AS cp
+        JOIN images ON images.path = cp.path
+        WHERE EXISTS (SELECT 1 FROM tags WHERE tags.image_id = images.id)
+        """
+    )
+    if untagged is not None:
+        untagged.update(
+            path
+            for (path,) in conn.execute(
+                """
+                SELECT images.path
+                FROM temp.classify_paths AS cp
+                JOIN images ON images.path = cp.path
+                WHERE images.id NOT IN (SELECT image_id FROM temp.classify_images)
+                """
+            )
+        )
+    conn.execute("DROP TABLE temp.classify_paths")
+    conn.commit()
+
+    flags = _get_schema_flags(conn)
+    if flags.get("tags_source") and not include_negative:
+        source_filter = "AND (tags.source_type IS NULL OR tags.source_type IN ('pos','char'))"
+    else:
+        source_filter = ""
+
+    image_paths = dict(conn.execute("SELECT image_id, path FROM temp.classify_images").fetchall())
+    matched: dict[int, list[list[int]]] = {
+        image_id: [[] for _ in variable_specs] for image_id in image_paths
+    }
+    for spec_idx in range(len(variable_specs)):
+        rows = conn.execute(
+            f"""
+            SELECT ci.image_id, v.value_idx
+            FROM temp.classify_images AS ci
+            JOIN tags ON tags.image_id = ci.image_id {source_filter}
+            JOIN temp.classify_values AS v ON v.spec_idx = ? AND v.tag = tags.tag
+            GROUP BY ci.image_id, v.value_idx
+            HAVING COUNT(DISTINCT tags.tag) = MAX(v.size)
+            ORDER BY ci.image_id, v.value_idx
+            """,
+            (spec_idx,),
+        )
+        for image_id, value_idx in rows:
+            matched[image_id][spec_idx].append(int(value_idx))
+
+    results: dict[str, dict[str, dict[str, Any]]] = {}
+    for image_id, per_spec in matched.items():
+        matches: dict[str, dict[str, Any]] = {}
+        for spec, value_ids in zip(variable_specs, per_spec):
+            values = [spec["values"][idx]["name"] for idx in value_ids]
+            if not values:
+                status = "UNKNOWN"
+            elif len(values) == 1:
+                status = "OK"
+            else:
+                status = "CONFLICT"
+            matches[spec["name"]] = {"status": status, "values": values}
+        results[image_paths[image_id]] = matches
+    return results
+
+
+def rebase_matches(
+    conn: sqlite3.Connection,
+    variable: str,
+    old_hash: str,
+    new_hash: str,
+    changed_tag_sets: Iterable[frozenset[str]],
+    *,
+    include_negative: bool = False,
+) -> int:
+    """스펙이 바뀐 변수의 저장 결과 중 바뀐 값과 무관한 행을 새 해시로 옮긴다. 옮긴 행 수 반환.
+
+    바뀐 값(이전/현재 어느 쪽이든)의 태그를 모두 가진 이미지를 태그 색인으로 찾아 제외하고,
+    나머지 중 tag_version이 그대로인 행만 spec_hash를 바꾼다. 제외된 행은 다음 분류 때 다시 계산된다.
+    """
+    flags = _get_schema_flags(conn)
+    if flags.get("tags_source") and not include_negative:
+        source_filter = "AND (source_type IS NULL OR source_type IN ('pos','char'))"
+    else:
+        source_filter = ""
+    conn.execute("DROP TABLE IF EXISTS temp.rebase_affected")
+    conn.execute("CREATE TEMP TABLE rebase_affected (image_id INTEGER PRIMARY KEY)")
+    for tag_set in changed_tag_sets:
+        tags = sorted(tag_set)
+        if not tags:
+            continue
+        placeholders = ", ".join("?" for _ in tags)
+        conn.execute(
+            f"""
+            INSERT OR IGNORE INTO temp.rebase_affected(image_id)
+            SELECT image_id FROM tags
+            WHERE tag IN ({placeholders}) {source_filter}
+            GROUP BY image_id
+            HAVING COUNT(DISTINCT tag) = ?
+            """,
+            [*tags, len(tags)],
+        )
+    # 태그 행이 없는 이미지는 색인으로 판단할 수 없으니 영향받은 것으로 본다.
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO temp.rebase_affected(image_id)
+        SELECT images.id FROM images
+        WHERE NOT EXISTS (SELECT 1 FROM tags WHERE tags.image_id = images.id)
+        """
+    )
+    cursor = conn.execute(
+        """
+        UPDATE matches SET spec_hash = ?
+        WHERE variable = ?
+          AND spec_hash = ?
+          AND tag_version = (SELECT images.tag_version FROM images WHERE images.id = matches.image_id)
+          AND image_id NOT IN (SELECT image_id FROM temp.rebase_affected)
+        """,
+        (new_hash, variable, old_hash),
+    )
+    conn.execute("DROP TABLE temp.rebase_affected")
+    return max(0, cursor.rowcount)
@@ -51,6 +51,248 @@ def count_matches(conn: sqlite3.Connection) -> int:
     return int(row[0])
 
 
+def get_stored_matches(
+    conn: sqlite3.Connection,
+    paths: Iterable[str],
+    *,
+    batch_size: int = 500,
+) -> dict[str, tuple[int, int, dict[str, tuple[str | None, int | None, str, list[str]]]]]:
+    """DB에 있는 경로별 (image_id, tag_version, {변수: (spec_hash, tag_version, status, values)}).
+
+    유효성 판단(스펙 해시/태그 버전 비교)은 호출 쪽에서 한다.
+    """
+    paths = list(paths)
+    results: dict[str, tuple[int, int, dict[str, tuple[str | None, int | None, str, list[str]]]]] = {}
+    for start in range(0, len(paths), batch_size):
+        batch = paths[start : start + batch_size]
+        placeholders = ", ".join("?" for _ in batch)
+        rows = conn.execute(
+            f"""
+            SELECT images.path, images.id, images.tag_version,
+                   matches.variable, matches.spec_hash, matches.tag_version,
+                   matches.status, matches.values_json
+            FROM images
+            LEFT JOIN matches ON matches.image_id = images.id
+            WHERE images.path IN ({placeholders})
+            """,
+            batch,
+        ).fetchall()
+        for path, image_id, tag_version, variable, spec_hash, row_version, status, values_json in rows:
+            entry = results.get(path)
+            if entry is None:
+                entry = (int(image_id), int(tag_version or 0), {})
+                results[path] = entry
+            if variable is not None:
+                entry[2][variable] = (spec_hash, row_version, status, json.loads(values_json or "[]"))
+    return results
+
+
+def get_superseded_specs(
+    conn: sqlite3.Connection,
+    variable: str,
+    spec_hash: str,
+) -> list[tuple[str, str]]:
+    """variable의 저장된 결과 중 spec_hash가 아닌 이전 스펙들 (spec_hash, spec_json)."""
+    rows = conn.execute(
+        """
+        SELECT match_specs.spec_hash, match_specs.spec_json
+        FROM match_specs
+        WHERE match_specs.variable = ?
+          AND match_specs.spec_hash != ?
+          AND EXISTS (
+            SELECT 1 FROM matches
+            WHERE matches.variable = match_specs.variable
+              AND matches.spec_hash = match_specs.spec_hash
+          )
+        """,
+        (variable, spec_hash),
+    ).fetchall()
+    return [(row[0], row[1]) for row in rows]
+
+
+def has_job_checkpoint_item(conn: sqlite3.Connection, checkpoint_id: int, path_hash: int) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM job_checkpoint_items WHERE checkpoint_id = ? AND path_hash = ?",
+        (checkpoint_id, path_hash),
+    ).fetchone()
+    return row is not None
+
+
+def job_checkpoint_has_items(conn: sqlite3.Connection, checkpoint_id: int) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM job_checkpoint_items WHERE checkpoint_id = ? LIMIT 1",
+        (checkpoint_id,),
+    ).fetchone()
+    return row is not None
+
+
+def get_plan(conn: sqlite3.Connection, plan_id: int) -> dict | None:
+    row = conn.execute(
+        "SELECT id, kind, folder, payload_json, status, created_at, updated_at FROM plans WHERE id = ?",
+        (plan_id,),
+    ).fetchone()
+    if not row:
+        return None
+    counts = dict(
+        conn.execute(
+            "SELECT state, COUNT(*) FROM plan_items WHERE plan_id = ? GROUP BY state",
+            (plan_id,),
+        ).fetchall()
+    )
+    return {
+        "id": int(row[0]),
+        "kind": row[1],
+        "folder": row[2],
+        "payload": json.loads(row[3]),
+        "status": row[4],
+        "created_at": row[5],
+        "updated_at": row[6],
+        "counts": {state: int(count) for state, count in counts.items()},
+    }
+
+
+def list_plan_items(
+    conn: sqlite3.Connection,
+    plan_id: int,
+    *,
+    state: str | None = None,
+    after_seq: int = -1,
+    limit: int = 1000,
+) -> list[dict]:
+    """seq 순서로 한 페이지씩 (after_seq 다음부터)."""
+    query = """
+        SELECT seq, source, target, status, folder, message, state
+        FROM plan_items
+        WHERE plan_id = ? AND seq > ?
+    """
+    params: list = [plan_id, after_seq]
+    if state:
+        query += " AND state = ?"
+        params.append(state)
+    query += " ORDER BY seq LIMIT ?"
+    params.append(limit)
+    rows = conn.execute(query, params).fetchall()
+    return [
+        {
+            "seq": int(row[0]),
+            "source": row[1],
+            "target": row[2],
+            "status": row[3],
+            "folder": row[4],
+            "message": row[5],
+            "state": row[6],
+        }
+        for row in rows
+    ]
+
+
+def _job_result_filter(
+    job_id: str,
+    *,
+    statuses: Iterable[str] | None = None,
+    folder: str | None = None,
+    target: str | None = None,
+    search: str | None = None,
+) -> tuple[str, list]:
+    """job_results WHERE 절. target은 접두사, search는 source/target 부분 문자열."""
+    where = "job_id = ?"
+    params: list = [job_id]
+    if statuses is not None:
+        statuses = list(statuses)
+        where += f" AND status IN ({','.join('?' * len(statuses)) or 'NULL'})"
+        params.extend(statuses)
+    if folder is not None:
+        where += " AND folder = ?"
+        params.append(folder)
+    if target:
+        where += " AND target >= ? AND target < ?"
+        params.extend([target, target + "\U0010ffff"])
+    if search:
+        pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        where += " AND (source LIKE ? ESCAPE '\\' OR target LIKE ? ESCAPE '\\')"
+        params.extend([pattern, pattern])
+    return where, params
+
+
+def list_job_results(
+    conn: sqlite3.Connection,
+    job_id: str,
+    *,
+    after_seq: int = 0,
+    before_seq: int | None = None,
+    statuses: Iterable[str] | None = None,
+    folder: str | None = None,
+    target: str | None = None,
+    search: str | None = None,
+    offset: int = 0,
+    limit: int = 1000,
+) -> list[dict]:
+    """저장된 result 메시지를 seq 순서로 (after_seq 초과, before_seq 미만, 필터 적용)."""
+    where, params = _job_result_filter(
+        job_id, statuses=statuses, folder=folder, target=target, search=search
+    )
+    query = f"SELECT seq, message_json FROM job_results WHERE {where} AND seq > ?"
+    params.append(after_seq)
+    if before_seq is not None:
+        query += " AND seq < ?"
+        params.append(before_seq)
+    query += " ORDER BY seq LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+    results: list[dict] = []
+    for seq, message_json in conn.execute(query, params):
+        message = json.loads(message_json)
+        message["seq"] = int(seq)
+        results.append(message)
+    return results
+
+
+def count_job_results(
+    conn: sqlite3.Connection,
+    job_id: str,
+    *,
+    folder: str | None = None,
+    target: str | None = None,
+    search: str | None = None,
+) -> dict[str, int]:
+    """상태별 result 개수 (상태 필터 제외, 나머지 필터는 list_job_results와 같음)."""
+    where, params = _job_result_filter(job_id, folder=folder, target=target, search=search)
+    rows = conn.execute(
+        f"SELECT status, COUNT(*) FROM job_results WHERE {where} GROUP BY status", params
+    ).fetchall()
+    return {str(status): int(count) for status, count in rows}
+
+
+def list_job_result_folders(
+    conn: sqlite3.Connection,
+    job_id: str,
+    *,
+    statuses: Iterable[str] | None = None,
+    search: str | None = None,
+) -> list[dict]:
+    """folder별 result 개수와 미리보기(첫 result의 source), folder 이름순."""
+    where, params = _job_result_filter(job_id, statuses=statuses, search=search)
+    rows = conn.execute(
+        f"""
+        SELECT folder, COUNT(*), MIN(seq)
+        FROM job_results
+        WHERE {where}
+        GROUP BY folder
+        ORDER BY folder
+        """,
+        params,
+    ).fetchall()
+    folders: list[dict] = []
+    for folder, count, first_seq in rows:
+        preview = conn.execute(
+            "SELECT source FROM job_results WHERE job_id = ? AND seq = ?",
+            (job_id, first_seq),
+        ).fetchone()
+        folders.append(
+            {"folder": folder or "", "count": int(count), "preview": preview[0] if preview else None}
+        )
+    return folders
+
+
 def get_image_meta(conn: sqlite3.Connection, path: str) -> tuple[int, int] | None:
     row = conn.execute(
         "SELECT mtime, size FROM images WHERE path = ?",
@@ -61,6 +303,47 @@ def get_image_meta(conn: sqlite3.Connection, path: str) -> tuple[int, int] | Non
     return int(row[0]), int(row[1])
 
 
+def get_scan_dir_state(conn: sqlite3.Connection, path: str) -> tuple[int, int] | None:
+    row = conn.execute(
+        "SELECT mtime_ns, entry_count FROM scan_dirs WHERE path = ?",
+        (path,),
+    ).fetchone()
+    if not row:
+        return None
+    return int(row[0]), int(row[1])
+
+
+def get_scan_checkpoint_id(conn: sqlite3.Connection, folder: str) -> int | None:
+    row = conn.execute(
+        "SELECT id FROM scan_checkpoints WHERE folder = ?",
+        (folder,),
+    ).fetchone()
+    if not row:
+        return None
+    return int(row[0])
+
+
+def load_scan_checkpoint(
+    conn: sqlite3.Connection, checkpoint_id: int
+) -> tuple[set[str], set[str]]:
+    """완료된 디렉터리 집합과 진행 중 디렉터리에서 완료된 파일 집합을 반환."""
+    dirs = {
+        row[0]
+        for row in conn.execute(
+            "SELECT path FROM scan_checkpoint_dirs WHERE checkpoint_id = ?",
+            (checkpoint_id,),
+        )
+    }
+    files = {
+        row[0]
+        for row in conn.execute(
+            "SELECT path FROM scan_checkpoint_files WHERE checkpoint_id = ?",
+            (checkpoint_id,),
+        )
+    }
+    return dirs, files
+
+
 def _parse_tag_json(text: str | None) -> list[str]:
     if not text:
         return []
@@ -47,6 +47,17 @@ def ensure_schema(conn: sqlite3.Connection) -> None:
             conn.execute("ALTER TABLE images ADD COLUMN tags_neg_json TEXT")
         if "tags_char_json" not in images_cols:
             conn.execute("ALTER TABLE images ADD COLUMN tags_char_json TEXT")
+        if "tag_version" not in images_cols:
+            conn.execute("ALTER TABLE images ADD COLUMN tag_version INTEGER NOT NULL DEFAULT 0")
+
+    if _table_exists(conn, "matches"):
+        matches_cols = _table_columns(conn, "matches")
+        if "spec_hash" not in matches_cols:
+            # 예전 스키마에서는 아무도 쓰지 않던 테이블이라 비우고 새 키 컬럼을 붙인다.
+            conn.execute("DELETE FROM matches")
+            conn.execute("ALTER TABLE matches ADD COLUMN spec_hash TEXT")
+        if "tag_version" not in matches_cols:
+            conn.execute("ALTER TABLE matches ADD COLUMN tag_version INTEGER")
 
     if _table_exists(conn, "tags"):
         tags_cols = _table_columns(conn, "tags")
@@ -42,7 +42,13 @@ def upsert_image(
           tags_json=excluded.tags_json,
           tags_pos_json=excluded.tags_pos_json,
           tags_neg_json=excluded.tags_neg_json,
-          tags_char_json=excluded.tags_char_json
+          tags_char_json=excluded.tags_char_json,
+          tag_version=images.tag_version + (
+            images.tags_json IS NOT excluded.tags_json
+            OR images.tags_pos_json IS NOT excluded.tags_pos_json
+            OR images.tags_neg_json IS NOT excluded.tags_neg_json
+            OR images.tags_char_json IS NOT excluded.tags_char_json
+          )
         """,
         (path, mtime, size, hash_value, tags_json, tags_pos_json, tags_neg_json, tags_char_json),
     )
@@ -77,6 +83,243 @@ def replace_payloads(conn: sqlite3.Connection, image_id: int, payloads: Iterable
         )
 
 
+def save_matches(
+    conn: sqlite3.Connection,
+    rows: Iterable[tuple[int, str, str, list[str], str, int]],
+) -> None:
+    """(image_id, variable, status, values, spec_hash, tag_version) 행을 덮어쓴다."""
+    conn.executemany(
+        """
+        INSERT INTO matches(image_id, variable, status, values_json, spec_hash, tag_version)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(image_id, variable) DO UPDATE SET
+          status=excluded.status,
+          values_json=excluded.values_json,
+          spec_hash=excluded.spec_hash,
+          tag_version=excluded.tag_version
+        """,
+        (
+            (image_id, variable, status, json.dumps(values, ensure_ascii=False), spec_hash, tag_version)
+            for image_id, variable, status, values, spec_hash, tag_version in rows
+        ),
+    )
+
+
+def save_match_specs(conn: sqlite3.Connection, specs: Iterable[tuple[str, str, str]]) -> None:
+    """(spec_hash, variable, spec_json) 기록. 더 이상 matches가 참조하지 않는 스펙은 지운다."""
+    conn.execute(
+        """
+        DELETE FROM match_specs
+        WHERE NOT EXISTS (
+          SELECT 1 FROM matches
+          WHERE matches.variable = match_specs.variable
+            AND matches.spec_hash = match_specs.spec_hash
+        )
+        """
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO match_specs(spec_hash, variable, spec_json) VALUES (?, ?, ?)",
+        specs,
+    )
+
+
+def start_job_checkpoint(conn: sqlite3.Connection, kind: str, key: str, *, reset: bool) -> int:
+    now = _now_iso()
+    conn.execute(
+        """
+        INSERT INTO job_checkpoints(kind, key, created_at, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(kind, key) DO UPDATE SET updated_at=excluded.updated_at
+        """,
+        (kind, key, now, now),
+    )
+    row = conn.execute(
+        "SELECT id FROM job_checkpoints WHERE kind = ? AND key = ?", (kind, key)
+    ).fetchone()
+    checkpoint_id = int(row[0])
+    if reset:
+        conn.execute("DELETE FROM job_checkpoint_items WHERE checkpoint_id = ?", (checkpoint_id,))
+        conn.execute("UPDATE job_checkpoints SET created_at = ? WHERE id = ?", (now, checkpoint_id))
+    return checkpoint_id
+
+
+def add_job_checkpoint_items(conn: sqlite3.Connection, checkpoint_id: int, path_hashes: Iterable[int]) -> None:
+    conn.executemany(
+        "INSERT OR IGNORE INTO job_checkpoint_items(checkpoint_id, path_hash) VALUES (?, ?)",
+        ((checkpoint_id, path_hash) for path_hash in path_hashes),
+    )
+
+
+def delete_job_checkpoint(conn: sqlite3.Connection, kind: str, key: str) -> bool:
+    row = conn.execute(
+        "SELECT id FROM job_checkpoints WHERE kind = ? AND key = ?", (kind, key)
+    ).fetchone()
+    if not row:
+        return False
+    checkpoint_id = int(row[0])
+    conn.execute("DELETE FROM job_checkpoint_items WHERE checkpoint_id = ?", (checkpoint_id,))
+    conn.execute("DELETE FROM job_checkpoints WHERE id = ?", (checkpoint_id,))
+    return True
+
+
+def create_plan(conn: sqlite3.Connection, kind: str, folder: str, payload: dict) -> int:
+    now = _now_iso()
+    cursor = conn.execute(
+        """
+        INSERT INTO plans(kind, folder, payload_json, status, created_at, updated_at)
+        VALUES (?, ?, ?, 'planning', ?, ?)
+        """,
+        (kind, folder, json.dumps(payload, ensure_ascii=False), now, now),
+    )
+    return int(cursor.lastrowid)
+
+
+def set_plan_status(conn: sqlite3.Connection, plan_id: int, status: str) -> None:
+    conn.execute(
+        "UPDATE plans SET status = ?, updated_at = ? WHERE id = ?",
+        (status, _now_iso(), plan_id),
+    )
+
+
+def add_plan_items(
+    conn: sqlite3.Connection,
+    plan_id: int,
+    items: Iterable[tuple[int, str, str | None, str, str | None, str | None]],
+) -> None:
+    """(seq, source, target, status, folder, message). 대상이 있으면 pending, 없으면 skipped."""
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO plan_items(plan_id, seq, source, target, status, folder, message, state)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (plan_id, seq, source, target, status, folder, message, "pending" if target else "skipped")
+            for seq, source, target, status, folder, message in items
+        ),
+    )
+
+
+def mark_plan_items(
+    conn: sqlite3.Connection,
+    plan_id: int,
+    updates: Iterable[tuple[int, str, str | None]],
+) -> None:
+    """(seq, state, message) 반영."""
+    conn.executemany(
+        "UPDATE plan_items SET state = ?, message = COALESCE(?, message) WHERE plan_id = ? AND seq = ?",
+        ((state, message, plan_id, seq) for seq, state, message in updates),
+    )
+
+
+def delete_plan(conn: sqlite3.Connection, plan_id: int) -> bool:
+    conn.execute("DELETE FROM plan_items WHERE plan_id = ?", (plan_id,))
+    cursor = conn.execute("DELETE FROM plans WHERE id = ?", (plan_id,))
+    return cursor.rowcount > 0
+
+
+def add_job_results(conn: sqlite3.Connection, job_id: str, items: Iterable[tuple[int, dict]]) -> None:
+    """(seq, result 메시지) 저장. 메시지 전체는 message_json에.
+
+    folder는 이동 결과의 분류 폴더 (target_root 상대경로, 분류 안 됐으면 빈 문자열).
+    """
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO job_results(job_id, seq, status, source, target, folder, message_json)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (
+                job_id,
+                seq,
+                message.get("status"),
+                message.get("source"),
+                message.get("target"),
+                message.get("folder") or "",
+                json.dumps(message, ensure_ascii=False),
+            )
+            for seq, message in items
+        ),
+    )
+
+
+def delete_job_results(conn: sqlite3.Connection, job_id: str | None = None) -> int:
+    """작업 하나(job_id) 또는 전체 결과 삭제."""
+    if job_id is None:
+        cur = conn.execute("DELETE FROM job_results")
+    else:
+        cur = conn.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+    return cur.rowcount
+
+
+def upsert_scan_dir(
+    conn: sqlite3.Connection,
+    path: str,
+    mtime_ns: int,
+    entry_count: int,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO scan_dirs(path, mtime_ns, entry_count, scanned_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(path) DO UPDATE SET
+          mtime_ns=excluded.mtime_ns,
+          entry_count=excluded.entry_count,
+          scanned_at=excluded.scanned_at
+        """,
+        (path, mtime_ns, entry_count, _now_iso()),
+    )
+
+
+def start_scan_checkpoint(conn: sqlite3.Connection, folder: str, *, reset: bool) -> int:
+    now = _now_iso()
+    conn.execute(
+        """
+        INSERT INTO scan_checkpoints(folder, created_at, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(folder) DO UPDATE SET updated_at=excluded.updated_at
+        """,
+        (folder, now, now),
+    )
+    row = conn.execute("SELECT id FROM scan_checkpoints WHERE folder = ?", (folder,)).fetchone()
+    checkpoint_id = int(row[0])
+    if reset:
+        conn.execute("DELETE FROM scan_checkpoint_dirs WHERE checkpoint_id = ?", (checkpoint_id,))
+        conn.execute("DELETE FROM scan_checkpoint_files WHERE checkpoint_id = ?", (checkpoint_id,))
+        conn.execute("UPDATE scan_checkpoints SET created_at = ? WHERE id = ?", (now, checkpoint_id))
+    return checkpoint_id
+
+
+def mark_checkpoint_file(
+    conn: sqlite3.Connection, checkpoint_id: int, dir_path: str, path: str
+) -> None:
+    conn.execute(
+        "INSERT OR IGNORE INTO scan_checkpoint_files(checkpoint_id, dir, path) VALUES (?, ?, ?)",
+        (checkpoint_id, dir_path, path),
+    )
+
+
+def mark_checkpoint_dir(conn: sqlite3.Connection, checkpoint_id: int, dir_path: str) -> None:
+    """디렉터리를 완료 처리하고, 더 필요 없는 파일 단위 기록은 지운다."""
+    conn.execute(
+        "INSERT OR IGNORE INTO scan_checkpoint_dirs(checkpoint_id, path) VALUES (?, ?)",
+        (checkpoint_id, dir_path),
+    )
+    conn.execute(
+        "DELETE FROM scan_checkpoint_files WHERE checkpoint_id = ? AND dir = ?",
+        (checkpoint_id, dir_path),
+    )
+
+
+def delete_scan_checkpoint(conn: sqlite3.Connection, folder: str) -> bool:
+    row = conn.execute("SELECT id FROM scan_checkpoints WHERE folder = ?", (folder,)).fetchone()
+    if not row:
+        return False
+    checkpoint_id = int(row[0])
+    conn.execute("DELETE FROM scan_checkpoint_files WHERE checkpoint_id = ?", (checkpoint_id,))
+    conn.execute("DELETE FROM scan_checkpoint_dirs WHERE checkpoint_id = ?", (checkpoint_id,))
+    conn.execute("DELETE FROM scan_checkpoints WHERE id = ?", (checkpoint_id,))
+    return True
+
+
 def upsert_template(conn: sqlite3.Connection, name: str, payload: dict) -> int:
     now = _now_iso()
     payload_json = json.dumps(payload, ensure_ascii=False)
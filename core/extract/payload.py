@@ -59,9 +59,15 @@ def robust_decompress(data_bytes: bytes) -> str | None:
     return None
 
 
-def extract_stealth_payload_text(image_path: str) -> str | None:
+def extract_stealth_payload_text(
+    image_path: str, image: Image.Image | None = None
+) -> str | None:
+    # image가 주어지면 이미 디코딩된 픽셀을 재사용 (스캔 워커에서 썸네일과 공유)
     try:
-        img = Image.open(image_path).convert("RGBA")
+        if image is not None:
+            img = image if image.mode == "RGBA" else image.convert("RGBA")
+        else:
+            img = Image.open(image_path).convert("RGBA")
     except Exception:
         return None
 
@@ -188,22 +194,28 @@ def extract_payloads_from_exif(img: Image.Image) -> list[dict]:
     return unwrap_comment_payload(exif_map)
 
 
-def extract_payloads_from_image(image_path: str) -> list[dict]:
+def extract_payloads_from_image(
+    image_path: str, image: Image.Image | None = None
+) -> list[dict]:
     payloads: list[dict] = []
     raw_payloads: list[dict] = []
 
-    stealth_text = extract_stealth_payload_text(image_path)
+    stealth_text = extract_stealth_payload_text(image_path, image=image)
     if stealth_text:
         stealth_payload = _parse_json_text(stealth_text)
         if isinstance(stealth_payload, dict):
             raw_payloads.append(stealth_payload)
 
     try:
-        with Image.open(image_path) as img:
-            exif_payloads = extract_payloads_from_exif(img)
-            info_payloads = extract_payloads_from_metadata(img.info or {})
-            raw_payloads.extend(exif_payloads)
-            raw_payloads.extend(info_payloads)
+        if image is not None:
+            raw_payloads.extend(extract_payloads_from_exif(image))
+            raw_payloads.extend(extract_payloads_from_metadata(image.info or {}))
+        else:
+            with Image.open(image_path) as img:
+                exif_payloads = extract_payloads_from_exif(img)
+                info_payloads = extract_payloads_from_metadata(img.info or {})
+                raw_payloads.extend(exif_payloads)
+                raw_payloads.extend(info_payloads)
     except Exception:
         return payloads
 
@@ -1,8 +1,32 @@
+from .batch import BatchClassifier
+from .matcher import (
+    TagSetCache,
+    VariableMatcher,
+    changed_value_tag_sets,
+    compile_variable_specs,
+    spec_text_hash,
+    variable_spec_hashes,
+    variable_spec_texts,
+)
 from .tasks import move_task, rename_task, search_task, strip_suffix_task
-from .worker import build_variable_specs, init_worker, match_variable_specs, process_image
+from .worker import (
+    MIN_PARALLEL,
+    build_variable_specs,
+    classify_workers,
+    init_worker,
+    match_variable_specs,
+    process_image,
+)
 
 __all__ = [
+    "MIN_PARALLEL",
+    "BatchClassifier",
+    "TagSetCache",
+    "VariableMatcher",
     "build_variable_specs",
+    "changed_value_tag_sets",
+    "classify_workers",
+    "compile_variable_specs",
     "init_worker",
     "match_variable_specs",
     "process_image",
@@ -10,4 +34,7 @@ __all__ = [
     "move_task",
     "strip_suffix_task",
     "search_task",
+    "spec_text_hash",
+    "variable_spec_hashes",
+    "variable_spec_texts",
 ]
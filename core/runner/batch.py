@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+import numpy as np
+
+
+class BatchClassifier:
+    """NumPy 비트셋으로 이미지 여러 장을 한 번에 분류한다.
+
+    값 태그에 등장하는 태그만 어휘(vocabulary)로 삼고, 어휘의 태그마다 블록 안 이미지들을
+    packed 비트셋(uint64, 이미지 64장당 1워드)으로 만든다. 태그 k개짜리 값은 그 k개 행을
+    AND 하면 "값의 태그를 모두 가진 이미지" 비트셋이 되므로, 태그 수별로 묶어 한 번에 계산한다.
+    결과 형식은 match_variable_specs와 같다.
+    """
+
+    def __init__(self, variable_specs: list[dict[str, Any]]) -> None:
+        self.names: list[str] = [spec["name"] for spec in variable_specs]
+        self._value_names: list[list[str]] = []
+        self._spec_ranges: list[tuple[int, int]] = []
+        self.vocab: dict[str, int] = {}
+
+        by_size: dict[int, list[tuple[int, list[int]]]] = {}
+        offset = 0
+        for spec in variable_specs:
+            names: list[str] = []
+            for value in spec["values"]:
+                names.append(value["name"])
+                tag_set = value["tag_set"]
+                if tag_set:
+                    ids = [self.vocab.setdefault(tag, len(self.vocab)) for tag in sorted(tag_set)]
+                    by_size.setdefault(len(ids), []).append((offset + len(names) - 1, ids))
+            self._value_names.append(names)
+            self._spec_ranges.append((offset, offset + len(names)))
+            offset += len(names)
+        self.value_count = offset
+
+        # 태그 수별 (값 번호 N, 어휘 번호 N×k)
+        self._groups: list[tuple[np.ndarray, np.ndarray]] = [
+            (
+                np.array([value_id for value_id, _ids in entries], dtype=np.int64),
+                np.array([ids for _value_id, ids in entries], dtype=np.int64),
+            )
+            for _size, entries in sorted(by_size.items())
+        ]
+
+    def encode(self, tag_sets: list[Iterable[str]]) -> np.ndarray:
+        """정규화된 태그 집합들 → 어휘 태그별 이미지 비트셋 (어휘 수 × ceil(이미지 수/64), uint64)."""
+        words = max(1, (len(tag_sets) + 63) // 64)
+        tag_rows: list[int] = []
+        image_cols: list[int] = []
+        vocab = self.vocab
+        vocab_keys = vocab.keys()
+        for image_idx, tags in enumerate(tag_sets):
+            # 어휘 밖 태그는 결과에 영향이 없으므로 교집합만 본다.
+            for tag in vocab_keys & (tags if isinstance(tags, (set, frozenset)) else set(tags)):
+                tag_rows.append(vocab[tag])
+                image_cols.append(image_idx)
+        packed = np.zeros((max(1, len(vocab)), words * 8), dtype=np.uint8)
+        if tag_rows:
+            cols = np.array(image_cols, dtype=np.int64)
+            np.bitwise_or.at(
+                packed,
+                (np.array(tag_rows, dtype=np.int64), cols >> 3),
+                (1 << (cols & 7)).astype(np.uint8),
+            )
+        return packed.view("<u8")
+
+    def match_bits(self, bits: np.ndarray) -> np.ndarray:
+        """값별 "태그를 모두 가진 이미지" 비트셋 (값 수 × 워드 수, uint64)."""
+        value_bits = np.zeros((self.value_count, bits.shape[1]), dtype="<u8")
+        for value_ids, tag_ids in self._groups:
+            value_bits[value_ids] = np.bitwise_and.reduce(bits[tag_ids], axis=1)
+        return value_bits
+
+    def match_tag_sets(self, tag_sets: list[Iterable[str]]) -> list[dict[str, dict[str, Any]]]:
+        """정규화된 태그 집합 목록을 분류 (순서 유지)."""
+        if not tag_sets:
+            return []
+        tag_sets = list(tag_sets)
+        value_bits = self.match_bits(self.encode(tag_sets))
+
+        # 0이 아닌 워드만 펼친다. 값 번호 오름차순으로 돌므로 이미지별 목록도 값 순서를 유지한다.
+        matched: list[list[int]] = [[] for _ in tag_sets]
+        value_ids, word_ids = np.nonzero(value_bits)
+        for value_id, word_id, word in zip(
+            value_ids.tolist(), word_ids.tolist(), value_bits[value_ids, word_ids].tolist()
+        ):
+            base = word_id * 64
+            while word:
+                low = word & -word
+                matched[base + low.bit_length() - 1].append(value_id)
+                word ^= low
+
+        results: list[dict[str, dict[str, Any]]] = []
+        for value_list in matched:
+            result: dict[str, dict[str, Any]] = {}
+            for spec_idx, name in enumerate(self.names):
+                start, end = self._spec_ranges[spec_idx]
+                value_names = self._value_names[spec_idx]
+                values = [value_names[value_id - start] for value_id in value_list if start <= value_id < end]
+                if not values:
+                    status = "UNKNOWN"
+                elif len(values) == 1:
+                    status = "OK"
+                else:
+                    status = "CONFLICT"
+                result[name] = {"status": status, "values": values}
+            results.append(result)
+        return results
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import Counter
+from typing import Any, Iterable
+
+from .worker import _normalize_tags
+
+
+class VariableMatcher:
+    """작업 시작 시 한 번 만드는 변수 스펙 매처.
+
+    태그 → (변수, 값) 역색인을 만들어 두고, 이미지 태그와 한 개 이상 겹치는 값만
+    적중 수를 센다. 적중 수가 값의 태그 수와 같으면 부분집합이다.
+    결과는 match_variable_specs와 같다 (값 순서, OK/UNKNOWN/CONFLICT 판정 포함).
+    """
+
+    def __init__(self, variable_specs: list[dict[str, Any]]) -> None:
+        self.names: list[str] = [spec["name"] for spec in variable_specs]
+        self._value_names: list[list[str]] = []
+        self._value_sizes: list[list[int]] = []
+        self._index: dict[str, list[tuple[int, int]]] = {}
+        for spec_idx, spec in enumerate(variable_specs):
+            names: list[str] = []
+            sizes: list[int] = []
+            for value_idx, value in enumerate(spec["values"]):
+                tag_set = value["tag_set"]
+                names.append(value["name"])
+                sizes.append(len(tag_set))
+                for tag in tag_set:
+                    self._index.setdefault(tag, []).append((spec_idx, value_idx))
+            self._value_names.append(names)
+            self._value_sizes.append(sizes)
+
+    def match_tag_set(self, tag_set: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """이미 정규화된 태그 집합으로 매칭."""
+        hits: dict[tuple[int, int], int] = {}
+        index = self._index
+        for tag in tag_set:
+            postings = index.get(tag)
+            if postings is None:
+                continue
+            for ref in postings:
+                hits[ref] = hits.get(ref, 0) + 1
+
+        matched_idx: list[list[int]] = [[] for _ in self.names]
+        for (spec_idx, value_idx), count in hits.items():
+            if count == self._value_sizes[spec_idx][value_idx]:
+                matched_idx[spec_idx].append(value_idx)
+
+        matches: dict[str, dict[str, Any]] = {}
+        for spec_idx, name in enumerate(self.names):
+            value_names = self._value_names[spec_idx]
+            matched = [value_names[idx] for idx in sorted(matched_idx[spec_idx])]
+            if not matched:
+                status = "UNKNOWN"
+            elif len(matched) == 1:
+                status = "OK"
+            else:
+                status = "CONFLICT"
+            matches[name] = {"status": status, "values": matched}
+        return matches
+
+    def match(self, tags: list[str]) -> dict[str, dict[str, Any]]:
+        return self.match_tag_set(_normalize_tags(tags))
+
+
+class TagSetCache:
+    """같은 정규화 태그 집합은 한 번만 분류하고 결과를 공유한다.
+
+    NovelAI 시드만 다른 변형처럼 태그 집합이 완전히 같은 이미지가 많을 때 효과가 크다.
+    반환하는 dict는 이미지끼리 공유되므로 호출 쪽에서 수정하지 않는다.
+    """
+
+    def __init__(self, matcher: VariableMatcher, max_entries: int = 200_000) -> None:
+        self.matcher = matcher
+        self.max_entries = max_entries
+        self.images = 0
+        self._results: dict[frozenset[str], dict[str, dict[str, Any]]] = {}
+
+    @property
+    def distinct(self) -> int:
+        return len(self._results)
+
+    def match(self, tags: list[str]) -> dict[str, dict[str, Any]]:
+        key = frozenset(_normalize_tags(tags))
+        self.images += 1
+        result = self._results.get(key)
+        if result is None:
+            result = self.matcher.match_tag_set(key)
+            if len(self._results) < self.max_entries:
+                self._results[key] = result
+        return result
+
+    def match_many(self, tag_lists: list[list[str]], batch=None) -> list[dict[str, dict[str, Any]]]:
+        """여러 이미지를 한 번에 분류. 처음 보는 태그 집합만 batch(BatchClassifier)로 묶어 계산."""
+        keys = [frozenset(_normalize_tags(tags)) for tags in tag_lists]
+        self.images += len(keys)
+        missing: list[frozenset[str]] = []
+        missing_seen: set[frozenset[str]] = set()
+        for key in keys:
+            if key not in self._results and key not in missing_seen:
+                missing_seen.add(key)
+                missing.append(key)
+        fresh: dict[frozenset[str], dict[str, dict[str, Any]]] = {}
+        if missing:
+            if batch is not None:
+                computed = batch.match_tag_sets(missing)
+            else:
+                computed = [self.matcher.match_tag_set(key) for key in missing]
+            fresh = dict(zip(missing, computed))
+            for key, result in fresh.items():
+                if len(self._results) >= self.max_entries:
+                    break
+                self._results[key] = result
+        return [fresh[key] if key in fresh else self._results[key] for key in keys]
+
+    def summary(self) -> str:
+        return f"classify: images={self.images}, distinct tag sets={self.distinct}"
+
+
+def variable_spec_texts(
+    variable_specs: list[dict[str, Any]],
+    *,
+    include_negative: bool = False,
+) -> dict[str, str]:
+    """변수 이름별 정규 스펙 JSON (값 이름/순서/태그 + include_negative). 이름이 겹치면 뒤의 스펙."""
+    texts: dict[str, str] = {}
+    for spec in variable_specs:
+        payload = {
+            "include_negative": bool(include_negative),
+            "values": [[value["name"], sorted(value["tag_set"])] for value in spec["values"]],
+        }
+        texts[spec["name"]] = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return texts
+
+
+def spec_text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def variable_spec_hashes(
+    variable_specs: list[dict[str, Any]],
+    *,
+    include_negative: bool = False,
+) -> dict[str, str]:
+    """변수 이름별 스펙 해시 (matches 테이블 캐시 키)."""
+    texts = variable_spec_texts(variable_specs, include_negative=include_negative)
+    return {name: spec_text_hash(text) for name, text in texts.items()}
+
+
+def changed_value_tag_sets(old_text: str, new_text: str) -> list[frozenset[str]] | None:
+    """같은 변수의 이전/현재 스펙 JSON을 값 단위로 비교해 바뀐 값들의 태그 집합을 반환.
+
+    이 태그 집합 중 어느 것도 갖지 않은 이미지는 결과가 그대로다.
+    include_negative가 다르거나 남은 값들의 순서가 바뀌었으면 None (전체 재계산).
+    """
+    old = json.loads(old_text)
+    new = json.loads(new_text)
+    if old["include_negative"] != new["include_negative"]:
+        return None
+    old_values = [(name, tuple(tags)) for name, tags in old["values"]]
+    new_values = [(name, tuple(tags)) for name, tags in new["values"]]
+    old_count = Counter(old_values)
+    new_count = Counter(new_values)
+    common = old_count & new_count
+
+    def kept(values: list[tuple[str, tuple[str, ...]]]) -> list[tuple[str, tuple[str, ...]]]:
+        remaining = common.copy()
+        out = []
+        for value in values:
+            if remaining[value] > 0:
+                remaining[value] -= 1
+                out.append(value)
+        return out
+
+    # 결과 values 목록은 스펙 순서를 따르므로, 남은 값의 상대 순서가 바뀌면 모두 다시 본다.
+    if kept(old_values) != kept(new_values):
+        return None
+    changed = (old_count - new_count) + (new_count - old_count)
+    # 빈 태그 집합 값은 어떤 이미지에도 매칭되지 않는다.
+    return [frozenset(tags) for _name, tags in changed if tags]
+
+
+def compile_variable_specs(variable_specs: list[dict[str, Any]]) -> VariableMatcher:
+    return VariableMatcher(variable_specs)
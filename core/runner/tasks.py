@@ -8,7 +8,7 @@ import re
 import shutil
 
 from core.match import iter_search_results
-from core.utils import ensure_unique_name, render_template, sanitize_filename
+from core.utils import FolderNameIndexes, render_template, sanitize_filename
 from .worker import init_worker, process_image
 
 
@@ -27,7 +27,7 @@ def rename_task(
     dry_run: bool,
     include_negative: bool,
 ) -> None:
-    reserved = {Path(path).name.lower() for path in image_paths}
+    name_indexes = FolderNameIndexes()
     chunksize = _compute_chunksize(len(image_paths))
 
     with multiprocessing.Pool(
@@ -82,7 +82,7 @@ def rename_task(
                     base_name = stem
 
             ext = Path(path).suffix
-            new_name = ensure_unique_name(Path(path).parent, base_name, ext, reserved)
+            new_name = name_indexes[str(Path(path).parent)].allocate(base_name, ext)
             target = str(Path(path).with_name(new_name))
             if not dry_run and target != path:
                 try:
@@ -114,7 +114,7 @@ def move_task(
     include_negative: bool,
 ) -> None:
     chunksize = _compute_chunksize(len(image_paths))
-    reserved_map: dict[str, set[str]] = {}
+    name_indexes = FolderNameIndexes()
 
     with multiprocessing.Pool(
         processes=multiprocessing.cpu_count(),
@@ -161,21 +161,9 @@ def move_task(
                 continue
 
             target_folder = str(Path(target_root) / folder_name)
-            if target_folder not in reserved_map:
-                try:
-                    names = {
-                        p.name.lower()
-                        for p in Path(target_folder).glob("*")
-                        if p.is_file()
-                    }
-                except FileNotFoundError:
-                    names = set()
-                reserved_map[target_folder] = names
-
-            reserved = reserved_map[target_folder]
             ext = Path(path).suffix
             base = Path(path).stem
-            new_name = ensure_unique_name(target_folder, base, ext, reserved)
+            new_name = name_indexes[target_folder].allocate(base, ext)
             target = str(Path(target_folder) / new_name)
 
             if not dry_run:
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
+import os
+import sqlite3
 from typing import Any
 
+from ..db.query import get_tags_for_path
 from ..extract.tags import extract_tags_from_image
 
 
+# 청크에 워커 풀로 넘길 이미지가 이만큼 모였을 때만 병렬로 (spawn 비용)
+MIN_PARALLEL = 64
+
 _VARIABLE_SPECS: list[dict[str, Any]] = []
+_MATCHER = None
 _INCLUDE_NEGATIVE = False
+_DB_PATH: str | None = None
+_DB: sqlite3.Connection | None = None
 
 
 def _normalize_tag(tag: str) -> str:
@@ -61,16 +70,60 @@ def match_variable_specs(
     return matches
 
 
-def init_worker(variable_specs: list[dict[str, Any]], include_negative: bool) -> None:
-    global _VARIABLE_SPECS, _INCLUDE_NEGATIVE
+def classify_workers(payload: dict, images: int | None = None) -> int:
+    """plan/rename/move에서 태그를 읽어 분류할 워커 프로세스 수.
+
+    서버 스케줄러도 이 값으로 작업의 자원 분류(cpu/io)를 정한다.
+    지정하지 않거나 0 이하면 스캔과 같이 CPU-1, 다만 이미지가 MIN_PARALLEL개 미만인 작업은 1
+    (images를 모르면 풀을 쓰는 것으로 본다). 1을 주면 항상 작업 스레드에서 분류한다.
+    """
+    try:
+        workers = int(payload.get("classify_workers") or 0)
+    except (TypeError, ValueError):
+        workers = 0
+    if workers <= 0:
+        if images is not None and images < MIN_PARALLEL:
+            return 1
+        workers = (os.cpu_count() or 2) - 1
+    return max(1, workers)
+
+
+def init_worker(
+    variable_specs: list[dict[str, Any]],
+    include_negative: bool,
+    db_path: str | None = None,
+) -> None:
+    """db_path를 주면 process_image가 DB에 저장된 태그를 먼저 쓰고, 없을 때만 파일에서 읽는다."""
+    from .matcher import TagSetCache, compile_variable_specs
+
+    global _VARIABLE_SPECS, _MATCHER, _INCLUDE_NEGATIVE, _DB_PATH, _DB
     _VARIABLE_SPECS = variable_specs
+    # 워커 프로세스마다 한 번만 역색인을 만들고, 같은 태그 집합은 재사용한다.
+    _MATCHER = TagSetCache(compile_variable_specs(variable_specs))
     _INCLUDE_NEGATIVE = include_negative
+    _DB_PATH = db_path or None
+    _DB = None
+
+
+def _load_tags(path: str) -> list[str]:
+    global _DB
+    if _DB_PATH is not None:
+        if _DB is None:
+            # 워커마다 읽기용 연결 하나. 커밋된 태그만 보이므로 작업 스레드의 쓰기와 섞이지 않는다.
+            _DB = sqlite3.connect(_DB_PATH, timeout=30.0)
+        tags = get_tags_for_path(_DB, path, include_negative=_INCLUDE_NEGATIVE)
+        if tags is not None:
+            return tags
+    return extract_tags_from_image(path, _INCLUDE_NEGATIVE)
 
 
 def process_image(path: str) -> dict[str, Any]:
     try:
-        tags = extract_tags_from_image(path, _INCLUDE_NEGATIVE)
-        matches = match_variable_specs(_VARIABLE_SPECS, tags)
+        tags = _load_tags(path)
+        if _MATCHER is not None:
+            matches = _MATCHER.match(tags)
+        else:
+            matches = match_variable_specs(_VARIABLE_SPECS, tags)
         return {"path": path, "matches": matches, "error": None}
     except Exception as exc:
         return {"path": path, "matches": {}, "error": str(exc)}
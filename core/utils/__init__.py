@@ -1,5 +1,12 @@
-from .file_ops import ensure_unique_name, render_template, sanitize_filename
-from .files import iter_image_files
+from .file_executor import DEFAULT_DEVICE_WORKERS, FileOpExecutor, FileOpResult
+from .file_ops import (
+    FolderNameIndex,
+    FolderNameIndexes,
+    ensure_unique_name,
+    render_template,
+    sanitize_filename,
+)
+from .files import iter_image_dirs, iter_image_files
 from .progress import format_eta
 from .tag_sets import (
     compute_common_tags,
@@ -8,9 +15,15 @@ from .tag_sets import (
 )
 
 __all__ = [
+    "DEFAULT_DEVICE_WORKERS",
+    "FileOpExecutor",
+    "FileOpResult",
+    "FolderNameIndex",
+    "FolderNameIndexes",
     "ensure_unique_name",
     "render_template",
     "sanitize_filename",
+    "iter_image_dirs",
     "iter_image_files",
     "format_eta",
     "compute_common_tags",
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+
+# 드라이브 간 복사 버퍼 (기본 shutil은 64KB~1MB)
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+DEFAULT_DEVICE_WORKERS = 4
+
+
+@dataclass
+class FileOpResult:
+    source: str
+    target: str | None
+    context: Any
+    error: Exception | None = None
+
+
+def _copy_then_remove(source: str, target: str, buffer_size: int) -> None:
+    """다른 장치로 이동: 임시 파일(.part)로 복사 → 이름 변경 → 원본 삭제."""
+    part = f"{target}.part"
+    try:
+        with open(source, "rb") as src, open(part, "wb") as dst:
+            shutil.copyfileobj(src, dst, buffer_size)
+        shutil.copystat(source, part)
+        os.replace(part, target)
+    except BaseException:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+        raise
+    os.remove(source)
+
+
+class FileOpExecutor:
+    """move용 파일 작업 실행기. 결과는 항상 submit 순서대로 돌려준다.
+
+    같은 장치 안의 이동은 호출 스레드에서 바로 os.rename 한다.
+    장치가 다르면 (원본 장치, 대상 장치) 쌍마다 스레드 풀을 두고 큰 버퍼로 복사+삭제를 동시에 돌린다.
+    대상이 없는 항목(분류 실패 등)도 submit하면 순서를 지켜 그대로 돌려준다.
+    """
+
+    def __init__(
+        self,
+        *,
+        device_workers: int = DEFAULT_DEVICE_WORKERS,
+        max_pending: int | None = None,
+        buffer_size: int = COPY_BUFFER_SIZE,
+    ) -> None:
+        self.device_workers = max(1, device_workers)
+        self.max_pending = max_pending or self.device_workers * 16
+        self.buffer_size = buffer_size
+        self.renamed = 0
+        self.copied = 0
+        self._pools: dict[tuple[int, int], ThreadPoolExecutor] = {}
+        self._devices: dict[str, int] = {}
+        self._made_folders: set[str] = set()
+        self._pending: deque[tuple[FileOpResult, Future | None]] = deque()
+
+    def _device(self, folder: str) -> int:
+        dev = self._devices.get(folder)
+        if dev is None:
+            dev = os.stat(folder).st_dev
+            self._devices[folder] = dev
+        return dev
+
+    def _pool(self, key: tuple[int, int]) -> ThreadPoolExecutor:
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=self.device_workers, thread_name_prefix="fileop")
+            self._pools[key] = pool
+        return pool
+
+    def make_folder(self, folder: str) -> None:
+        """대상 폴더를 만든다. 같은 폴더는 실행기마다 mkdir 한 번."""
+        if folder not in self._made_folders:
+            Path(folder).mkdir(parents=True, exist_ok=True)
+            self._made_folders.add(folder)
+
+    def submit(self, source: str, target: str | None, context: Any = None) -> None:
+        """대상 폴더는 미리 만들어 두어야 한다. 실패는 예외 대신 결과의 error로 돌려준다."""
+        result = FileOpResult(source, target, context)
+        future: Future | None = None
+        if target is not None and target != source:
+            try:
+                src_dev = self._device(str(Path(source).parent))
+                dst_dev = self._device(str(Path(target).parent))
+                if src_dev == dst_dev:
+                    try:
+                        os.rename(source, target)
+                        self.renamed += 1
+                    except OSError as exc:
+                        if exc.errno != errno.EXDEV:
+                            raise
+                        # 같은 장치 번호인데 이름 변경이 안 되는 경우(바인드 마운트 등) → 복사
+                        future = self._pool((src_dev, dst_dev)).submit(
+                            _copy_then_remove, source, target, self.buffer_size
+                        )
+                else:
+                    future = self._pool((src_dev, dst_dev)).submit(
+                        _copy_then_remove, source, target, self.buffer_size
+                    )
+            except Exception as exc:
+                result.error = exc
+        self._pending.append((result, future))
+
+    def _finish(self, result: FileOpResult, future: Future | None) -> FileOpResult:
+        if future is not None:
+            error = future.exception()
+            if error is None:
+                self.copied += 1
+            else:
+                result.error = error
+        return result
+
+    def completed(self) -> Iterator[FileOpResult]:
+        """앞에서부터 끝난 항목만. 대기 항목이 max_pending을 넘으면 맨 앞 항목을 기다린다."""
+        while self._pending:
+            result, future = self._pending[0]
+            if future is not None and not future.done() and len(self._pending) <= self.max_pending:
+                return
+            self._pending.popleft()
+            yield self._finish(result, future)
+
+    def drain(self) -> Iterator[FileOpResult]:
+        """남은 항목을 모두 기다려 순서대로."""
+        while self._pending:
+            result, future = self._pending.popleft()
+            yield self._finish(result, future)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def shutdown(self) -> None:
+        for pool in self._pools.values():
+            pool.shutdown(wait=True)
+        self._pools.clear()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
 
@@ -22,6 +23,10 @@ def render_template(template: str, mapping: dict[str, str]) -> str:
     return result.strip()
 
 
+def _normalize_extension(extension: str) -> str:
+    return extension if extension.startswith(".") or extension == "" else f".{extension}"
+
+
 def ensure_unique_name(
     folder: str | Path,
     base_name: str,
@@ -29,7 +34,7 @@ def ensure_unique_name(
     reserved: set[str],
 ) -> str:
     base = sanitize_filename(base_name)
-    ext = extension if extension.startswith(".") or extension == "" else f".{extension}"
+    ext = _normalize_extension(extension)
     candidate = f"{base}{ext}"
     candidate_lower = candidate.lower()
     folder_path = Path(folder)
@@ -46,3 +51,64 @@ def ensure_unique_name(
             reserved.add(candidate_lower)
             return candidate
         index += 1
+
+
+class FolderNameIndex:
+    """한 폴더의 파일 이름 색인. ensure_unique_name과 같은 이름을 stat 없이 고른다.
+
+    처음 allocate할 때 os.scandir로 한 번 읽고(소문자), 이후 배정한 이름을 계속 더한다.
+    (기본 이름, 확장자)마다 다음 @@@N 후보를 기억해서 같은 이름이 몰려도 배정이 O(1)이다.
+    폴더를 읽은 뒤 다른 프로그램이 만든 파일은 보지 못한다.
+    """
+
+    def __init__(self, folder: str | Path) -> None:
+        self.folder = Path(folder)
+        self._names: set[str] | None = None
+        self._next_suffix: dict[tuple[str, str], int] = {}
+
+    def _load(self) -> set[str]:
+        if self._names is None:
+            names: set[str] = set()
+            try:
+                with os.scandir(self.folder) as entries:
+                    names.update(entry.name.lower() for entry in entries)
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+            self._names = names
+        return self._names
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._load()
+
+    def add(self, name: str) -> None:
+        self._load().add(name.lower())
+
+    def allocate(self, base_name: str, extension: str) -> str:
+        names = self._load()
+        base = sanitize_filename(base_name)
+        ext = _normalize_extension(extension)
+        candidate = f"{base}{ext}"
+        if candidate.lower() not in names:
+            names.add(candidate.lower())
+            return candidate
+
+        # 이름은 지우지 않으므로 기억한 번호보다 작은 후보는 모두 차 있다.
+        key = (base.lower(), ext.lower())
+        index = self._next_suffix.get(key, 1)
+        while True:
+            candidate = f"{base}@@@{index}{ext}"
+            if candidate.lower() not in names:
+                break
+            index += 1
+        names.add(candidate.lower())
+        self._next_suffix[key] = index + 1
+        return candidate
+
+
+class FolderNameIndexes(dict):
+    """폴더 경로 → FolderNameIndex (처음 쓰는 폴더만 읽는다)."""
+
+    def __missing__(self, folder: str) -> FolderNameIndex:
+        index = FolderNameIndex(folder)
+        self[folder] = index
+        return index
@@ -4,12 +4,24 @@ import os
 from pathlib import Path
 
 
-def iter_image_files(folder: str | Path) -> list[str]:
+_IMAGE_EXTS = (".png", ".webp", ".jpg", ".jpeg")
+
+
+def iter_image_dirs(folder: str | Path) -> list[tuple[str, list[str]]]:
+    """폴더별 (디렉터리 경로, 이미지 파일 목록)을 os.walk 순서대로 반환."""
     folder_path = Path(folder)
-    results: list[str] = []
+    results: list[tuple[str, list[str]]] = []
     for root, _dirs, files in os.walk(folder_path):
-        for name in files:
-            lower = name.lower()
-            if lower.endswith((".png", ".webp", ".jpg", ".jpeg")):
-                results.append(str(Path(root) / name))
+        root_path = Path(root)
+        images = [
+            str(root_path / name) for name in files if name.lower().endswith(_IMAGE_EXTS)
+        ]
+        results.append((str(root_path), images))
+    return results
+
+
+def iter_image_files(folder: str | Path) -> list[str]:
+    results: list[str] = []
+    for _root, images in iter_image_dirs(folder):
+        results.extend(images)
     return results
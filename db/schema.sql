@@ -14,7 +14,9 @@ CREATE TABLE IF NOT EXISTS images (
   tags_json TEXT,
   tags_pos_json TEXT,
   tags_neg_json TEXT,
-  tags_char_json TEXT
+  tags_char_json TEXT,
+  -- 태그가 바뀔 때마다 증가 (저장된 매칭 결과 무효화용)
+  tag_version INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE TABLE IF NOT EXISTS tags (
@@ -50,14 +52,109 @@ CREATE TABLE IF NOT EXISTS presets (
   updated_at TEXT NOT NULL
 );
 
+-- 분류 결과 캐시: (이미지, 변수)마다 한 행. 변수 스펙 해시와 이미지 tag_version이 같을 때만 유효
 CREATE TABLE IF NOT EXISTS matches (
   image_id INTEGER NOT NULL,
   variable TEXT NOT NULL,
   status TEXT NOT NULL,
   values_json TEXT,
+  spec_hash TEXT,
+  tag_version INTEGER,
   FOREIGN KEY(image_id) REFERENCES images(id) ON DELETE CASCADE
 );
 
+-- matches.spec_hash → 정규 스펙 JSON (템플릿 수정 시 값 단위 비교용)
+CREATE TABLE IF NOT EXISTS match_specs (
+  spec_hash TEXT PRIMARY KEY,
+  variable TEXT NOT NULL,
+  spec_json TEXT NOT NULL
+);
+
+-- rename/move 재개: 완료 항목 경로의 64비트 해시만 저장 (경로 문자열 대신)
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  kind TEXT NOT NULL,
+  key TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  UNIQUE(kind, key)
+);
+
+CREATE TABLE IF NOT EXISTS job_checkpoint_items (
+  checkpoint_id INTEGER NOT NULL,
+  path_hash INTEGER NOT NULL,
+  PRIMARY KEY(checkpoint_id, path_hash),
+  FOREIGN KEY(checkpoint_id) REFERENCES job_checkpoints(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- rename/move 2단계 실행: plan 작업이 드라이런 결과를 저장하고 apply 작업이 그대로 실행
+CREATE TABLE IF NOT EXISTS plans (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  kind TEXT NOT NULL,
+  folder TEXT NOT NULL,
+  payload_json TEXT NOT NULL,
+  status TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+);
+
+-- state: pending(적용 대기) / done / failed / skipped(대상 없음: UNKNOWN, CONFLICT, ERROR)
+CREATE TABLE IF NOT EXISTS plan_items (
+  plan_id INTEGER NOT NULL,
+  seq INTEGER NOT NULL,
+  source TEXT NOT NULL,
+  target TEXT,
+  status TEXT NOT NULL,
+  folder TEXT,
+  message TEXT,
+  state TEXT NOT NULL,
+  PRIMARY KEY(plan_id, seq),
+  FOREIGN KEY(plan_id) REFERENCES plans(id) ON DELETE CASCADE
+);
+
+-- 서버 작업 결과: 작업의 모든 result 메시지 (작업 메시지 seq 순). folder는 결과 탐색용 폴더
+CREATE TABLE IF NOT EXISTS job_results (
+  job_id TEXT NOT NULL,
+  seq INTEGER NOT NULL,
+  status TEXT,
+  source TEXT,
+  target TEXT,
+  folder TEXT,
+  message_json TEXT NOT NULL,
+  PRIMARY KEY(job_id, seq)
+) WITHOUT ROWID;
+
+-- 증분 스캔: 디렉터리 mtime/이미지 수가 그대로면 디렉터리 전체를 건너뜀
+CREATE TABLE IF NOT EXISTS scan_dirs (
+  path TEXT PRIMARY KEY,
+  mtime_ns INTEGER NOT NULL,
+  entry_count INTEGER NOT NULL,
+  scanned_at TEXT NOT NULL
+);
+
+-- 스캔 재개: 완료된 디렉터리(프런티어)와 진행 중 디렉터리의 완료 파일
+CREATE TABLE IF NOT EXISTS scan_checkpoints (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  folder TEXT NOT NULL UNIQUE,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS scan_checkpoint_dirs (
+  checkpoint_id INTEGER NOT NULL,
+  path TEXT NOT NULL,
+  PRIMARY KEY(checkpoint_id, path),
+  FOREIGN KEY(checkpoint_id) REFERENCES scan_checkpoints(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS scan_checkpoint_files (
+  checkpoint_id INTEGER NOT NULL,
+  dir TEXT NOT NULL,
+  path TEXT NOT NULL,
+  PRIMARY KEY(checkpoint_id, path),
+  FOREIGN KEY(checkpoint_id) REFERENCES scan_checkpoints(id) ON DELETE CASCADE
+);
+
 CREATE INDEX IF NOT EXISTS idx_images_path ON images(path);
 CREATE INDEX IF NOT EXISTS idx_images_mtime ON images(mtime);
 CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag);
@@ -68,5 +165,12 @@ CREATE INDEX IF NOT EXISTS idx_templates_name ON templates(name);
 CREATE INDEX IF NOT EXISTS idx_presets_name ON presets(name);
 CREATE INDEX IF NOT EXISTS idx_matches_variable ON matches(variable);
 CREATE INDEX IF NOT EXISTS idx_matches_status ON matches(status);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_matches_image_variable ON matches(image_id, variable);
+CREATE INDEX IF NOT EXISTS idx_matches_variable_spec ON matches(variable, spec_hash);
+CREATE INDEX IF NOT EXISTS idx_plan_items_state ON plan_items(plan_id, state, seq);
+CREATE INDEX IF NOT EXISTS idx_scan_checkpoint_files_dir ON scan_checkpoint_files(checkpoint_id, dir);
+CREATE INDEX IF NOT EXISTS idx_job_results_status ON job_results(job_id, status, seq);
+CREATE INDEX IF NOT EXISTS idx_job_results_folder ON job_results(job_id, folder, status);
+CREATE INDEX IF NOT EXISTS idx_job_results_target ON job_results(job_id, target);
 
 INSERT OR IGNORE INTO meta(schema_version) VALUES (2);
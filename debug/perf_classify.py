@@ -0,0 +1,108 @@
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from PIL import Image, PngImagePlugin
+
+from core.db.schema import ensure_schema
+from core.db.storage import connect, replace_tags, upsert_image
+from core.runner import build_variable_specs, classify_workers
+from sidecar.handlers.classify import ImageClassifier
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Perf: rename/move classification, serial vs worker pool")
+    parser.add_argument("--images", type=int, default=4000, help="Synthetic image count")
+    parser.add_argument("--db-ratio", type=float, default=0.5, help="Share of images with tags in the DB")
+    parser.add_argument("--values", type=int, default=500, help="Values per variable")
+    parser.add_argument("--vocab", type=int, default=5000, help="Tag vocabulary size")
+    parser.add_argument("--tags", type=int, default=40, help="Tags per image")
+    parser.add_argument("--workers", type=int, default=0, help="Pool size (0 = CPU-1)")
+    parser.add_argument("--chunk", type=int, default=1024, help="Classifier chunk size")
+    parser.add_argument("--store", action="store_true", help="Also store results in the matches table")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    return parser.parse_args(argv)
+
+
+def build_inputs(args: argparse.Namespace, folder: Path, db_path: Path) -> tuple[list[dict], list[str]]:
+    rng = random.Random(args.seed)
+    vocab = [f"tag_{idx}" for idx in range(args.vocab)]
+    variables = [
+        {
+            "name": "char",
+            "values": [
+                {"name": f"value_{idx}", "tags": rng.sample(vocab, rng.randint(1, 2))}
+                for idx in range(args.values)
+            ],
+        }
+    ]
+    conn = connect(str(db_path))
+    ensure_schema(conn)
+    paths: list[str] = []
+    for idx in range(args.images):
+        tags = rng.sample(vocab, args.tags)
+        info = PngImagePlugin.PngInfo()
+        info.add_text("Comment", json.dumps({"prompt": ", ".join(tags)}))
+        path = folder / f"{idx:06d}.png"
+        Image.new("RGB", (8, 8)).save(path, pnginfo=info)
+        if rng.random() < args.db_ratio:
+            image_id = upsert_image(conn, str(path), 1, 1, None, tags_pos=tags, tags_neg=[], tags_char=[])
+            replace_tags(conn, image_id, [(tag, "pos", None) for tag in tags])
+        paths.append(str(path))
+    conn.commit()
+    conn.close()
+    return build_variable_specs(variables), paths
+
+
+def run(db_path: Path, specs: list[dict], paths: list[str], args: argparse.Namespace, workers: int):
+    conn = connect(str(db_path))
+    if args.store:
+        # 저장 결과를 재사용하지 않도록 매번 비운다.
+        conn.execute("DELETE FROM matches")
+        conn.commit()
+    start = time.perf_counter()
+    classifier = ImageClassifier(
+        conn,
+        paths,
+        specs,
+        include_negative=False,
+        chunk=args.chunk,
+        store=args.store,
+        workers=workers,
+    )
+    try:
+        results = [classifier.match(path) for path in paths]
+    finally:
+        classifier.close()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, results, classifier.summary()
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    workers = classify_workers({"classify_workers": args.workers}, args.images)
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        db_path = folder / "perf.sqlite"
+        start = time.perf_counter()
+        specs, paths = build_inputs(args, folder, db_path)
+        print(f"images={len(paths)} db_ratio={args.db_ratio} setup {time.perf_counter() - start:.1f}s")
+
+        serial, expected, summary = run(db_path, specs, paths, args, 1)
+        print(f"serial:   {serial:.3f}s ({len(paths) / serial:.0f} img/s) {summary}")
+        pooled, actual, summary = run(db_path, specs, paths, args, workers)
+        print(f"workers={workers}: {pooled:.3f}s ({len(paths) / pooled:.0f} img/s) {summary}")
+        print(f"speedup:  {serial / pooled:.1f}x, identical={expected == actual}")
+
+
+if __name__ == "__main__":
+    main()
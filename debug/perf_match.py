@@ -0,0 +1,75 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.runner import (
+    BatchClassifier,
+    build_variable_specs,
+    compile_variable_specs,
+    match_variable_specs,
+)
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Perf: variable spec matching")
+    parser.add_argument("--values", type=int, default=3000, help="Values per variable")
+    parser.add_argument("--variables", type=int, default=2, help="Variable count")
+    parser.add_argument("--images", type=int, default=20000, help="Synthetic image count")
+    parser.add_argument("--vocab", type=int, default=20000, help="Tag vocabulary size")
+    parser.add_argument("--tags", type=int, default=40, help="Tags per image")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--chunk", type=int, default=1024, help="Batch size for the numpy engine")
+    return parser.parse_args(argv)
+
+
+def build_inputs(args: argparse.Namespace) -> tuple[list[dict], list[list[str]]]:
+    rng = random.Random(args.seed)
+    vocab = [f"tag_{idx}" for idx in range(args.vocab)]
+    variables = []
+    for var_idx in range(args.variables):
+        values = [
+            {"name": f"value_{var_idx}_{idx}", "tags": rng.sample(vocab, rng.randint(1, 3))}
+            for idx in range(args.values)
+        ]
+        variables.append({"name": f"var_{var_idx}", "values": values})
+    images = [rng.sample(vocab, args.tags) for _ in range(args.images)]
+    return build_variable_specs(variables), images
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    specs, images = build_inputs(args)
+
+    start = time.perf_counter()
+    expected = [match_variable_specs(specs, tags) for tags in images]
+    linear = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = compile_variable_specs(specs)
+    compile_time = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = [matcher.match(tags) for tags in images]
+    indexed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = BatchClassifier(specs)
+    vectorized: list[dict] = []
+    for offset in range(0, len(images), args.chunk):
+        vectorized.extend(batch.match_tag_sets([set(tags) for tags in images[offset : offset + args.chunk]]))
+    numpy_time = time.perf_counter() - start
+
+    print(f"images={len(images)} variables={args.variables} values={args.values}")
+    print(f"linear:   {linear:.3f}s ({len(images) / linear:.0f} img/s)")
+    print(f"compiled: {indexed:.3f}s ({len(images) / indexed:.0f} img/s), compile {compile_time * 1000:.1f}ms")
+    print(f"numpy:    {numpy_time:.3f}s ({len(images) / numpy_time:.0f} img/s), vocab {len(batch.vocab)}")
+    print(f"speedup:  {linear / indexed:.1f}x / {linear / numpy_time:.1f}x, identical={expected == actual == vectorized}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from PIL import Image
+
+from core.cache import render_thumbnail
+from core.utils import iter_image_files
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Perf: thumbnail timings per format")
+    parser.add_argument("input", help="Image file or folder")
+    parser.add_argument("--limit", type=int, default=None, help="Limit image count")
+    parser.add_argument("--size", type=int, default=256, help="Thumbnail size")
+    parser.add_argument("--quality", type=int, default=85, help="JPEG quality")
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Also time plain decode+resize (no draft/reduce)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Print per-image stats")
+    return parser.parse_args(argv)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    if pct <= 0:
+        return min(values)
+    if pct >= 100:
+        return max(values)
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * (pct / 100.0)
+    f = int(k)
+    c = min(f + 1, len(ordered) - 1)
+    if f == c:
+        return ordered[f]
+    return ordered[f] + (ordered[c] - ordered[f]) * (k - f)
+
+
+def resolve_images(input_path: Path) -> list[Path]:
+    if input_path.is_file():
+        return [input_path]
+    if input_path.is_dir():
+        return [Path(p) for p in iter_image_files(str(input_path))]
+    return []
+
+
+def time_thumbnail(path: Path, size: int, quality: int, fast: bool) -> float:
+    t0 = time.perf_counter()
+    with Image.open(path) as img:
+        thumb = render_thumbnail(img, size, fast=fast)
+    buf = io.BytesIO()
+    thumb.save(buf, "JPEG", quality=quality)
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def print_report(label: str, timings: dict[str, list[float]]) -> None:
+    print(f"[{label}]")
+    for ext in sorted(timings):
+        values = timings[ext]
+        total = sum(values)
+        per_sec = len(values) / (total / 1000.0) if total > 0 else 0.0
+        print(
+            f"  {ext}: images={len(values)} "
+            f"avg={total / len(values):.2f} ms "
+            f"p50={percentile(values, 50):.2f} ms "
+            f"p95={percentile(values, 95):.2f} ms "
+            f"throughput={per_sec:.2f} images/sec"
+        )
+
+
+def main() -> None:
+    args = parse_args(sys.argv[1:])
+    input_path = Path(args.input).expanduser().resolve()
+    images = resolve_images(input_path)
+    if args.limit is not None:
+        images = images[: args.limit]
+    if not images:
+        print(f"no images: {input_path}")
+        return
+
+    modes = [("fast", True)]
+    if args.compare:
+        modes.append(("plain", False))
+
+    errors = 0
+    for label, fast in modes:
+        timings: dict[str, list[float]] = {}
+        for idx, path in enumerate(images):
+            ext = path.suffix.lower().lstrip(".") or "?"
+            try:
+                elapsed = time_thumbnail(path, args.size, args.quality, fast)
+            except Exception as exc:
+                errors += 1
+                if args.verbose:
+                    print(f"error: {path} ({exc})")
+                continue
+            timings.setdefault(ext, []).append(elapsed)
+            if args.verbose:
+                print(f"[{label} {idx+1}/{len(images)}] {path} {elapsed:.2f}ms")
+        if timings:
+            print_report(label, timings)
+
+    print(f"size: {args.size}, quality: {args.quality}, errors: {errors}")
+
+
+if __name__ == "__main__":
+    main()
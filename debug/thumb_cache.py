@@ -6,7 +6,14 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from core.cache import cache_stats, ensure_thumbnail, prune_cache, resolve_cache_dir, thumbnail_path
+from core.cache import (
+    cache_stats,
+    compact_cache,
+    ensure_thumbnail,
+    has_thumbnail,
+    prune_cache,
+    resolve_cache_dir,
+)
 from core.utils import iter_image_files
 
 
@@ -39,8 +46,7 @@ def build_thumbs(
     for idx, path in enumerate(images):
         if limit is not None and idx >= limit:
             break
-        thumb_path = thumbnail_path(path, cache_dir)
-        if thumb_path.exists() and not force:
+        if has_thumbnail(path, cache_dir, size) and not force:
             skipped += 1
             continue
         result = ensure_thumbnail(path, cache_dir, size=size, quality=quality, force=force)
@@ -55,7 +61,8 @@ def build_thumbs(
 
 def clear_cache(cache_dir: Path) -> None:
     removed = prune_cache(cache_dir, max_files=0)
-    print(f"removed: {removed}")
+    reclaimed = compact_cache(cache_dir)
+    print(f"removed: {removed}, reclaimed bytes: {reclaimed}")
 
 
 def show_stats(cache_dir: Path) -> None:
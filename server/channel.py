@@ -0,0 +1,179 @@
+"""Job message channel between handler threads and WebSocket clients.
+
+Handlers emit from worker threads. Each message gets a sequence number and goes
+into a bounded replay buffer, so a client that connects late or reconnects
+with ?since=N receives everything after N. The loop is woken at most once per
+batch of messages instead of once per message. Only the latest progress message
+is kept. Every result message is also written to the job results store, which
+serves result pages and replays results pushed out of the buffer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from collections import deque
+from typing import Protocol
+
+
+# WebSocket 결과 묶음 기본값 (클라이언트가 ?batch=로 켠 경우)
+RESULT_BATCH_SIZE = 200
+RESULT_FLUSH_INTERVAL = 0.05
+# 작업마다 메모리에 남겨 둘 메시지 수. result는 모두 저장소에도 쓴다.
+DEFAULT_REPLAY_LIMIT = 5000
+STORE_BATCH = 500
+
+
+def _replay_limit() -> int:
+    value = os.environ.get("NAI_JOB_REPLAY")
+    try:
+        if value:
+            return max(100, int(value))
+    except ValueError:
+        pass
+    return DEFAULT_REPLAY_LIMIT
+
+
+class ResultStore(Protocol):
+    def add(self, job_id: str, items: list[tuple[int, dict]], *, wait: bool = True) -> object: ...
+
+    def wait_writable(self) -> None: ...
+
+    def list(self, job_id: str, after_seq: int, before_seq: int | None, limit: int) -> list[dict]: ...
+
+
+class JobChannel:
+    """작업 하나의 메시지 버퍼. put은 아무 스레드에서, wait/read는 이벤트 루프에서.
+
+    읽는 쪽은 마지막으로 받은 seq(cursor)만 들고 있으면 되고, 여러 WebSocket이 동시에 읽어도 된다.
+    store.add는 잠금 안에서 부르므로 wait=False로 넘기기만 하고, 저장소에 쓰기가 밀려 있으면
+    작업 스레드가 put에 들어오기 전에(잠금 밖에서) wait_writable()로 기다린다.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        job_id: str = "",
+        *,
+        store: ResultStore | None = None,
+        limit: int | None = None,
+    ) -> None:
+        self._loop = loop
+        self.job_id = job_id
+        self.store = store
+        self.limit = limit or _replay_limit()
+        self._lock = threading.Lock()
+        self._ring: deque[tuple[int, dict]] = deque()
+        self._progress: tuple[int, dict] | None = None
+        self._unsaved: list[tuple[int, dict]] = []
+        self._seq = 0
+        # 이 seq 이하는 버퍼에서 밀려났다 (result는 저장소에 있고, 나머지는 버림).
+        self._evicted_seq = 0
+        self._waiter: asyncio.Future | None = None
+        self._scheduled = False
+        self.closed = False
+        self.coalesced = 0
+        self.stored = 0
+        self.dropped = 0
+        # 상태별 result 개수 (OK/UNKNOWN/...)
+        self.counts: dict[str, int] = {}
+
+    # ---- 작업 스레드 ----
+
+    def put(self, message: dict) -> int:
+        """메시지에 seq를 붙여 버퍼에 넣는다. progress는 최신 것 하나만 남긴다."""
+        if self.store is not None and message.get("type") == "result":
+            self.store.wait_writable()
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            message["seq"] = seq
+            if message.get("type") == "progress":
+                if self._progress is not None:
+                    self.coalesced += 1
+                self._progress = (seq, message)
+            else:
+                self._ring.append((seq, message))
+                while len(self._ring) > self.limit:
+                    self._evict()
+                if message.get("type") == "result":
+                    status = str(message.get("status"))
+                    self.counts[status] = self.counts.get(status, 0) + 1
+                    if self.store is not None:
+                        self._unsaved.append((seq, message))
+            if message.get("type") == "done":
+                self.closed = True
+            if len(self._unsaved) >= STORE_BATCH or self.closed:
+                self._flush_unsaved()
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            self._loop.call_soon_threadsafe(self._wake)
+        return seq
+
+    def _evict(self) -> None:
+        seq, message = self._ring.popleft()
+        self._evicted_seq = seq
+        if message.get("type") != "result" or self.store is None:
+            self.dropped += 1
+
+    def _flush_unsaved(self) -> None:
+        if self._unsaved and self.store is not None:
+            self.store.add(self.job_id, self._unsaved, wait=False)
+            self.stored += len(self._unsaved)
+            self._unsaved = []
+
+    def flush(self) -> None:
+        """아직 저장소에 넘기지 않은 result를 넘긴다 (이후 저장소 읽기에 보이도록)."""
+        with self._lock:
+            self._flush_unsaved()
+
+    # ---- 이벤트 루프 ----
+
+    def _wake(self) -> None:
+        with self._lock:
+            self._scheduled = False
+            waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def wait(self, since: int, timeout: float) -> None:
+        """since 이후 메시지가 생길 때까지 (timeout이면 asyncio.TimeoutError)."""
+        with self._lock:
+            if self._seq > since:
+                return
+            if self._waiter is None:
+                self._waiter = self._loop.create_future()
+            waiter = self._waiter
+        await asyncio.wait_for(asyncio.shield(waiter), timeout=timeout)
+
+    def read(self, since: int) -> tuple[list[dict], int | None, int]:
+        """(버퍼에 남은 since 이후 메시지, 저장소에서 읽을 구간의 끝 seq 또는 None, 새 cursor)."""
+        with self._lock:
+            messages: list[tuple[int, dict]] = []
+            for seq, message in reversed(self._ring):
+                if seq <= since:
+                    break
+                messages.append((seq, message))
+            messages.reverse()
+            if self._progress is not None and self._progress[0] > since:
+                messages.append(self._progress)
+                messages.sort(key=lambda item: item[0])
+            gap_end = self._evicted_seq if self._evicted_seq > since else None
+            return [message for _seq, message in messages], gap_end, self._seq
+
+    def replay(self, after_seq: int, until_seq: int, limit: int) -> list[dict]:
+        """버퍼에서 밀려난 result를 저장소에서 (블로킹, 루프 밖 스레드에서 호출)."""
+        if self.store is None:
+            return []
+        self.flush()
+        return self.store.list(self.job_id, after_seq, until_seq + 1, limit)
+
+    def status_counts(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._ring) + (1 if self._progress is not None else 0)
@@ -10,12 +10,13 @@ import sys
 import threading
 import time
 import uuid
+from collections import deque
 from pathlib import Path
 from typing import Any
 
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -30,13 +31,28 @@ ROOT_DIR = Path(__file__).resolve().parents[1]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
+from core.cache import close_packs
 from core.db.schema import ensure_schema
 from core.db.storage import connect
+from server.channel import RESULT_BATCH_SIZE, RESULT_FLUSH_INTERVAL, JobChannel
 from server.context import WebJobContext
+from server.results import JobResultStore
+from server.scheduler import get_job_scheduler
+from server.thumbs import (
+    BATCH_MAX_PATHS,
+    PREFETCH_LOOKAHEAD,
+    build_sprite,
+    encode_bundle,
+    get_thumb_prefetcher,
+    get_thumb_service,
+    shutdown_thumb_service,
+)
 from sidecar.jobs import (
     handle_build_nais,
     handle_db_stats,
     handle_move,
+    handle_plan,
+    handle_apply,
     handle_preset_import,
     handle_preset_load,
     handle_preset_save,
@@ -64,6 +80,8 @@ HANDLERS = {
     "rename": handle_rename,
     "resume_clear": handle_resume_clear,
     "move": handle_move,
+    "plan": handle_plan,
+    "apply": handle_apply,
     "strip_suffix": handle_strip_suffix,
     "build_nais": handle_build_nais,
     "preset_load": handle_preset_load,
@@ -80,9 +98,12 @@ HANDLERS = {
 }
 
 
-# Active jobs and their message queues
-active_jobs: dict[str, asyncio.Queue] = {}
+# Active jobs and their message channels (끝난 작업도 재접속용으로 최근 몇 개는 남긴다)
+active_jobs: dict[str, JobChannel] = {}
 cancel_flags: set[str] = set()
+FINISHED_JOBS_KEPT = 16
+_finished_jobs: deque[str] = deque()
+_jobs_lock = threading.Lock()
 
 
 # Database connection (thread-local)
@@ -99,6 +120,30 @@ def get_db():
     return _thread_local.conn
 
 
+_result_store: JobResultStore | None = None
+
+
+def get_result_store() -> JobResultStore:
+    """Store for every job's result messages (result pages and WebSocket replay)."""
+    global _result_store
+    if _result_store is None:
+        _result_store = JobResultStore(_db_path)
+    return _result_store
+
+
+def _finish_job(job_id: str) -> None:
+    """Keep the finished job for reconnects; drop the oldest beyond FINISHED_JOBS_KEPT."""
+    with _jobs_lock:
+        _finished_jobs.append(job_id)
+        expired = []
+        while len(_finished_jobs) > FINISHED_JOBS_KEPT:
+            expired.append(_finished_jobs.popleft())
+        for old_id in expired:
+            active_jobs.pop(old_id, None)
+    for old_id in expired:
+        get_result_store().delete(old_id)
+
+
 def create_new_db_connection():
     """Create a new database connection for worker threads."""
     Path(_db_path).parent.mkdir(parents=True, exist_ok=True)
@@ -126,8 +171,13 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown events."""
     global _main_loop
     _main_loop = asyncio.get_event_loop()
+    # 이전 실행의 작업 결과는 이어받을 작업이 없으니 비운다.
+    get_result_store().delete()
     yield
-    # Cleanup on shutdown (if needed)
+    shutdown_thumb_service()
+    close_packs()
+    if _result_store is not None:
+        _result_store.close()
 
 
 app = FastAPI(title="NAI Tag Classifier", lifespan=lifespan)
@@ -150,20 +200,24 @@ async def create_job(request: JobRequest) -> JobResponse:
         return JobResponse(job_id="", status=f"unknown op: {request.op}")
     
     job_id = f"{request.op}-{uuid.uuid4().hex[:8]}"
-    message_queue: asyncio.Queue = asyncio.Queue()
-    active_jobs[job_id] = message_queue
+    channel = JobChannel(asyncio.get_running_loop(), job_id, store=get_result_store())
+    with _jobs_lock:
+        active_jobs[job_id] = channel
     logger.info(f"[job] Job created: {job_id}")
     
-    # Run handler in background thread
+    def notify_queue(position: int):
+        # 대기 순번 (0이면 대기열에서 나와 시작)
+        channel.put({"id": job_id, "type": "queue", "position": position})
+    
+    # Run handler in a scheduler thread (자원 분류별 동시 실행 수 제한)
     def run_job():
         logger.info(f"[job] Starting job thread: {job_id}")
         # Create new connection for this thread
         conn = create_new_db_connection()
         
         def emit(msg: dict):
-            # Thread-safe emit to async queue
-            if _main_loop is not None:
-                asyncio.run_coroutine_threadsafe(message_queue.put(msg), _main_loop)
+            # Thread-safe emit (루프는 쌓인 묶음마다 한 번만 깨운다)
+            channel.put(msg)
         
         ctx = WebJobContext(
             job_id=job_id,
@@ -191,56 +245,237 @@ async def create_job(request: JobRequest) -> JobResponse:
                 "message": f"elapsed={time.time()-start:.2f}s",
             })
             emit({"id": job_id, "type": "done", "completed": True})
+            _finish_job(job_id)
             # Close the thread-local connection
             try:
                 conn.close()
             except Exception:
                 pass
     
-    # Start in thread
-    thread = threading.Thread(target=run_job, daemon=True)
-    thread.start()
+    try:
+        priority = int(request.payload.get("priority") or 0)
+    except (TypeError, ValueError):
+        priority = 0
+    position = get_job_scheduler().submit(
+        job_id,
+        request.op,
+        run_job,
+        priority=priority,
+        notify=notify_queue,
+        payload=request.payload,
+    )
     
-    return JobResponse(job_id=job_id, status="started")
+    return JobResponse(job_id=job_id, status="queued" if position else "started")
 
 
 @app.post("/api/job/{job_id}/cancel")
 async def cancel_job(job_id: str):
     """Cancel a running job."""
-    if job_id in active_jobs:
+    channel = active_jobs.get(job_id)
+    if channel is not None and not channel.closed:
+        if get_job_scheduler().cancel(job_id):
+            # 아직 대기 중이던 작업은 실행하지 않고 바로 끝낸다.
+            channel.put({"id": job_id, "type": "done", "cancelled": True})
+            _finish_job(job_id)
+            return {"status": "cancelled"}
         cancel_flags.add(job_id)
         return {"status": "cancel requested"}
+    if channel is not None:
+        return {"status": "job finished"}
     return {"status": "job not found"}
 
 
+# 결과 목록 페이지 크기
+RESULT_PAGE_SIZE = 200
+RESULT_PAGE_MAX = 1000
+
+
+def _parse_statuses(value: str | None) -> list[str] | None:
+    """?status=OK,CONFLICT → ["OK", "CONFLICT"] (없으면 전체)."""
+    if value is None:
+        return None
+    return [item for item in value.split(",") if item]
+
+
+@app.get("/api/job/{job_id}/results")
+async def job_results(
+    job_id: str,
+    status: str | None = None,
+    folder: str | None = None,
+    target: str | None = None,
+    q: str | None = None,
+    after: int = 0,
+    offset: int = 0,
+    limit: int = RESULT_PAGE_SIZE,
+):
+    """One page of a job's results in seq order, with per-status counts.
+
+    status is a comma-separated list (e.g. OK,CONFLICT). folder matches exactly,
+    target is a path prefix and q a substring of source or target. Page with
+    after=<next> (or offset). counts ignore the status filter so the UI can show
+    every status button; total is the number of results matching all filters.
+    """
+    channel = active_jobs.get(job_id)
+    if channel is None:
+        return {"error": "job not found"}
+    statuses = _parse_statuses(status)
+    limit = max(1, min(limit, RESULT_PAGE_MAX))
+    # 아직 넘기지 않은 결과까지 보이도록 (저장소 스레드는 순서대로 처리)
+    channel.flush()
+    items, counts = await asyncio.get_running_loop().run_in_executor(
+        None,
+        lambda: get_result_store().page(
+            job_id,
+            statuses=statuses,
+            folder=folder,
+            target=target,
+            search=q,
+            after_seq=max(0, after),
+            offset=max(0, offset),
+            limit=limit,
+        ),
+    )
+    if statuses is None:
+        total = sum(counts.values())
+    else:
+        total = sum(counts.get(item, 0) for item in statuses)
+    return {
+        "job_id": job_id,
+        "done": channel.closed,
+        "total": total,
+        "counts": counts,
+        "items": items,
+        "next": items[-1]["seq"] if len(items) == limit else None,
+    }
+
+
+@app.get("/api/job/{job_id}/results/folders")
+async def job_result_folders(job_id: str, status: str | None = None, q: str | None = None):
+    """Result counts per classified folder (move jobs), with the same status/q filters."""
+    channel = active_jobs.get(job_id)
+    if channel is None:
+        return {"error": "job not found"}
+    statuses = _parse_statuses(status)
+    channel.flush()
+    folders = await asyncio.get_running_loop().run_in_executor(
+        None, lambda: get_result_store().folders(job_id, statuses=statuses, search=q)
+    )
+    return {"job_id": job_id, "done": channel.closed, "folders": folders}
+
+
+def _batch_size(value: str | None, default: int = RESULT_BATCH_SIZE) -> int:
+    """?batch=/?page= 값 → 개수 (0이면 끔, 1이나 숫자가 아니면 default)."""
+    if not value or value.lower() in ("0", "false", "no"):
+        return 0
+    try:
+        size = int(value)
+    except ValueError:
+        return default
+    return size if size > 1 else default
+
+
 @app.websocket("/ws/job/{job_id}")
 async def job_websocket(websocket: WebSocket, job_id: str):
-    """WebSocket endpoint to receive job updates."""
+    """WebSocket endpoint to receive job updates.
+
+    Every message carries a sequence number (seq). A client that reconnects with
+    ?since=N gets the messages after N again: recent ones from the job's replay
+    buffer, older results from the result store. Only the latest progress is
+    replayed. The job stays available after the socket closes.
+
+    With ?batch=N (or ?batch=1 for the default size) consecutive result messages
+    are sent as {"type": "results", "items": [...]}, flushed every N results or
+    RESULT_FLUSH_INTERVAL seconds, and before any other message type.
+
+    With ?page=N (or ?page=1 for RESULT_PAGE_SIZE) only the first N results are
+    sent; progress and done carry per-status counts and the rest is read from
+    GET /api/job/{job_id}/results.
+    """
     await websocket.accept()
     
-    if job_id not in active_jobs:
+    channel = active_jobs.get(job_id)
+    if channel is None:
         await websocket.send_json({"error": "job not found"})
         await websocket.close()
         return
     
-    queue = active_jobs[job_id]
+    try:
+        cursor = max(0, int(websocket.query_params.get("since") or 0))
+    except ValueError:
+        cursor = 0
+    batch_size = _batch_size(websocket.query_params.get("batch"))
+    page_size = _batch_size(websocket.query_params.get("page"), RESULT_PAGE_SIZE)
+    page_sent = 0
+    buffer: list[dict] = []
+    flush_at = 0.0
+    loop = asyncio.get_running_loop()
+    
+    async def flush():
+        if buffer:
+            await websocket.send_json({"id": job_id, "type": "results", "items": list(buffer)})
+            buffer.clear()
+    
+    async def send(message: dict) -> bool:
+        """Send (or buffer) one message. Returns True once the job is done."""
+        nonlocal flush_at, page_sent
+        if page_size:
+            if message.get("type") == "result":
+                # 첫 페이지만 보내고 나머지는 결과 API로
+                if page_sent >= page_size:
+                    return False
+                page_sent += 1
+            elif message.get("type") in ("progress", "done"):
+                message = {**message, "counts": channel.status_counts()}
+        if batch_size and message.get("type") == "result":
+            if not buffer:
+                flush_at = time.monotonic() + RESULT_FLUSH_INTERVAL
+            buffer.append(message)
+            if len(buffer) >= batch_size:
+                await flush()
+            return False
+        await flush()
+        await websocket.send_json(message)
+        return message.get("type") == "done"
     
     try:
         while True:
+            timeout = max(0.0, flush_at - time.monotonic()) if buffer else 30.0
             try:
-                message = await asyncio.wait_for(queue.get(), timeout=30.0)
-                await websocket.send_json(message)
-                
-                # Clean up on done
-                if message.get("type") == "done":
-                    break
+                await channel.wait(cursor, timeout=timeout)
             except asyncio.TimeoutError:
-                # Send heartbeat
-                await websocket.send_json({"type": "ping"})
+                if buffer:
+                    await flush()
+                else:
+                    # Send heartbeat
+                    await websocket.send_json({"type": "ping"})
+                continue
+            
+            messages, gap_end, next_cursor = channel.read(cursor)
+            done = False
+            # 버퍼에서 밀려난 구간은 결과 저장소에서 페이지 단위로
+            after = cursor
+            while gap_end is not None and not done and not (page_size and page_sent >= page_size):
+                page = await loop.run_in_executor(None, channel.replay, after, gap_end, 1000)
+                for message in page:
+                    done = await send(message)
+                if len(page) < 1000:
+                    break
+                after = page[-1]["seq"]
+            for message in messages:
+                if done:
+                    break
+                done = await send(message)
+            cursor = next_cursor
+            if done:
+                break
     except WebSocketDisconnect:
         pass
-    finally:
-        active_jobs.pop(job_id, None)
+
+
+@app.get("/api/jobs")
+async def list_jobs():
+    """Running and queued jobs with their resource classes."""
+    return get_job_scheduler().snapshot()
 
 
 # Simple API endpoints (non-streaming)
@@ -359,26 +594,116 @@ async def select_folder():
     return {"path": result["path"]}
 
 
+class ThumbBatchRequest(BaseModel):
+    paths: list[str]
+    format: str = "bundle"  # bundle | sprite
+    columns: int | None = None
+
+
+@app.post("/api/thumbs/batch")
+async def get_thumbnail_batch(request: ThumbBatchRequest):
+    """Get thumbnails for a grid page in one response.
+
+    bundle: application/octet-stream, per path a 4-byte big-endian length + JPEG bytes
+    (length 0 when missing), in request order.
+    sprite: JSON with a JPEG sprite (data URL) and per-path tile coordinates.
+    """
+    import base64
+    from fastapi.responses import Response
+    
+    paths = request.paths[:BATCH_MAX_PATHS]
+    service = get_thumb_service()
+    items = await service.load_many(paths)
+    
+    if request.format == "sprite":
+        columns = request.columns or max(1, min(len(paths), 20))
+        image, tiles = await service.run(
+            build_sprite, items, service.size, columns, service.quality
+        )
+        return {
+            "image": "data:image/jpeg;base64," + base64.b64encode(image).decode("ascii"),
+            "cell": service.size,
+            "columns": columns,
+            "tiles": [
+                {"path": path, **tile} if tile else None
+                for path, tile in zip(paths, tiles)
+            ],
+        }
+    
+    return Response(
+        content=encode_bundle(items),
+        media_type="application/octet-stream",
+        headers={"X-Thumb-Count": str(len(paths)), "Cache-Control": "no-store"},
+    )
+
+
+class ThumbPrefetchRequest(BaseModel):
+    job_id: str | None = None
+    paths: list[str] | None = None
+    start: int = 0
+    end: int = 0
+    lookahead: int = PREFETCH_LOOKAHEAD
+
+
+@app.post("/api/thumbs/prefetch")
+async def prefetch_thumbnails(request: ThumbPrefetchRequest):
+    """Queue thumbnails around the viewport, replacing the previous viewport's work.
+
+    The list is either the stored results of a job (job_id) or an explicit
+    paths list (e.g. the UI's filtered grid). start/end are the visible indices
+    into that list; for a job only the window around them is read from the store.
+    """
+    prefetcher = get_thumb_prefetcher()
+    lookahead = max(0, request.lookahead)
+    start, end = request.start, request.end
+    if request.paths is not None:
+        paths = request.paths
+    elif request.job_id and request.job_id in active_jobs:
+        # 보이는 범위 ± lookahead만 저장소에서 읽는다
+        first = max(0, start - lookahead)
+        active_jobs[request.job_id].flush()
+        paths = await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: get_result_store().sources(
+                request.job_id, offset=first, limit=max(0, end + lookahead - first)
+            ),
+        )
+        start, end = start - first, end - first
+    else:
+        paths = []
+    ordered = prefetcher.order(paths, start, end, lookahead)
+    return {"queued": prefetcher.update(ordered)}
+
+
 @app.get("/api/thumbs/{path:path}")
-async def get_thumbnail(path: str):
+async def get_thumbnail(
+    path: str,
+    if_none_match: str | None = Header(default=None),
+    if_modified_since: str | None = Header(default=None),
+):
     """Get thumbnail for an image file."""
-    from fastapi.responses import FileResponse
-    from core.cache.thumbs import ensure_thumbnail
+    from fastapi.responses import Response
     
     # Decode path
     import urllib.parse
     decoded_path = urllib.parse.unquote(path)
     
-    try:
-        thumb_path = ensure_thumbnail(decoded_path)
-        if thumb_path and os.path.exists(thumb_path):
-            return FileResponse(thumb_path, media_type="image/jpeg")
-    except Exception:
-        pass
-    
-    # Return 404 or placeholder
-    from fastapi.responses import Response
-    return Response(status_code=404)
+    service = get_thumb_service()
+    source = await service.resolve(decoded_path)
+    if source is None:
+        return Response(status_code=404)
+    
+    # 재요청은 원본 디코딩/팩 읽기 없이 304로 응답
+    headers = source.headers()
+    if source.not_modified(if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+    
+    # 생성은 썸네일 전용 스레드 풀에서 (이벤트 루프/WebSocket을 막지 않음)
+    data = await service.load(source)
+    if data is None:
+        return Response(status_code=404)
+    # 팩 파일 mmap 조각을 복사 없이 그대로 응답 본문으로 사용
+    return Response(content=data, media_type="image/jpeg", headers=headers)
 
 
 @app.post("/api/preset/parse-file")
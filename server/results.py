@@ -0,0 +1,156 @@
+"""Job result store for the FastAPI server.
+
+Every result message of a job is written to the job_results table, which
+serves filtered result pages and replays results that no longer fit in the
+job's replay buffer. All access goes through one dedicated thread with its own
+connection. Writes queued by job threads therefore never wait on a job's
+transaction, and reads submitted later always see the writes queued before
+them. At most MAX_PENDING_WRITES batches may wait in that queue; a job thread
+that produces results faster than SQLite takes them blocks until one lands.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from core.db.query import count_job_results, list_job_result_folders, list_job_results
+from core.db.schema import ensure_schema
+from core.db.storage import add_job_results, delete_job_results
+
+
+# 이만큼의 쓰기 배치(채널 기준 최대 500 result씩)가 밀려 있으면 작업 스레드를 기다리게 한다.
+MAX_PENDING_WRITES = 8
+
+
+class JobResultStore:
+    def __init__(self, db_path: str, *, max_pending: int = MAX_PENDING_WRITES) -> None:
+        self.db_path = db_path
+        self.max_pending = max(1, max_pending)
+        self._conn: sqlite3.Connection | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-results")
+        self._pending = 0
+        self._drained = threading.Condition()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=60)
+            ensure_schema(self._conn)
+        return self._conn
+
+    def _add(self, job_id: str, items: list[tuple[int, dict]]) -> None:
+        conn = self._connection()
+        add_job_results(conn, job_id, items)
+        conn.commit()
+
+    def _delete(self, job_id: str | None) -> int:
+        conn = self._connection()
+        removed = delete_job_results(conn, job_id)
+        conn.commit()
+        return removed
+
+    def _write_done(self, _future: Future) -> None:
+        with self._drained:
+            self._pending -= 1
+            self._drained.notify_all()
+
+    def wait_writable(self) -> None:
+        """밀린 쓰기가 max_pending개 미만이 될 때까지 기다린다."""
+        with self._drained:
+            while self._pending >= self.max_pending:
+                self._drained.wait()
+
+    def add(self, job_id: str, items: list[tuple[int, dict]], *, wait: bool = True) -> Future:
+        """쓰기 예약. 밀린 쓰기가 max_pending개면 하나가 끝날 때까지 기다린다.
+
+        wait=False면 바로 예약한다 (잠금을 쥔 채 부르는 쪽은 먼저 wait_writable()로 기다린다).
+        """
+        with self._drained:
+            while wait and self._pending >= self.max_pending:
+                self._drained.wait()
+            self._pending += 1
+        future = self._executor.submit(self._add, job_id, list(items))
+        future.add_done_callback(self._write_done)
+        return future
+
+    def list(self, job_id: str, after_seq: int, before_seq: int | None, limit: int) -> list[dict]:
+        return self._executor.submit(
+            lambda: list_job_results(
+                self._connection(), job_id, after_seq=after_seq, before_seq=before_seq, limit=limit
+            )
+        ).result()
+
+    def page(
+        self,
+        job_id: str,
+        *,
+        statuses: list[str] | None = None,
+        folder: str | None = None,
+        target: str | None = None,
+        search: str | None = None,
+        after_seq: int = 0,
+        offset: int = 0,
+        limit: int = 200,
+    ) -> tuple[list[dict], dict[str, int]]:
+        """필터에 맞는 result 한 페이지와 상태별 개수 (블로킹)."""
+
+        def _page() -> tuple[list[dict], dict[str, int]]:
+            conn = self._connection()
+            filters = {"folder": folder, "target": target, "search": search}
+            items = list_job_results(
+                conn,
+                job_id,
+                after_seq=after_seq,
+                statuses=statuses,
+                offset=offset,
+                limit=limit,
+                **filters,
+            )
+            return items, count_job_results(conn, job_id, **filters)
+
+        return self._executor.submit(_page).result()
+
+    def sources(
+        self,
+        job_id: str,
+        *,
+        offset: int,
+        limit: int,
+        exclude: tuple[str, ...] = ("ERROR",),
+    ) -> list[str]:
+        """exclude 상태를 뺀 result의 source를 seq 순서로 offset부터 limit개 (블로킹)."""
+
+        def _sources() -> list[str]:
+            conn = self._connection()
+            statuses = [status for status in count_job_results(conn, job_id) if status not in exclude]
+            items = list_job_results(conn, job_id, statuses=statuses, offset=offset, limit=limit)
+            return [str(item["source"]) for item in items if item.get("source")]
+
+        return self._executor.submit(_sources).result()
+
+    def folders(
+        self,
+        job_id: str,
+        *,
+        statuses: list[str] | None = None,
+        search: str | None = None,
+    ) -> list[dict]:
+        """folder별 result 개수 (블로킹)."""
+        return self._executor.submit(
+            lambda: list_job_result_folders(self._connection(), job_id, statuses=statuses, search=search)
+        ).result()
+
+    def delete(self, job_id: str | None = None) -> Future:
+        return self._executor.submit(self._delete, job_id)
+
+    def close(self) -> None:
+        def _close() -> None:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        self._executor.submit(_close)
+        self._executor.shutdown(wait=True)
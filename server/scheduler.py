@@ -0,0 +1,267 @@
+"""Bounded job scheduler for the FastAPI server.
+
+Each op belongs to a resource class. CPU-heavy jobs (scan, classification) and
+I/O-heavy jobs (file moves) have their own slot counts, and the total number of
+running jobs is capped as well. A job that does not fit waits in a priority +
+FIFO queue. Later jobs of another class may start ahead of it, but only until
+it has waited max_wait seconds. Instant ops (template/preset DB calls) never wait.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from core.runner import classify_workers
+
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_CPU = "cpu"
+RESOURCE_IO = "io"
+RESOURCE_INSTANT = "instant"
+
+# 작업 종류별 자원 분류. 여기 없는 작업은 io로 본다.
+OP_RESOURCES = {
+    "scan": RESOURCE_CPU,
+    "search": RESOURCE_CPU,
+    "plan": RESOURCE_IO,
+    "rename": RESOURCE_IO,
+    "move": RESOURCE_IO,
+    "apply": RESOURCE_IO,
+    "strip_suffix": RESOURCE_IO,
+    "build_nais": RESOURCE_IO,
+    "db_stats": RESOURCE_INSTANT,
+    "resume_clear": RESOURCE_INSTANT,
+    "preset_load": RESOURCE_INSTANT,
+    "preset_save": RESOURCE_INSTANT,
+    "preset_import": RESOURCE_INSTANT,
+    "template_db_list": RESOURCE_INSTANT,
+    "template_db_get": RESOURCE_INSTANT,
+    "template_db_save": RESOURCE_INSTANT,
+    "template_db_delete": RESOURCE_INSTANT,
+    "preset_db_list": RESOURCE_INSTANT,
+    "preset_db_get": RESOURCE_INSTANT,
+    "preset_db_save": RESOURCE_INSTANT,
+    "preset_db_delete": RESOURCE_INSTANT,
+}
+
+# 분류 워커 풀(classify_workers > 1, 기본 CPU-1)을 띄우면 CPU 작업으로 보는 작업
+POOL_CLASSIFY_OPS = {"plan", "rename", "move"}
+
+# 동시에 실행할 작업 수 (instant 제외). 스캔은 자체 프로세스 풀을 쓰므로 CPU 작업은 하나씩.
+DEFAULT_MAX_JOBS = 2
+DEFAULT_SLOTS = {RESOURCE_CPU: 1, RESOURCE_IO: 2}
+# 이만큼(초) 기다린 작업이 있으면 뒤 작업이 다른 분류 자리로 앞질러 시작하지 못한다.
+DEFAULT_MAX_WAIT = 30.0
+
+
+def _env_int(key: str, default: int) -> int:
+    value = os.environ.get(key)
+    try:
+        if value:
+            return max(1, int(value))
+    except ValueError:
+        pass
+    return default
+
+
+def resource_class(op: str, payload: dict | None = None) -> str:
+    """작업의 자원 분류. plan/rename/move는 분류 워커 풀을 쓰면 cpu."""
+    if op in POOL_CLASSIFY_OPS and payload is not None and classify_workers(payload) > 1:
+        return RESOURCE_CPU
+    return OP_RESOURCES.get(op, RESOURCE_IO)
+
+
+@dataclass
+class _Job:
+    job_id: str
+    resource: str
+    priority: int
+    seq: int
+    run: Callable[[], None]
+    notify: Callable[[int], None] | None
+    queued_at: float = field(default_factory=time.monotonic)
+    position: int = field(default=-1)
+
+    @property
+    def sort_key(self) -> tuple[int, int]:
+        return (-self.priority, self.seq)
+
+
+class JobScheduler:
+    """작업 스레드 실행기. submit한 작업은 자리가 나면 각자 스레드에서 run()을 호출한다.
+
+    대기열은 priority가 큰 순, 같으면 들어온 순. 앞 작업의 자원 분류에 자리가 없으면
+    다른 분류의 뒤 작업이 먼저 시작할 수 있지만, 앞 작업이 max_wait초 넘게 기다렸으면
+    그 뒤 작업은 앞지르지 못하고 자리가 날 때까지 함께 기다린다 (instant 작업은 예외).
+    대기 순번이 바뀔 때마다 notify(순번)을 부르고, 시작할 때는 notify(0)을 부른다 (대기했던 작업만).
+    """
+
+    def __init__(
+        self,
+        *,
+        max_jobs: int | None = None,
+        slots: dict[str, int] | None = None,
+        max_wait: float | None = None,
+    ) -> None:
+        self.max_jobs = max_jobs or _env_int("NAI_MAX_JOBS", DEFAULT_MAX_JOBS)
+        if max_wait is None:
+            max_wait = float(_env_int("NAI_JOB_MAX_WAIT", int(DEFAULT_MAX_WAIT)))
+        self.max_wait = max(0.0, max_wait)
+        self.slots = {
+            RESOURCE_CPU: _env_int("NAI_CPU_JOBS", DEFAULT_SLOTS[RESOURCE_CPU]),
+            RESOURCE_IO: _env_int("NAI_IO_JOBS", DEFAULT_SLOTS[RESOURCE_IO]),
+        }
+        if slots:
+            self.slots.update(slots)
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._waiting: list[_Job] = []
+        self._running: dict[str, str] = {}
+
+    def submit(
+        self,
+        job_id: str,
+        op: str,
+        run: Callable[[], None],
+        *,
+        priority: int = 0,
+        notify: Callable[[int], None] | None = None,
+        payload: dict | None = None,
+    ) -> int:
+        """작업 등록. 대기 순번(1부터)을 반환하고, 바로 시작했으면 0."""
+        job = _Job(job_id, resource_class(op, payload), priority, next(self._seq), run, notify)
+        with self._lock:
+            self._waiting.append(job)
+            self._waiting.sort(key=lambda item: item.sort_key)
+            started = self._take_runnable()
+            changed = self._update_positions()
+            position = job.position if job in self._waiting else 0
+        self._start(started)
+        self._notify(changed)
+        return position
+
+    def cancel(self, job_id: str) -> bool:
+        """대기 중인 작업을 대기열에서 뺀다. 이미 실행 중이거나 없으면 False."""
+        with self._lock:
+            for idx, job in enumerate(self._waiting):
+                if job.job_id == job_id:
+                    del self._waiting[idx]
+                    break
+            else:
+                return False
+            changed = self._update_positions()
+        self._notify(changed)
+        return True
+
+    def position(self, job_id: str) -> int | None:
+        """대기 순번 (실행 중이면 0, 모르는 작업이면 None)."""
+        with self._lock:
+            if job_id in self._running:
+                return 0
+            for job in self._waiting:
+                if job.job_id == job_id:
+                    return job.position
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "running": [
+                    {"id": job_id, "resource": resource} for job_id, resource in self._running.items()
+                ],
+                "waiting": [
+                    {"id": job.job_id, "resource": job.resource, "priority": job.priority}
+                    for job in self._waiting
+                ],
+            }
+
+    # ---- 내부 (잠금 안에서) ----
+
+    def _can_run(self, resource: str, counts: dict[str, int]) -> bool:
+        if resource == RESOURCE_INSTANT:
+            return True
+        if sum(counts.values()) >= self.max_jobs:
+            return False
+        return counts.get(resource, 0) < self.slots.get(resource, 1)
+
+    def _take_runnable(self) -> list[_Job]:
+        counts: dict[str, int] = {}
+        for resource in self._running.values():
+            if resource != RESOURCE_INSTANT:
+                counts[resource] = counts.get(resource, 0) + 1
+        started: list[_Job] = []
+        remaining: list[_Job] = []
+        now = time.monotonic()
+        blocked = False
+        for job in self._waiting:
+            if (not blocked or job.resource == RESOURCE_INSTANT) and self._can_run(job.resource, counts):
+                started.append(job)
+                self._running[job.job_id] = job.resource
+                if job.resource != RESOURCE_INSTANT:
+                    counts[job.resource] = counts.get(job.resource, 0) + 1
+            else:
+                remaining.append(job)
+                # 오래 기다린 작업 뒤로는 앞지르기 금지 (자리가 나면 이 작업이 먼저)
+                if now - job.queued_at >= self.max_wait:
+                    blocked = True
+        self._waiting = remaining
+        return started
+
+    def _update_positions(self) -> list[_Job]:
+        changed: list[_Job] = []
+        for idx, job in enumerate(self._waiting, start=1):
+            if job.position != idx:
+                job.position = idx
+                changed.append(job)
+        return changed
+
+    # ---- 실행 ----
+
+    def _start(self, jobs: list[_Job]) -> None:
+        for job in jobs:
+            waited = job.position > 0
+            job.position = 0
+            if waited:
+                self._notify([job])
+            thread = threading.Thread(target=self._run, args=(job,), name=f"job-{job.job_id}", daemon=True)
+            thread.start()
+
+    def _run(self, job: _Job) -> None:
+        try:
+            job.run()
+        except Exception:
+            logger.exception(f"[scheduler] job {job.job_id} raised")
+        finally:
+            with self._lock:
+                self._running.pop(job.job_id, None)
+                started = self._take_runnable()
+                changed = self._update_positions()
+            self._start(started)
+            self._notify(changed)
+
+    @staticmethod
+    def _notify(jobs: list[_Job]) -> None:
+        for job in jobs:
+            if job.notify is None:
+                continue
+            try:
+                job.notify(job.position)
+            except Exception:
+                logger.exception(f"[scheduler] notify failed for {job.job_id}")
+
+
+_scheduler: JobScheduler | None = None
+
+
+def get_job_scheduler() -> JobScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = JobScheduler()
+    return _scheduler
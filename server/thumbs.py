@@ -0,0 +1,312 @@
+"""Thumbnail serving for the FastAPI server.
+
+Generation runs on a bounded thread pool so a cold thumbnail never blocks the
+event loop, and concurrent requests for the same cache key share one job.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+from PIL import Image
+
+from core.cache import (
+    DEFAULT_QUALITY,
+    DEFAULT_SIZE,
+    ensure_thumbnail,
+    open_pack,
+    resolve_cache_dir,
+    thumbnail_key,
+)
+
+
+# 썸네일 URL은 경로 기반이라 같은 경로의 파일이 바뀔 수 있다 → 짧게 캐시하고 ETag로 재검증.
+CACHE_CONTROL = "private, max-age=300"
+# 배치 요청 한 번에 받을 최대 경로 수 (그리드 한두 페이지 분량).
+BATCH_MAX_PATHS = 500
+# 보이는 범위 앞뒤로 미리 만들 기본 개수.
+PREFETCH_LOOKAHEAD = 100
+# 이미 처리한 경로를 기억하는 최대 개수 (넘치면 비운다).
+PREFETCH_DONE_LIMIT = 50_000
+
+
+def _default_workers() -> int:
+    value = os.environ.get("NAI_THUMB_WORKERS")
+    try:
+        if value:
+            return max(1, int(value))
+    except ValueError:
+        pass
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+@dataclass(frozen=True)
+class ThumbSource:
+    path: str
+    key: str
+    mtime: float
+
+    @property
+    def etag(self) -> str:
+        # 같은 키면 팩에서 같은 JPEG 바이트를 내보내므로 강한 검증자로 쓸 수 있다.
+        return f'"{self.key}"'
+
+    @property
+    def last_modified(self) -> str:
+        return formatdate(self.mtime, usegmt=True)
+
+    def headers(self) -> dict[str, str]:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": self.last_modified,
+            "Cache-Control": CACHE_CONTROL,
+        }
+
+    def not_modified(self, if_none_match: str | None, if_modified_since: str | None) -> bool:
+        """조건부 요청 판정. If-None-Match가 있으면 If-Modified-Since는 무시한다."""
+        if if_none_match:
+            tags = {tag.strip() for tag in if_none_match.split(",")}
+            weak = f"W/{self.etag}"
+            return "*" in tags or self.etag in tags or weak in tags
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.mtime) <= int(since)
+        return False
+
+
+class ThumbService:
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        *,
+        size: int = DEFAULT_SIZE,
+        quality: int = DEFAULT_QUALITY,
+        workers: int | None = None,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.size = size
+        self.quality = quality
+        self.workers = workers or _default_workers()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="thumb",
+        )
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _resolve_blocking(self, path: str) -> ThumbSource | None:
+        try:
+            mtime = os.stat(path).st_mtime
+            key = thumbnail_key(path, self.size)
+        except OSError:
+            return None
+        return ThumbSource(path=path, key=key, mtime=mtime)
+
+    def _load_blocking(self, source: ThumbSource) -> memoryview | None:
+        key = ensure_thumbnail(
+            source.path, self.cache_dir, size=self.size, quality=self.quality
+        )
+        if key is None:
+            return None
+        return open_pack(resolve_cache_dir(self.cache_dir)).get(key)
+
+    async def resolve(self, path: str) -> ThumbSource | None:
+        """stat + 내용 키 계산 (디스크 읽기가 있어 스레드에서 실행)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._resolve_blocking, path)
+
+    async def load(self, source: ThumbSource) -> memoryview | None:
+        """JPEG 바이트. 같은 키의 생성이 진행 중이면 그 결과를 기다린다."""
+        future = self._inflight.get(source.key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, self._load_blocking, source)
+            self._inflight[source.key] = future
+            future.add_done_callback(lambda _f, key=source.key: self._inflight.pop(key, None))
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            return None
+
+    async def load_many(self, paths: list[str]) -> list[memoryview | None]:
+        """경로 순서대로 JPEG 바이트. 키 계산은 한 번의 스레드 호출로 묶는다."""
+        loop = asyncio.get_running_loop()
+        sources = await loop.run_in_executor(
+            None, lambda: [self._resolve_blocking(path) for path in paths]
+        )
+
+        async def one(source: ThumbSource | None) -> memoryview | None:
+            if source is None:
+                return None
+            return await self.load(source)
+
+        return list(await asyncio.gather(*(one(source) for source in sources)))
+
+    async def run(self, func, *args):
+        """썸네일 풀에서 임의 작업 실행 (스프라이트 합성 등)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def encode_bundle(items: list[memoryview | bytes | None]) -> bytes:
+    """길이 접두 번들: 항목마다 4바이트 빅엔디언 길이 + JPEG 바이트 (없으면 길이 0)."""
+    out = bytearray()
+    for data in items:
+        length = len(data) if data is not None else 0
+        out += struct.pack(">I", length)
+        if length:
+            out += data
+    return bytes(out)
+
+
+def build_sprite(
+    items: list[memoryview | bytes | None],
+    cell: int,
+    columns: int,
+    quality: int = DEFAULT_QUALITY,
+) -> tuple[bytes, list[dict | None]]:
+    """썸네일을 cell×cell 격자 한 장으로 합친 JPEG와 항목별 좌표(x, y, w, h)."""
+    columns = max(1, columns)
+    rows = max(1, (len(items) + columns - 1) // columns)
+    sheet = Image.new("RGB", (columns * cell, rows * cell), (0, 0, 0))
+    tiles: list[dict | None] = []
+    for idx, data in enumerate(items):
+        if data is None:
+            tiles.append(None)
+            continue
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                img.load()
+                width, height = img.size
+                x = (idx % columns) * cell
+                y = (idx // columns) * cell
+                sheet.paste(img, (x, y))
+        except Exception:
+            tiles.append(None)
+            continue
+        tiles.append({"x": x, "y": y, "w": width, "h": height})
+    buf = io.BytesIO()
+    sheet.save(buf, "JPEG", quality=quality)
+    return buf.getvalue(), tiles
+
+
+class ThumbPrefetcher:
+    """뷰포트 우선 썸네일 프리페치 큐.
+
+    UI가 보이는 범위 + 앞쪽 여유분을 보내면 대기열을 통째로 교체한다.
+    보이는 타일이 먼저, 그 다음 스크롤 방향(뒤쪽) → 반대쪽 순서로 만든다.
+    뷰포트가 바뀌면 아직 시작 안 한 이전 작업은 버려진다 (진행 중인 것은 끝까지).
+    """
+
+    def __init__(self, service: ThumbService, *, concurrency: int | None = None) -> None:
+        self.service = service
+        # 풀을 모두 차지하지 않도록 한 자리는 단건 요청용으로 남긴다.
+        self.concurrency = concurrency or max(1, service.workers - 1)
+        self._pending: deque[str] = deque()
+        self._done: set[str] = set()
+        self._wake: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    @staticmethod
+    def order(paths: list[str], start: int, end: int, lookahead: int) -> list[str]:
+        """보이는 범위 → 뒤쪽 lookahead → 앞쪽 lookahead 순서."""
+        start = max(0, min(start, len(paths)))
+        end = max(start, min(end, len(paths)))
+        visible = paths[start:end]
+        ahead = paths[end : end + lookahead]
+        behind = paths[max(0, start - lookahead) : start][::-1]
+        return visible + ahead + behind
+
+    def update(self, paths: list[str]) -> int:
+        """대기열을 paths(우선순위 순)로 교체. 이미 만든 경로는 건너뛴다. 대기 개수 반환."""
+        self._ensure_started()
+        seen: set[str] = set()
+        queue: deque[str] = deque()
+        for path in paths:
+            if path in seen or path in self._done:
+                continue
+            seen.add(path)
+            queue.append(path)
+        self._pending = queue
+        if queue and self._wake is not None:
+            self._wake.set()
+        return len(queue)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        self._wake = asyncio.Event()
+        self._tasks = [
+            asyncio.get_running_loop().create_task(self._worker())
+            for _ in range(self.concurrency)
+        ]
+
+    async def _worker(self) -> None:
+        assert self._wake is not None
+        while True:
+            if not self._pending:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            path = self._pending.popleft()
+            try:
+                source = await self.service.resolve(path)
+                if source is not None:
+                    await self.service.load(source)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            if len(self._done) >= PREFETCH_DONE_LIMIT:
+                self._done.clear()
+            self._done.add(path)
+
+    def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._pending.clear()
+
+
+_service: ThumbService | None = None
+_prefetcher: ThumbPrefetcher | None = None
+
+
+def get_thumb_service() -> ThumbService:
+    global _service
+    if _service is None:
+        _service = ThumbService()
+    return _service
+
+
+def get_thumb_prefetcher() -> ThumbPrefetcher:
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = ThumbPrefetcher(get_thumb_service())
+    return _prefetcher
+
+
+def shutdown_thumb_service() -> None:
+    global _service, _prefetcher
+    if _prefetcher is not None:
+        _prefetcher.shutdown()
+        _prefetcher = None
+    if _service is not None:
+        _service.shutdown()
+        _service = None
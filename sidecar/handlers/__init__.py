@@ -1,6 +1,7 @@
 from .build import handle_build_nais
 from .db import handle_db_stats
 from .move import handle_move
+from .plan import handle_apply, handle_plan
 from .preset import handle_preset_import, handle_preset_load, handle_preset_save
 from .preset_db import (
     handle_preset_db_delete,
@@ -24,6 +25,8 @@ __all__ = [
     "handle_build_nais",
     "handle_db_stats",
     "handle_move",
+    "handle_plan",
+    "handle_apply",
     "handle_preset_import",
     "handle_preset_load",
     "handle_preset_save",
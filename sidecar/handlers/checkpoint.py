@@ -0,0 +1,99 @@
+import hashlib
+from pathlib import Path
+
+from core.db.query import has_job_checkpoint_item, job_checkpoint_has_items
+from core.db.storage import add_job_checkpoint_items, delete_job_checkpoint, start_job_checkpoint
+
+from .scan import scan_checkpoint_key
+
+
+LEGACY_RESUME_FILES = {"rename": ".nai_resume_rename.txt", "move": ".nai_resume_move.txt"}
+
+
+def path_hash(path: str) -> int:
+    """경로의 64비트 해시 (SQLite INTEGER 범위의 부호 있는 정수)."""
+    digest = hashlib.blake2b(str(path).encode("utf-8", "surrogatepass"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def legacy_resume_file(kind: str, folder: str) -> Path:
+    return Path(str(folder)) / LEGACY_RESUME_FILES.get(kind, LEGACY_RESUME_FILES["rename"])
+
+
+class JobCheckpoint:
+    """rename/move 재개 체크포인트 (DB job_checkpoints).
+
+    완료 항목은 경로 해시만 step개씩 모아 한 번에 커밋하고, `path in checkpoint`는
+    (checkpoint_id, path_hash) 기본키 조회 한 번이라 재개 시작 때 전체를 읽지 않는다.
+    예전 .nai_resume_*.txt가 남아 있으면 재개 시작 때 한 번 옮기고 지운다.
+    resume_path로 직접 준 파일은 사용자 파일이라 지우지 않고 `<이름>.imported`로 바꿔 둔다.
+    """
+
+    def __init__(
+        self,
+        conn,
+        kind: str,
+        folder: str,
+        *,
+        resume: bool,
+        key: str | None = None,
+        step: int = 200,
+    ) -> None:
+        self.conn = conn
+        self.kind = kind
+        # resume_path를 주면 그 경로를 키로 쓴다 (예전 체크포인트 파일 경로와 같은 의미).
+        self.key = scan_checkpoint_key(key or folder)
+        self.step = max(1, step)
+        self._pending: list[int] = []
+        self.id = start_job_checkpoint(conn, kind, self.key, reset=not resume)
+        if resume:
+            if key:
+                self._import_legacy(Path(str(key)), keep=True)
+            else:
+                self._import_legacy(legacy_resume_file(kind, folder), keep=False)
+        conn.commit()
+        self._has_items = resume and job_checkpoint_has_items(conn, self.id)
+
+    def _import_legacy(self, path: Path, *, keep: bool) -> None:
+        if not path.is_file():
+            return
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                batch: list[int] = []
+                for line in handle:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    batch.append(path_hash(line))
+                    if len(batch) >= 10_000:
+                        add_job_checkpoint_items(self.conn, self.id, batch)
+                        batch.clear()
+                add_job_checkpoint_items(self.conn, self.id, batch)
+            if keep:
+                path.replace(path.with_name(path.name + ".imported"))
+            else:
+                path.unlink(missing_ok=True)
+        except (OSError, UnicodeDecodeError):
+            pass
+
+    def __contains__(self, path: str) -> bool:
+        if not self._has_items:
+            return False
+        return has_job_checkpoint_item(self.conn, self.id, path_hash(path))
+
+    def mark(self, path: str) -> None:
+        self._pending.append(path_hash(path))
+        if len(self._pending) >= self.step:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            add_job_checkpoint_items(self.conn, self.id, self._pending)
+            self._pending.clear()
+        self.conn.commit()
+
+    def clear(self) -> None:
+        """작업이 끝까지 완료되면 체크포인트를 지운다."""
+        self._pending.clear()
+        delete_job_checkpoint(self.conn, self.kind, self.key)
+        self.conn.commit()
@@ -0,0 +1,319 @@
+import multiprocessing as mp
+from collections import deque
+from typing import Any, Container
+
+from core.db.classify import (
+    classify_paths_in_db,
+    drop_classify_specs,
+    load_classify_specs,
+    rebase_matches,
+)
+from core.db.query import get_stored_matches, get_superseded_specs, get_tags_for_path
+from core.db.storage import save_match_specs, save_matches
+from core.extract import extract_tags_from_image
+from core.runner import (
+    MIN_PARALLEL,
+    BatchClassifier,
+    TagSetCache,
+    changed_value_tag_sets,
+    classify_workers,
+    compile_variable_specs,
+    init_worker,
+    process_image,
+    spec_text_hash,
+    variable_spec_texts,
+)
+
+from .common import load_tags
+
+
+# index: 이미지마다 역색인 매처 (기본)
+# numpy: 청크 단위로 태그를 모아 BatchClassifier 비트셋 연산
+# db: SQLite 안에서 값 태그 임시 테이블 ⋈ tags 로 매칭 (DB에 없는 이미지만 Python으로)
+CLASSIFY_ENGINES = ("index", "numpy", "db")
+DEFAULT_CHUNK = 1024
+
+
+def match_cache_enabled(payload: dict) -> bool:
+    """matches 테이블에 분류 결과를 저장/재사용할지 (기본 켬, match_cache=false로 끔)."""
+    return payload.get("match_cache") is not False
+
+
+def classify_options(payload: dict) -> tuple[str, int | None]:
+    """(엔진, 청크 크기). db 엔진은 청크 미지정 시 폴더 전체를 변수당 쿼리 한 번으로 처리."""
+    if payload.get("classify_in_db"):
+        engine = "db"
+    else:
+        engine = str(payload.get("classify_engine") or "index").lower()
+    if engine not in CLASSIFY_ENGINES:
+        engine = "index"
+    try:
+        chunk = int(payload.get("classify_chunk") or 0)
+    except (TypeError, ValueError):
+        chunk = 0
+    if chunk <= 0:
+        return engine, None if engine == "db" else DEFAULT_CHUNK
+    return engine, chunk
+
+
+def _database_file(conn) -> str | None:
+    """워커가 따로 열 수 있는 DB 파일 경로 (메모리 DB면 None)."""
+    for _seq, name, path in conn.execute("PRAGMA database_list"):
+        if name == "main":
+            return path or None
+    return None
+
+
+class ImageClassifier:
+    """rename/move 루프용 분류기. 루프는 이미지 순서대로 match(path)만 호출한다.
+
+    numpy/db 엔진은 처음 요청된 경로부터 chunk개를 미리 읽어 한 번에 분류해 둔다.
+    db 엔진에서 DB에 태그가 없는 이미지는 파일에서 읽어 역색인 매처로 처리한다.
+    store=True면 matches 테이블에서 (스펙 해시, tag_version)이 맞는 결과를 먼저 꺼내 쓰고,
+    새로 계산한 DB 이미지의 결과는 무효였던 변수 행만 다시 저장한다 (이때는 index 엔진도 청크 단위).
+    시작할 때 스펙이 바뀐 변수는 이전 스펙과 값 단위로 비교해, 바뀐 값과 무관한 저장 결과를
+    새 스펙으로 옮겨 둔다 (rebase_matches). 그래서 값 하나를 고치면 그 값에 걸리는 이미지만 다시 분류한다.
+    workers>1이면 청크마다 워커 프로세스(init_worker/process_image)로 넘겨 태그 읽기+분류를
+    병렬로 하고, 다음 청크도 미리 넘겨 둔다. DB가 파일이면 워커가 각자 연결로 DB 태그를 읽으므로
+    (없으면 파일에서) 청크 전체를 넘기고, 이때는 엔진과 상관없이 워커의 역색인 매처로 분류한다
+    (db 엔진은 SQL로 분류하고 남은 이미지만). 메모리 DB면 파일에서 읽을 이미지만 넘긴다.
+    결과는 match()가 요청 순서대로 꺼내므로 이름 배정 등 커밋 단계는 호출 쪽 루프에서 순서대로 한다.
+    태그 읽기 실패는 해당 경로의 match()에서 그대로 다시 발생한다.
+    """
+
+    def __init__(
+        self,
+        conn,
+        image_paths: list[str],
+        variable_specs: list[dict[str, Any]],
+        *,
+        include_negative: bool,
+        engine: str = "index",
+        chunk: int | None = DEFAULT_CHUNK,
+        skip: Container[str] | None = None,
+        store: bool = False,
+        workers: int = 1,
+    ) -> None:
+        self.conn = conn
+        self.include_negative = include_negative
+        self.engine = engine
+        self.variable_specs = variable_specs
+        self.cache = TagSetCache(compile_variable_specs(variable_specs))
+        self._batch = BatchClassifier(variable_specs) if engine == "numpy" else None
+        self.store = store
+        texts = variable_spec_texts(variable_specs, include_negative=include_negative) if store else {}
+        self._hashes = {name: spec_text_hash(text) for name, text in texts.items()}
+        self.workers = max(1, workers)
+        self._chunked = store or engine in ("numpy", "db") or self.workers > 1
+        self._pool = None
+        self._inflight: deque[Any] = deque()
+        self._db_file = _database_file(conn) if self.workers > 1 else None
+        # skip은 `in`만 쓴다 (set 또는 JobCheckpoint)
+        self._order = image_paths if skip is None else [path for path in image_paths if path not in skip]
+        self.chunk = chunk or max(1, len(self._order))
+        self._cursor = 0
+        self._ready: dict[str, dict | Exception] = {}
+        self.db_classified = 0
+        self.stored_hits = 0
+        self.stored_rows = 0
+        self.rebased_rows = 0
+        self.parallel_images = 0
+        # 다시 계산해 저장할 DB 이미지: path → (image_id, tag_version, 무효 변수 목록)
+        self._targets: dict[str, tuple[int, int, list[str]]] = {}
+        if engine == "db":
+            load_classify_specs(conn, variable_specs)
+        if store:
+            self._rebase(texts)
+
+    def _rebase(self, texts: dict[str, str]) -> None:
+        for name, text in texts.items():
+            new_hash = self._hashes[name]
+            for old_hash, old_text in get_superseded_specs(self.conn, name, new_hash):
+                changed = changed_value_tag_sets(old_text, text)
+                if changed is None:
+                    continue
+                self.rebased_rows += rebase_matches(
+                    self.conn,
+                    name,
+                    old_hash,
+                    new_hash,
+                    changed,
+                    include_negative=self.include_negative,
+                )
+        save_match_specs(self.conn, [(self._hashes[name], name, text) for name, text in texts.items()])
+        self.conn.commit()
+
+    def _fill(self) -> None:
+        paths = self._order[self._cursor : self._cursor + self.chunk]
+        self._cursor += len(paths)
+        if self.store:
+            paths = self._take_stored(paths)
+        computed: dict[str, dict[str, dict[str, Any]]] = {}
+        # db 엔진이 이미 확인한 경로는 다시 조회하지 않는다: images에 없으면 바로 파일에서 읽는다.
+        untagged: set[str] | None = None
+        if self.engine == "db" and paths:
+            untagged = set()
+            computed = classify_paths_in_db(
+                self.conn,
+                paths,
+                self.variable_specs,
+                include_negative=self.include_negative,
+                untagged=untagged,
+            )
+            self.db_classified += len(computed)
+            paths = [path for path in paths if path not in computed]
+        if paths and self._db_file and self._ensure_pool(len(paths)):
+            self._submit(paths)
+            paths = []
+        loaded_paths: list[str] = []
+        tag_lists: list[list[str]] = []
+        file_paths: list[str] = []
+        for path in paths:
+            try:
+                if untagged is None or path in untagged:
+                    tags = get_tags_for_path(self.conn, path, include_negative=self.include_negative)
+                else:
+                    tags = None
+                if tags is None:
+                    file_paths.append(path)
+                    continue
+                tag_lists.append(tags)
+                loaded_paths.append(path)
+            except Exception as exc:
+                self._targets.pop(path, None)
+                self._ready[path] = exc
+        if file_paths and self._ensure_pool(len(file_paths)):
+            self._submit(file_paths)
+        else:
+            for path in file_paths:
+                try:
+                    tag_lists.append(extract_tags_from_image(path, self.include_negative))
+                    loaded_paths.append(path)
+                except Exception as exc:
+                    self._targets.pop(path, None)
+                    self._ready[path] = exc
+        computed.update(zip(loaded_paths, self.cache.match_many(tag_lists, self._batch)))
+        self._ready.update(computed)
+        if self.store:
+            self._save_computed(computed)
+
+    def _ensure_pool(self, count: int) -> bool:
+        if self._pool is not None:
+            return True
+        if self.workers <= 1 or count < MIN_PARALLEL:
+            return False
+        try:
+            self._pool = mp.get_context("spawn").Pool(
+                processes=self.workers,
+                initializer=init_worker,
+                initargs=(self.variable_specs, self.include_negative, self._db_file),
+            )
+        except (OSError, RuntimeError):
+            # 프로세스를 띄울 수 없는 환경이면 작업 스레드에서 계속한다.
+            self.workers = 1
+            return False
+        return True
+
+    def _submit(self, paths: list[str]) -> None:
+        chunksize = max(1, len(paths) // (self.workers * 4))
+        self._inflight.append(self._pool.map_async(process_image, paths, chunksize=chunksize))
+        self.parallel_images += len(paths)
+
+    def _collect(self) -> None:
+        computed: dict[str, dict[str, dict[str, Any]]] = {}
+        for result in self._inflight.popleft().get():
+            path = result["path"]
+            error = result.get("error")
+            if error:
+                self._targets.pop(path, None)
+                self._ready[path] = Exception(error)
+            else:
+                computed[path] = result["matches"]
+        self._ready.update(computed)
+        if self.store:
+            # 풀로 넘긴 DB 이미지의 저장 대상(_targets)은 여기서 저장하며 지운다.
+            self._save_computed(computed)
+
+    def _take_stored(self, paths: list[str]) -> list[str]:
+        """저장된 결과가 모두 유효한 경로는 바로 준비해 두고, 나머지 경로 목록을 반환."""
+        stored = get_stored_matches(self.conn, paths)
+        remaining: list[str] = []
+        for path in paths:
+            entry = stored.get(path)
+            if entry is None:
+                remaining.append(path)
+                continue
+            image_id, tag_version, rows = entry
+            stale = [
+                name
+                for name, spec_hash in self._hashes.items()
+                if name not in rows or rows[name][0] != spec_hash or rows[name][1] != tag_version
+            ]
+            if stale:
+                self._targets[path] = (image_id, tag_version, stale)
+                remaining.append(path)
+                continue
+            self._ready[path] = {
+                name: {"status": rows[name][2], "values": rows[name][3]} for name in self._hashes
+            }
+            self.stored_hits += 1
+        return remaining
+
+    def _save_computed(self, computed: dict[str, dict[str, dict[str, Any]]]) -> None:
+        rows: list[tuple[int, str, str, list[str], str, int]] = []
+        for path, matches in computed.items():
+            target = self._targets.pop(path, None)
+            if target is None:
+                continue
+            image_id, tag_version, stale = target
+            for name in stale:
+                match = matches[name]
+                rows.append(
+                    (image_id, name, match["status"], match["values"], self._hashes[name], tag_version)
+                )
+        if rows:
+            save_matches(self.conn, rows)
+            self.conn.commit()
+            self.stored_rows += len(rows)
+
+    def match(self, path: str) -> dict[str, dict[str, Any]]:
+        if not self._chunked:
+            return self.cache.match(load_tags(self.conn, path, self.include_negative))
+        while path not in self._ready:
+            if self._inflight:
+                self._collect()
+            elif self._cursor < len(self._order):
+                self._fill()
+            else:
+                break
+        # 워커가 놀지 않도록 다음 청크를 미리 넘겨 둔다.
+        if self._pool is not None and len(self._inflight) < 2 and self._cursor < len(self._order):
+            self._fill()
+        result = self._ready.pop(path, None)
+        if result is None:
+            # 순서 밖 요청 (skip 목록 등) → 단건 처리
+            return self.cache.match(load_tags(self.conn, path, self.include_negative))
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            self._inflight.clear()
+        if self.engine == "db":
+            drop_classify_specs(self.conn)
+
+    def summary(self) -> str:
+        parts = [f"images={self.cache.images}", f"distinct tag sets={self.cache.distinct}"]
+        if self.engine == "db":
+            parts.insert(0, f"db={self.db_classified}")
+        if self.store:
+            parts.insert(0, f"stored={self.stored_hits}")
+            parts.append(f"saved rows={self.stored_rows}")
+            parts.append(f"rebased rows={self.rebased_rows}")
+        if self.parallel_images:
+            parts.append(f"workers={self.workers} ({self.parallel_images} in pool)")
+        return f"classify: {', '.join(parts)}, engine={self.engine}"
@@ -1,12 +1,20 @@
-import shutil
 from pathlib import Path
-from typing import TextIO
 
-from core.runner import match_variable_specs
-from core.utils import ensure_unique_name, iter_image_files, render_template, sanitize_filename
+from core.runner import classify_workers
+from core.utils import (
+    DEFAULT_DEVICE_WORKERS,
+    FileOpExecutor,
+    FileOpResult,
+    FolderNameIndexes,
+    iter_image_files,
+    render_template,
+    sanitize_filename,
+)
 
 from ..job_manager import JobContext
-from .common import load_tags, load_variable_specs
+from .checkpoint import JobCheckpoint
+from .classify import ImageClassifier, classify_options, match_cache_enabled
+from .common import load_variable_specs
 from .thumbs import apply_thumb_policy, ensure_preview
 
 
@@ -19,10 +27,12 @@ def handle_move(ctx: JobContext, conn) -> None:
     target_root = ctx.payload.get("target_root") or ""
     dry_run = bool(ctx.payload.get("dry_run", True))
     include_negative = bool(ctx.payload.get("include_negative", False))
-    progress_step = max(1, int(ctx.payload.get("progress_step") or 200))
     resume_mode = bool(ctx.payload.get("resume_mode", False))
     resume_path = ctx.payload.get("resume_path")
+    progress_step = max(1, int(ctx.payload.get("progress_step") or 200))
     checkpoint_step = max(1, int(ctx.payload.get("checkpoint_step") or 200))
+    file_workers = max(1, int(ctx.payload.get("file_workers") or DEFAULT_DEVICE_WORKERS))
+    move_batch = max(1, int(ctx.payload.get("move_batch") or 5000))
 
     # variable_tree가 있으면 그것을 사용, 없으면 단일 variable_name을 리스트로
     if isinstance(variable_tree, list) and len(variable_tree) > 0:
@@ -57,250 +67,200 @@ def handle_move(ctx: JobContext, conn) -> None:
     processed = 0
     errors = 0
     skipped = 0
-    resume_written = 0
-    resume_file: TextIO | None = None
-    resume_done: set[str] = set()
-    reserved_map: dict[str, set[str]] = {}
+    # 대상 폴더별 이름 색인 (처음 쓰는 폴더만 scandir 한 번)
+    name_indexes = FolderNameIndexes()
 
-    if not resume_path:
-        resume_path = str(Path(folder) / ".nai_resume_move.txt")
-    resume_file_path = Path(str(resume_path))
-    resume_file_path.parent.mkdir(parents=True, exist_ok=True)
-    if resume_mode and resume_file_path.exists():
-        try:
-            with resume_file_path.open("r", encoding="utf-8") as handle:
-                resume_done = {line.strip() for line in handle if line.strip()}
-        except Exception:
-            resume_done = set()
-    else:
-        resume_file_path.write_text("", encoding="utf-8")
-    resume_file = resume_file_path.open("a", encoding="utf-8")
+    checkpoint = JobCheckpoint(
+        conn,
+        "move",
+        folder,
+        resume=resume_mode,
+        key=resume_path,
+        step=checkpoint_step,
+    )
 
-    ctx.emit(
-        {
-            "id": ctx.job_id,
-            "type": "progress",
-            "processed": processed,
-            "total": total,
-            "errors": errors,
-            "skipped": skipped,
-        }
+    # 값이 수천 개인 변수도 이미지마다 겹치는 태그만 보도록 역색인 매처를 한 번 만들고,
+    # 태그 집합이 같은 이미지(시드만 다른 변형 등)는 한 번만 분류한다.
+    engine, chunk = classify_options(ctx.payload)
+    classifier = ImageClassifier(
+        conn,
+        image_paths,
+        variable_specs,
+        include_negative=include_negative,
+        engine=engine,
+        chunk=chunk,
+        skip=checkpoint,
+        store=match_cache_enabled(ctx.payload),
+        workers=classify_workers(ctx.payload, len(image_paths)),
     )
 
-    cancelled = False
-    try:
-        for path in image_paths:
-            if path in resume_done:
-                skipped += 1
-                processed += 1
-                if processed % progress_step == 0 or processed == total:
-                    ctx.emit(
-                        {
-                            "id": ctx.job_id,
-                            "type": "progress",
-                            "processed": processed,
-                            "total": total,
-                            "errors": errors,
-                            "skipped": skipped,
-                        }
-                    )
-                continue
-            if ctx.is_cancelled():
-                cancelled = True
-                ctx.emit({"id": ctx.job_id, "type": "done", "cancelled": True})
-                return
-            try:
-                tags = load_tags(conn, path, include_negative)
-                matches = match_variable_specs(variable_specs, tags)
-            except Exception as exc:
-                errors += 1
-                processed += 1
-                ctx.emit(
-                    {
-                        "id": ctx.job_id,
-                        "type": "result",
-                        "status": "ERROR",
-                        "source": path,
-                        "message": str(exc),
-                    }
-                )
-                if resume_file:
-                    resume_file.write(f"{path}\n")
-                    resume_written += 1
-                    if resume_written % checkpoint_step == 0:
-                        resume_file.flush()
-                if processed % progress_step == 0 or processed == total:
-                    ctx.emit(
-                        {
-                            "id": ctx.job_id,
-                            "type": "progress",
-                            "processed": processed,
-                            "total": total,
-                            "errors": errors,
-                            "skipped": skipped,
-                        }
-                    )
-                continue
+    # 파일 작업은 실행기에 넘기고 결과는 넘긴 순서대로 받아 처리한다.
+    # 같은 장치면 바로 os.rename, 다른 장치(드라이브/NAS)면 장치 쌍별 스레드 풀에서 복사+삭제.
+    executor = FileOpExecutor(device_workers=file_workers)
+    # move_batch개씩 분류한 뒤 대상 폴더별로 묶어 옮긴다 (폴더마다 mkdir 한 번).
+    # 진행률은 progress_step개마다, 그리고 move_batch 묶음이 끝날 때.
+    last_progress = -1
+
+    def emit_progress() -> None:
+        nonlocal last_progress
+        last_progress = processed
+        ctx.emit(
+            {
+                "id": ctx.job_id,
+                "type": "progress",
+                "processed": processed,
+                "total": total,
+                "errors": errors,
+                "skipped": skipped,
+            }
+        )
+
+    def finish(result: FileOpResult) -> None:
+        nonlocal processed, errors
+        info = result.context
+        processed += 1
+        if result.error is not None or info["status"] == "ERROR":
+            errors += 1
+            ctx.emit(
+                {
+                    "id": ctx.job_id,
+                    "type": "result",
+                    "status": "ERROR",
+                    "source": result.source,
+                    "message": str(result.error) if result.error is not None else info["message"],
+                }
+            )
+            checkpoint.mark(result.source)
+        else:
+            target = info["target"]
+            final_path = target if target and not dry_run else result.source
+            message = {
+                "id": ctx.job_id,
+                "type": "result",
+                "status": info["status"],
+                "source": result.source,
+                "target": target,
+            }
+            if target:
+                message["folder"] = info["folder"]  # 분류된 폴더 경로 (탐색용)
+            message["message"] = info["message"]
+            message["preview"] = ensure_preview(ctx.payload, final_path)
+            ctx.emit(message)
+            checkpoint.mark(final_path)
+        if processed - last_progress >= progress_step:
+            emit_progress()
 
-            # 계층별 분류: var_list의 각 변수에 대해 폴더 경로 조합
-            # OK인 변수들까지만 폴더 경로를 만들고, 나머지는 실패해도 부분 분류
-            folder_parts = []
-            last_fail_status = None  # 마지막으로 실패한 상태
-            for vn in var_list:
-                match = matches.get(vn, {})
-                st = match.get("status") or "UNKNOWN"
-                if st == "OK":
-                    val = match.get("values", [""])[0]
-                    part = render_template(template, {"value": val})
-                    part = sanitize_filename(part)
-                    if part:
-                        folder_parts.append(part)
-                    else:
-                        last_fail_status = "ERROR"
-                        break
+    def plan_item(path: str) -> tuple[str | None, str | None, dict]:
+        """(대상 폴더, 대상 경로, 결과 정보). 분류 실패/오류면 대상 폴더가 None."""
+        try:
+            matches = classifier.match(path)
+        except Exception as exc:
+            return None, None, {"status": "ERROR", "message": str(exc)}
+
+        # 계층별 분류: var_list의 각 변수에 대해 폴더 경로 조합
+        # OK인 변수들까지만 폴더 경로를 만들고, 나머지는 실패해도 부분 분류
+        folder_parts = []
+        last_fail_status = None  # 마지막으로 실패한 상태
+        for vn in var_list:
+            match = matches.get(vn, {})
+            st = match.get("status") or "UNKNOWN"
+            if st == "OK":
+                val = match.get("values", [""])[0]
+                part = render_template(template, {"value": val})
+                part = sanitize_filename(part)
+                if part:
+                    folder_parts.append(part)
                 else:
-                    # OK가 아닌 경우 여기서 멈추고, 지금까지 모은 folder_parts로 분류
-                    last_fail_status = st
+                    last_fail_status = "ERROR"
                     break
-
-            # 전체 OK면 OK, 부분 분류면 PARTIAL, 아무것도 못하면 원래 상태
-            if len(folder_parts) == len(var_list):
-                overall_status = "OK"
-            elif len(folder_parts) > 0:
-                overall_status = "PARTIAL"  # 부분 분류됨
             else:
-                overall_status = last_fail_status or "UNKNOWN"
+                # OK가 아닌 경우 여기서 멈추고, 지금까지 모은 folder_parts로 분류
+                last_fail_status = st
+                break
 
-            # 폴더 경로가 하나도 없으면 분류 불가 (UNKNOWN, CONFLICT 등)
-            if not folder_parts:
-                processed += 1
-                preview = ensure_preview(ctx.payload, path)
-                ctx.emit(
-                    {
-                        "id": ctx.job_id,
-                        "type": "result",
-                        "status": overall_status,
-                        "source": path,
-                        "target": None,
-                        "message": f"1단계 변수부터 매칭 실패",
-                        "preview": preview,
-                    }
-                )
-                if resume_file:
-                    resume_file.write(f"{path}\n")
-                    resume_written += 1
-                    if resume_written % checkpoint_step == 0:
-                        resume_file.flush()
-                if processed % progress_step == 0 or processed == total:
-                    ctx.emit(
-                        {
-                            "id": ctx.job_id,
-                            "type": "progress",
-                            "processed": processed,
-                            "total": total,
-                            "errors": errors,
-                            "skipped": skipped,
-                        }
-                    )
-                continue
+        # 전체 OK면 OK, 부분 분류면 PARTIAL, 아무것도 못하면 원래 상태
+        if len(folder_parts) == len(var_list):
+            overall_status = "OK"
+        elif len(folder_parts) > 0:
+            overall_status = "PARTIAL"  # 부분 분류됨
+        else:
+            overall_status = last_fail_status or "UNKNOWN"
 
-            # 계층 폴더 경로 생성
-            target_folder = Path(target_root)
-            for part in folder_parts:
-                target_folder = target_folder / part
-            target_folder = str(target_folder)
+        # 폴더 경로가 하나도 없으면 분류 불가 (UNKNOWN, CONFLICT 등)
+        if not folder_parts:
+            return None, None, {
+                "status": overall_status,
+                "target": None,
+                "message": "1단계 변수부터 매칭 실패",
+            }
+
+        # 계층 폴더 경로 생성
+        target_folder = Path(target_root)
+        for part in folder_parts:
+            target_folder = target_folder / part
+        target_folder = str(target_folder)
+        # 이름은 원래 순서대로 배정해서 묶음 순서와 상관없이 같은 이름이 나온다.
+        new_name = name_indexes[target_folder].allocate(Path(path).stem, Path(path).suffix)
+        target = str(Path(target_folder) / new_name)
+        return target_folder, target, {
+            "status": overall_status,  # OK 또는 PARTIAL
+            "target": target,
             # 결과에 표시할 분류 폴더 (target_root 상대경로)
-            classified_folder = "/".join(folder_parts)
-            if target_folder not in reserved_map:
-                try:
-                    names = {
-                        p.name.lower()
-                        for p in Path(target_folder).glob("*")
-                        if p.is_file()
-                    }
-                except FileNotFoundError:
-                    names = set()
-                reserved_map[target_folder] = names
+            "folder": "/".join(folder_parts),
+            "message": f"부분 분류 ({len(folder_parts)}/{len(var_list)}단계)" if overall_status == "PARTIAL" else None,
+        }
+
+    def submit_group(target_folder: str | None, items: list[tuple[str, str | None, dict]]) -> None:
+        if target_folder is not None and not dry_run:
+            try:
+                executor.make_folder(target_folder)
+            except Exception as exc:
+                items = [(path, None, {"status": "ERROR", "message": str(exc)}) for path, _target, _info in items]
+        # 원본 경로 순으로 옮겨 같은 원본 폴더의 항목이 이어지게 한다.
+        items.sort(key=lambda item: item[0])
+        for path, target, info in items:
+            executor.submit(path, None if dry_run else target, info)
 
-            reserved = reserved_map[target_folder]
-            ext = Path(path).suffix
-            base = Path(path).stem
-            new_name = ensure_unique_name(target_folder, base, ext, reserved)
-            target = str(Path(target_folder) / new_name)
+    emit_progress()
 
-            if not dry_run:
-                Path(target_folder).mkdir(parents=True, exist_ok=True)
-                try:
-                    shutil.move(path, target)
-                except Exception as exc:
-                    errors += 1
+    completed = False
+    try:
+        for start in range(0, total, move_batch):
+            groups: dict[str | None, list[tuple[str, str | None, dict]]] = {}
+            for path in image_paths[start : start + move_batch]:
+                if path in checkpoint:
+                    skipped += 1
                     processed += 1
-                    ctx.emit(
-                        {
-                            "id": ctx.job_id,
-                            "type": "result",
-                            "status": "ERROR",
-                            "source": path,
-                            "message": str(exc),
-                        }
-                    )
-                    if resume_file:
-                        resume_file.write(f"{path}\n")
-                        resume_written += 1
-                        if resume_written % checkpoint_step == 0:
-                            resume_file.flush()
-                    if processed % progress_step == 0 or processed == total:
-                        ctx.emit(
-                            {
-                                "id": ctx.job_id,
-                                "type": "progress",
-                                "processed": processed,
-                                "total": total,
-                                "errors": errors,
-                                "skipped": skipped,
-                            }
-                        )
                     continue
+                if ctx.is_cancelled():
+                    break
+                target_folder, target, info = plan_item(path)
+                groups.setdefault(target_folder, []).append((path, target, info))
 
-            processed += 1
-            preview_source = path if dry_run else target
-            preview = ensure_preview(ctx.payload, preview_source)
-            ctx.emit(
-                {
-                    "id": ctx.job_id,
-                    "type": "result",
-                    "status": overall_status,  # OK 또는 PARTIAL
-                    "source": path,
-                    "target": target,
-                    "folder": classified_folder,  # 분류된 폴더 경로 (탐색용)
-                    "message": f"부분 분류 ({len(folder_parts)}/{len(var_list)}단계)" if overall_status == "PARTIAL" else None,
-                    "preview": preview,
-                }
-            )
-            if resume_file:
-                final_path = path if dry_run else target
-                resume_file.write(f"{final_path}\n")
-                resume_written += 1
-                if resume_written % checkpoint_step == 0:
-                    resume_file.flush()
-            if processed % progress_step == 0 or processed == total:
-                ctx.emit(
-                    {
-                        "id": ctx.job_id,
-                        "type": "progress",
-                        "processed": processed,
-                        "total": total,
-                        "errors": errors,
-                        "skipped": skipped,
-                    }
-                )
+            for target_folder, items in groups.items():
+                if ctx.is_cancelled():
+                    break
+                submit_group(target_folder, items)
+                for result in executor.completed():
+                    finish(result)
+            for result in executor.drain():
+                finish(result)
+            if ctx.is_cancelled():
+                ctx.emit({"id": ctx.job_id, "type": "done", "cancelled": True})
+                return
+            if processed != last_progress:
+                emit_progress()
+        completed = True
     finally:
-        if resume_file:
-            resume_file.flush()
-            resume_file.close()
-        if not cancelled:
-            resume_file_path.unlink(missing_ok=True)
+        executor.shutdown()
+        classifier.close()
+        # 끝까지 처리했으면 체크포인트 삭제, 취소/예외면 지금까지 완료 항목을 남긴다.
+        if completed:
+            checkpoint.clear()
+        else:
+            checkpoint.flush()
 
+    ctx.emit({"id": ctx.job_id, "type": "log", "message": classifier.summary()})
     ctx.emit(
         {
             "id": ctx.job_id,
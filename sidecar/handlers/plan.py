@@ -0,0 +1,253 @@
+import os
+from pathlib import Path
+
+from core.db.query import get_plan, list_plan_items
+from core.db.storage import add_plan_items, create_plan, mark_plan_items, set_plan_status
+from core.utils import DEFAULT_DEVICE_WORKERS, FileOpExecutor, FileOpResult
+
+from ..job_manager import JobContext
+from .move import handle_move
+from .rename import handle_rename
+from .thumbs import apply_thumb_policy, ensure_preview
+
+
+PLAN_KINDS = {"rename": handle_rename, "move": handle_move}
+PLAN_COMMIT_STEP = 1000
+APPLY_COMMIT_STEP = 200
+
+
+def handle_plan(ctx: JobContext, conn) -> None:
+    """rename/move 드라이런을 돌려 항목별 (source, target, status)를 plan_items에 저장한다.
+
+    결과/진행 메시지는 드라이런과 같고, done 메시지에 plan_id가 붙는다.
+    """
+    kind = ctx.payload.get("kind") or "rename"
+    handler = PLAN_KINDS.get(kind)
+    if handler is None:
+        ctx.error(ctx.job_id, f"unknown plan kind: {kind}")
+        return
+    folder = ctx.payload.get("folder")
+    if not folder:
+        ctx.error(ctx.job_id, "folder is required")
+        return
+    commit_step = max(1, int(ctx.payload.get("commit_step") or PLAN_COMMIT_STEP))
+
+    payload = {**ctx.payload, "dry_run": True, "resume_mode": False}
+    plan_id = create_plan(conn, kind, str(folder), payload)
+    conn.commit()
+    # 폴더의 실제 실행 재개 체크포인트를 건드리지 않도록 계획 전용 키를 쓴다.
+    payload["resume_path"] = str(Path(str(folder)) / f".nai_plan_{plan_id}")
+
+    rows: list[tuple[int, str, str | None, str, str | None, str | None]] = []
+    seq = 0
+    failed = False
+
+    def flush() -> None:
+        if rows:
+            add_plan_items(conn, plan_id, rows)
+            rows.clear()
+        conn.commit()
+
+    def emit(msg: dict) -> None:
+        nonlocal seq
+        msg_type = msg.get("type")
+        if msg_type == "result":
+            rows.append(
+                (
+                    seq,
+                    str(msg.get("source")),
+                    msg.get("target") if msg.get("status") != "ERROR" else None,
+                    str(msg.get("status")),
+                    msg.get("folder"),
+                    msg.get("message"),
+                )
+            )
+            seq += 1
+            if len(rows) >= commit_step:
+                flush()
+        elif msg_type == "done":
+            flush()
+            status = "cancelled" if msg.get("cancelled") else "ready"
+            set_plan_status(conn, plan_id, status)
+            conn.commit()
+            msg = {**msg, "plan_id": plan_id}
+        ctx.emit(msg)
+
+    def error(job_id, message: str) -> None:
+        nonlocal failed
+        failed = True
+        ctx.error(job_id, message)
+
+    inner = JobContext(
+        job_id=ctx.job_id,
+        payload=payload,
+        emit=emit,
+        error=error,
+        is_cancelled=ctx.is_cancelled,
+        clear_cancel=ctx.clear_cancel,
+    )
+    handler(inner, conn)
+    if failed:
+        set_plan_status(conn, plan_id, "failed")
+        conn.commit()
+
+
+def _check_item(source: str, target: str) -> tuple[str, str | None] | None:
+    """파일 작업 전 확인. 작업 없이 끝나는 항목이면 (state, message), 옮겨야 하면 None."""
+    if source == target:
+        return "done", None
+    if not os.path.exists(source):
+        # 이전 apply가 파일 작업 후 상태 기록 전에 끊긴 경우
+        if os.path.exists(target):
+            return "done", "already applied"
+        return "failed", "source not found"
+    if os.path.exists(target):
+        return "failed", "target exists"
+    return None
+
+
+def handle_apply(ctx: JobContext, conn) -> None:
+    """저장된 계획의 pending 항목만 실행한다. 다시 호출하면 남은 항목부터 이어서.
+
+    한 페이지씩 대상 폴더별로 묶어 move와 같은 FileOpExecutor로 옮긴다.
+    """
+    try:
+        plan_id = int(ctx.payload.get("plan_id"))
+    except (TypeError, ValueError):
+        ctx.error(ctx.job_id, "plan_id is required")
+        return
+    plan = get_plan(conn, plan_id)
+    if plan is None:
+        ctx.error(ctx.job_id, f"plan not found: {plan_id}")
+        return
+    if plan["status"] not in ("ready", "applying", "partial"):
+        ctx.error(ctx.job_id, f"plan is not ready: {plan['status']}")
+        return
+    kind = plan["kind"]
+    progress_step = max(1, int(ctx.payload.get("progress_step") or 200))
+    commit_step = max(1, int(ctx.payload.get("commit_step") or APPLY_COMMIT_STEP))
+    file_workers = max(1, int(ctx.payload.get("file_workers") or DEFAULT_DEVICE_WORKERS))
+
+    counts = plan["counts"]
+    skipped = int(counts.get("done", 0))
+    total = skipped + int(counts.get("pending", 0)) + int(counts.get("failed", 0))
+    processed = skipped
+    errors = 0
+    updates: list[tuple[int, str, str | None]] = []
+
+    set_plan_status(conn, plan_id, "applying")
+    conn.commit()
+
+    def flush() -> None:
+        if updates:
+            mark_plan_items(conn, plan_id, updates)
+            updates.clear()
+        conn.commit()
+
+    def emit_progress() -> None:
+        ctx.emit(
+            {
+                "id": ctx.job_id,
+                "type": "progress",
+                "processed": processed,
+                "total": total,
+                "errors": errors,
+                "skipped": skipped,
+            }
+        )
+
+    def finish(result: FileOpResult) -> None:
+        nonlocal processed, errors
+        item, new_state, message = result.context
+        if result.error is not None:
+            new_state, message = "failed", str(result.error)
+        updates.append((item["seq"], new_state, message))
+        processed += 1
+        if new_state == "done":
+            message_out = {
+                "id": ctx.job_id,
+                "type": "result",
+                "status": item["status"],
+                "source": item["source"],
+                "target": item["target"],
+                "message": item["message"] if message is None else message,
+                "preview": ensure_preview(ctx.payload, item["target"]),
+            }
+            if item["folder"] is not None:
+                message_out["folder"] = item["folder"]
+            ctx.emit(message_out)
+        else:
+            errors += 1
+            ctx.emit(
+                {
+                    "id": ctx.job_id,
+                    "type": "result",
+                    "status": "ERROR",
+                    "source": item["source"],
+                    "message": message,
+                }
+            )
+        if len(updates) >= commit_step:
+            flush()
+        if processed % progress_step == 0 or processed == total:
+            emit_progress()
+
+    def submit_group(target_folder: str | None, group: list[tuple[dict, tuple[str, str | None] | None]]) -> None:
+        # move와 같이 대상 폴더마다 mkdir 한 번, 폴더 안은 원본 경로 순으로 실행기에 넘긴다.
+        if target_folder is not None and kind == "move":
+            try:
+                executor.make_folder(target_folder)
+            except Exception as exc:
+                group = [(item, ("failed", str(exc))) for item, _checked in group]
+        group.sort(key=lambda entry: entry[0]["source"])
+        for item, checked in group:
+            if checked is None:
+                executor.submit(item["source"], item["target"], (item, "done", None))
+            else:
+                executor.submit(item["source"], None, (item, *checked))
+
+    # 파일 작업은 move와 같은 실행기로 (같은 장치는 os.rename, 다른 장치는 장치 쌍별 병렬 복사)
+    executor = FileOpExecutor(device_workers=file_workers)
+    emit_progress()
+    try:
+        # 이전 실행에서 실패한 항목을 먼저 다시 시도한 뒤 대기 항목을 처리한다.
+        for state in ("failed", "pending"):
+            after_seq = -1
+            while True:
+                items = list_plan_items(conn, plan_id, state=state, after_seq=after_seq)
+                if not items:
+                    break
+                after_seq = items[-1]["seq"]
+                groups: dict[str | None, list[tuple[dict, tuple[str, str | None] | None]]] = {}
+                for item in items:
+                    checked = _check_item(item["source"], item["target"])
+                    target_folder = str(Path(item["target"]).parent) if checked is None else None
+                    groups.setdefault(target_folder, []).append((item, checked))
+                for target_folder, group in groups.items():
+                    if ctx.is_cancelled():
+                        break
+                    submit_group(target_folder, group)
+                    for result in executor.completed():
+                        finish(result)
+                for result in executor.drain():
+                    finish(result)
+                flush()
+                if ctx.is_cancelled():
+                    ctx.emit({"id": ctx.job_id, "type": "done", "cancelled": True, "plan_id": plan_id})
+                    return
+    finally:
+        executor.shutdown()
+
+    set_plan_status(conn, plan_id, "partial" if errors else "applied")
+    conn.commit()
+    ctx.emit(
+        {
+            "id": ctx.job_id,
+            "type": "done",
+            "processed": processed,
+            "errors": errors,
+            "skipped": skipped,
+            "plan_id": plan_id,
+        }
+    )
+    apply_thumb_policy(ctx.payload)
@@ -1,13 +1,14 @@
 import logging
 import os
 from pathlib import Path
-from typing import TextIO
 
-from core.runner import match_variable_specs
-from core.utils import ensure_unique_name, iter_image_files, render_template, sanitize_filename
+from core.runner import classify_workers
+from core.utils import FolderNameIndexes, iter_image_files, render_template, sanitize_filename
 
 from ..job_manager import JobContext
-from .common import load_tags, load_variable_specs
+from .checkpoint import JobCheckpoint
+from .classify import ImageClassifier, classify_options, match_cache_enabled
+from .common import load_variable_specs
 from .thumbs import apply_thumb_policy, ensure_preview
 
 logger = logging.getLogger(__name__)
@@ -53,33 +54,41 @@ def handle_rename(ctx: JobContext, conn) -> None:
     processed = 0
     errors = 0
     skipped = 0
-    resume_written = 0
-    resume_file: TextIO | None = None
-    resume_done: set[str] = set()
 
-    if not resume_path:
-        resume_path = str(Path(folder) / ".nai_resume_rename.txt")
-    resume_file_path = Path(str(resume_path))
-    resume_file_path.parent.mkdir(parents=True, exist_ok=True)
-    if resume_mode and resume_file_path.exists():
-        try:
-            with resume_file_path.open("r", encoding="utf-8") as handle:
-                resume_done = {line.strip() for line in handle if line.strip()}
-        except Exception:
-            resume_done = set()
-    else:
-        resume_file_path.write_text("", encoding="utf-8")
-    resume_file = resume_file_path.open("a", encoding="utf-8")
+    checkpoint = JobCheckpoint(
+        conn,
+        "rename",
+        folder,
+        resume=resume_mode,
+        key=resume_path,
+        step=checkpoint_step,
+    )
+
+    # 값이 수천 개인 변수도 이미지마다 겹치는 태그만 보도록 역색인 매처를 한 번 만들고,
+    # 태그 집합이 같은 이미지(시드만 다른 변형 등)는 한 번만 분류한다.
+    engine, chunk = classify_options(ctx.payload)
+    classifier = ImageClassifier(
+        conn,
+        image_paths,
+        variable_specs,
+        include_negative=include_negative,
+        engine=engine,
+        chunk=chunk,
+        skip=checkpoint,
+        store=match_cache_enabled(ctx.payload),
+        workers=classify_workers(ctx.payload, len(image_paths)),
+    )
 
     if not template:
         template = "_".join(f"[{key}]" for key in order)
 
-    reserved = {Path(path).name.lower() for path in image_paths}
+    # 폴더별 이름 색인: 원래 이름은 scandir로, 새로 붙인 이름은 배정할 때 더한다.
+    name_indexes = FolderNameIndexes()
 
-    cancelled = False
+    completed = False
     try:
         for path in image_paths:
-            if path in resume_done:
+            if path in checkpoint:
                 skipped += 1
                 processed += 1
                 if processed % progress_step == 0 or processed == total:
@@ -95,13 +104,10 @@ def handle_rename(ctx: JobContext, conn) -> None:
                     )
                 continue
             if ctx.is_cancelled():
-                cancelled = True
                 ctx.emit({"id": ctx.job_id, "type": "done", "cancelled": True})
                 return
             try:
-                tags = load_tags(conn, path, include_negative)
-                logger.debug(f"[rename] {path}: {len(tags)} tags loaded")
-                matches = match_variable_specs(variable_specs, tags)
+                matches = classifier.match(path)
                 logger.debug(f"[rename] {path}: matches={matches}")
             except Exception as exc:
                 logger.exception(f"[rename] Error processing {path}: {exc}")
@@ -116,11 +122,7 @@ def handle_rename(ctx: JobContext, conn) -> None:
                         "message": str(exc),
                     }
                 )
-                if resume_file:
-                    resume_file.write(f"{path}\n")
-                    resume_written += 1
-                    if resume_written % checkpoint_step == 0:
-                        resume_file.flush()
+                checkpoint.mark(path)
                 if processed % progress_step == 0 or processed == total:
                     ctx.emit(
                         {
@@ -161,11 +163,7 @@ def handle_rename(ctx: JobContext, conn) -> None:
                         "preview": preview,
                     }
                 )
-                if resume_file:
-                    resume_file.write(f"{path}\n")
-                    resume_written += 1
-                    if resume_written % checkpoint_step == 0:
-                        resume_file.flush()
+                checkpoint.mark(path)
                 if processed % progress_step == 0 or processed == total:
                     ctx.emit(
                         {
@@ -195,7 +193,7 @@ def handle_rename(ctx: JobContext, conn) -> None:
             if candidate.lower() == current_name.lower():
                 new_name = current_name
             else:
-                new_name = ensure_unique_name(Path(path).parent, base_name, ext, reserved)
+                new_name = name_indexes[str(Path(path).parent)].allocate(base_name, ext)
             target = str(Path(path).with_name(new_name))
 
             if not dry_run and target != path:
@@ -213,11 +211,7 @@ def handle_rename(ctx: JobContext, conn) -> None:
                             "message": str(exc),
                         }
                     )
-                    if resume_file:
-                        resume_file.write(f"{path}\n")
-                        resume_written += 1
-                        if resume_written % checkpoint_step == 0:
-                            resume_file.flush()
+                    checkpoint.mark(path)
                     if processed % progress_step == 0 or processed == total:
                         ctx.emit(
                             {
@@ -245,12 +239,7 @@ def handle_rename(ctx: JobContext, conn) -> None:
                     "preview": preview,
                 }
             )
-            if resume_file:
-                final_path = path if dry_run else target
-                resume_file.write(f"{final_path}\n")
-                resume_written += 1
-                if resume_written % checkpoint_step == 0:
-                    resume_file.flush()
+            checkpoint.mark(path if dry_run else target)
             if processed % progress_step == 0 or processed == total:
                 ctx.emit(
                     {
@@ -262,13 +251,16 @@ def handle_rename(ctx: JobContext, conn) -> None:
                         "skipped": skipped,
                     }
                 )
+        completed = True
     finally:
-        if resume_file:
-            resume_file.flush()
-            resume_file.close()
-        if not cancelled:
-            resume_file_path.unlink(missing_ok=True)
+        classifier.close()
+        # 끝까지 처리했으면 체크포인트 삭제, 취소/예외면 지금까지 완료 항목을 남긴다.
+        if completed:
+            checkpoint.clear()
+        else:
+            checkpoint.flush()
 
+    ctx.emit({"id": ctx.job_id, "type": "log", "message": classifier.summary()})
     ctx.emit(
         {
             "id": ctx.job_id,
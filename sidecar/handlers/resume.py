@@ -1,26 +1,48 @@
 from pathlib import Path
 
+from core.db.storage import delete_job_checkpoint, delete_scan_checkpoint
+
 from ..job_manager import JobContext
+from .checkpoint import LEGACY_RESUME_FILES, legacy_resume_file
+from .scan import scan_checkpoint_key
 
 
-def handle_resume_clear(ctx: JobContext, _conn) -> None:
+def handle_resume_clear(ctx: JobContext, conn) -> None:
     folder = ctx.payload.get("folder")
     kind = ctx.payload.get("kind") or "rename"
     path = ctx.payload.get("path")
 
-    if path:
-        target = Path(str(path))
-    else:
+    if kind == "scan":
         if not folder:
             ctx.error(ctx.job_id, "folder is required")
             return
-        suffix = ".nai_resume_move.txt" if kind == "move" else ".nai_resume_rename.txt"
-        target = Path(str(folder)) / suffix
+        key = scan_checkpoint_key(folder)
+        removed = delete_scan_checkpoint(conn, key)
+        conn.commit()
+        ctx.emit(
+            {
+                "id": ctx.job_id,
+                "type": "done",
+                "payload": {"path": key, "removed": removed},
+            }
+        )
+        return
+
+    if kind not in LEGACY_RESUME_FILES:
+        ctx.error(ctx.job_id, f"unknown kind: {kind}")
+        return
+    if not path and not folder:
+        ctx.error(ctx.job_id, "folder is required")
+        return
 
-    removed = False
-    if target.exists():
+    # rename/move 체크포인트는 DB(job_checkpoints). 예전 체크포인트 파일이 남아 있으면 같이 지운다.
+    key = scan_checkpoint_key(path or folder)
+    removed = delete_job_checkpoint(conn, kind, key)
+    conn.commit()
+    legacy = Path(str(path)) if path else legacy_resume_file(kind, folder)
+    if legacy.is_file():
         try:
-            target.unlink()
+            legacy.unlink()
             removed = True
         except Exception as exc:
             ctx.error(ctx.job_id, f"failed to remove resume file: {exc}")
@@ -30,6 +52,6 @@ def handle_resume_clear(ctx: JobContext, _conn) -> None:
         {
             "id": ctx.job_id,
             "type": "done",
-            "payload": {"path": str(target), "removed": removed},
+            "payload": {"path": key, "removed": removed},
         }
     )
@@ -1,12 +1,38 @@
 import multiprocessing as mp
 import os
 
-from core.db.query import get_image_meta
-from core.db.storage import replace_payloads, replace_tags, upsert_image
-from core.utils import iter_image_files
+from core.db.query import (
+    get_image_meta,
+    get_scan_checkpoint_id,
+    get_scan_dir_state,
+    load_scan_checkpoint,
+)
+from core.db.storage import (
+    delete_scan_checkpoint,
+    mark_checkpoint_dir,
+    mark_checkpoint_file,
+    replace_payloads,
+    replace_tags,
+    start_scan_checkpoint,
+    upsert_image,
+    upsert_scan_dir,
+)
+from core.utils import iter_image_dirs
 
 from ..job_manager import JobContext
 from ..scan import extract_task
+from .thumbs import apply_thumb_policy, thumb_options
+
+
+def _dir_mtime_ns(path: str) -> int | None:
+    try:
+        return int(os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+
+
+def scan_checkpoint_key(folder: str) -> str:
+    return os.path.normcase(os.path.abspath(str(folder)))
 
 
 def handle_scan(ctx: JobContext, conn) -> None:
@@ -15,47 +41,114 @@ def handle_scan(ctx: JobContext, conn) -> None:
     progress_step = max(1, int(ctx.payload.get("progress_step") or 200))
     commit_step = max(1, int(ctx.payload.get("commit_step") or 200))
     incremental = bool(ctx.payload.get("incremental", False))
+    # true면 디렉터리 mtime/이미지 수가 지난 스캔과 같을 때 파일 stat 없이 통째로 건너뜀 (기본 끔).
+    # 파일을 제자리에서 덮어쓰면 디렉터리 mtime이 그대로라 바뀐 태그를 놓치므로 직접 켜야 한다.
+    skip_unchanged_dirs = bool(ctx.payload.get("skip_unchanged_dirs", False))
+    resume_mode = bool(ctx.payload.get("resume_mode", ctx.payload.get("resume", False)))
     workers = int(ctx.payload.get("workers") or max(1, (os.cpu_count() or 2) - 1))
     workers = max(1, workers)
+    # thumbs=true면 워커가 태그 추출용으로 디코딩한 이미지로 썸네일도 만든다.
+    thumb = thumb_options(ctx.payload)
 
     if not folder:
         ctx.error(ctx.job_id, "folder is required")
         return
 
-    image_paths = iter_image_files(folder)
-    total = len(image_paths)
+    # 체크포인트: 완료 디렉터리/파일을 이미지 기록과 같은 트랜잭션에 남겨서
+    # 중단 후 resume_mode로 다시 실행하면 남은 부분만 처리한다.
+    checkpoint_folder = scan_checkpoint_key(folder)
+    done_dirs: set[str] = set()
+    done_files: set[str] = set()
+    checkpoint_id = get_scan_checkpoint_id(conn, checkpoint_folder) if resume_mode else None
+    if checkpoint_id is not None:
+        done_dirs, done_files = load_scan_checkpoint(conn, checkpoint_id)
+        checkpoint_id = start_scan_checkpoint(conn, checkpoint_folder, reset=False)
+        ctx.emit(
+            {
+                "id": ctx.job_id,
+                "type": "log",
+                "message": f"scan resume: dirs={len(done_dirs)}, files={len(done_files)}",
+            }
+        )
+    else:
+        checkpoint_id = start_scan_checkpoint(conn, checkpoint_folder, reset=True)
+    conn.commit()
+
+    image_dirs = iter_image_dirs(folder)
+    total = sum(len(files) for _dir, files in image_dirs)
     processed = 0
     errors = 0
-
-    ctx.emit(
-        {
-            "id": ctx.job_id,
-            "type": "progress",
-            "processed": processed,
-            "total": total,
-            "errors": errors,
-        }
-    )
     skipped = 0
     written = 0
+    last_progress = 0
 
-    ctx.emit(
-        {
-            "id": ctx.job_id,
-            "type": "progress",
-            "processed": processed,
-            "total": total,
-            "errors": errors,
-            "skipped": skipped,
-        }
-    )
+    def emit_progress(force: bool = False) -> None:
+        nonlocal last_progress
+        if not force and processed - last_progress < progress_step and processed != total:
+            return
+        last_progress = processed
+        ctx.emit(
+            {
+                "id": ctx.job_id,
+                "type": "progress",
+                "processed": processed,
+                "total": total,
+                "errors": errors,
+                "skipped": skipped,
+            }
+        )
+
+    emit_progress(force=True)
+
+    # 디렉터리 상태는 그 안의 파일이 모두 오류 없이 저장된 뒤에만 기록한다.
+    dir_pending: dict[str, int] = {}
+    dir_state: dict[str, tuple[int, int]] = {}
+    dir_failed: set[str] = set()
+    # 이번 실행에서 오류가 난 디렉터리. 체크포인트에 통째로 완료 표시하지 않고
+    # 성공한 파일만 남겨서, 재개하면 오류 파일(잠김/권한 등)을 다시 시도한다.
+    dir_errors: set[str] = set()
+    task_dirs: dict[str, str] = {}
+    tasks: list[tuple[str, bool, int | None, int | None, dict | None]] = []
 
-    tasks: list[tuple[str, bool, int | None, int | None]] = []
-    if incremental:
-        for path in image_paths:
-            if ctx.is_cancelled():
-                ctx.emit({"id": ctx.job_id, "type": "done", "cancelled": True})
-                return
+    for dir_path, files in image_dirs:
+        if ctx.is_cancelled():
+            conn.commit()
+            ctx.emit({"id": ctx.job_id, "type": "done", "cancelled": True})
+            return
+        if dir_path in done_dirs:
+            skipped += len(files)
+            processed += len(files)
+            emit_progress()
+            continue
+        dir_mtime = _dir_mtime_ns(dir_path)
+        if dir_mtime is not None:
+            dir_state[dir_path] = (dir_mtime, len(files))
+        if (
+            incremental
+            and skip_unchanged_dirs
+            and dir_mtime is not None
+            and get_scan_dir_state(conn, dir_path) == (dir_mtime, len(files))
+        ):
+            skipped += len(files)
+            processed += len(files)
+            mark_checkpoint_dir(conn, checkpoint_id, dir_path)
+            emit_progress()
+            continue
+
+        dir_tasks = 0
+        for path in files:
+            if path in done_files:
+                # 이전 실행에서의 오류 여부를 알 수 없으니 디렉터리 상태는 남기지 않는다.
+                dir_failed.add(dir_path)
+                skipped += 1
+                processed += 1
+                emit_progress()
+                continue
+            if not incremental:
+                tasks.append((path, include_negative, None, None, thumb))
+                task_dirs[path] = dir_path
+                dir_tasks += 1
+                continue
             try:
                 stat = os.stat(path)
                 mtime = int(stat.st_mtime)
@@ -64,22 +157,17 @@ def handle_scan(ctx: JobContext, conn) -> None:
                 if meta and meta == (mtime, size):
                     skipped += 1
                     processed += 1
-                    if processed % progress_step == 0 or processed == total:
-                        ctx.emit(
-                            {
-                                "id": ctx.job_id,
-                                "type": "progress",
-                                "processed": processed,
-                                "total": total,
-                                "errors": errors,
-                                "skipped": skipped,
-                            }
-                        )
+                    mark_checkpoint_file(conn, checkpoint_id, dir_path, path)
+                    emit_progress()
                     continue
-                tasks.append((path, include_negative, mtime, size))
+                tasks.append((path, include_negative, mtime, size, thumb))
+                task_dirs[path] = dir_path
+                dir_tasks += 1
             except Exception as exc:
                 errors += 1
                 processed += 1
+                dir_failed.add(dir_path)
+                dir_errors.add(dir_path)
                 ctx.emit(
                     {
                         "id": ctx.job_id,
@@ -89,19 +177,16 @@ def handle_scan(ctx: JobContext, conn) -> None:
                         "message": str(exc),
                     }
                 )
-                if processed % progress_step == 0 or processed == total:
-                    ctx.emit(
-                        {
-                            "id": ctx.job_id,
-                            "type": "progress",
-                            "processed": processed,
-                            "total": total,
-                            "errors": errors,
-                            "skipped": skipped,
-                        }
-                    )
-    else:
-        tasks = [(path, include_negative, None, None) for path in image_paths]
+                emit_progress()
+
+        if dir_tasks:
+            dir_pending[dir_path] = dir_tasks
+            continue
+        if dir_path not in dir_errors:
+            mark_checkpoint_dir(conn, checkpoint_id, dir_path)
+        if dir_path not in dir_failed and dir_path in dir_state:
+            upsert_scan_dir(conn, dir_path, *dir_state[dir_path])
+    conn.commit()
 
     if tasks:
         ctx_obj = mp.get_context("spawn")
@@ -123,11 +208,16 @@ def handle_scan(ctx: JobContext, conn) -> None:
                 if ctx.is_cancelled():
                     pool.terminate()
                     pool.join()
+                    conn.commit()
                     ctx.emit({"id": ctx.job_id, "type": "done", "cancelled": True})
                     return
+                dir_path = task_dirs.pop(path, None)
                 if error:
                     errors += 1
                     processed += 1
+                    if dir_path is not None:
+                        dir_failed.add(dir_path)
+                        dir_errors.add(dir_path)
                     ctx.emit(
                         {
                             "id": ctx.job_id,
@@ -154,18 +244,24 @@ def handle_scan(ctx: JobContext, conn) -> None:
                     processed += 1
                     if written % commit_step == 0:
                         conn.commit()
-                if processed % progress_step == 0 or processed == total:
-                    ctx.emit(
-                        {
-                            "id": ctx.job_id,
-                            "type": "progress",
-                            "processed": processed,
-                            "total": total,
-                            "errors": errors,
-                            "skipped": skipped,
-                        }
-                    )
+                if dir_path is not None:
+                    dir_pending[dir_path] -= 1
+                    dir_done = dir_pending[dir_path] == 0
+                    if dir_done:
+                        del dir_pending[dir_path]
+                    if dir_done and dir_path not in dir_errors:
+                        mark_checkpoint_dir(conn, checkpoint_id, dir_path)
+                        if dir_path not in dir_failed and dir_path in dir_state:
+                            upsert_scan_dir(conn, dir_path, *dir_state[dir_path])
+                    elif not error:
+                        mark_checkpoint_file(conn, checkpoint_id, dir_path, path)
+                emit_progress()
+            # with 블록을 나갈 때의 terminate()로는 워커의 atexit이 돌지 않는다.
+            # 정상 종료시켜야 워커가 쓰던 썸네일 팩을 봉인한다.
+            pool.close()
+            pool.join()
 
+    delete_scan_checkpoint(conn, checkpoint_folder)
     conn.commit()
     ctx.emit(
         {
@@ -176,3 +272,4 @@ def handle_scan(ctx: JobContext, conn) -> None:
             "skipped": skipped,
         }
     )
+    apply_thumb_policy(ctx.payload)
@@ -1,7 +1,7 @@
 import os
 from pathlib import Path
 
-from core.cache import ensure_thumbnail, prune_cache, resolve_cache_dir
+from core.cache import cache_policy_from_env, ensure_thumbnail, prune_cache, resolve_cache_dir
 
 
 def _parse_int(value: object) -> int | None:
@@ -21,18 +21,30 @@ def _thumbs_enabled(payload: dict) -> bool:
     return bool(payload.get("thumbs", False))
 
 
-def ensure_preview(payload: dict, path: str) -> str | None:
+def thumb_options(payload: dict) -> dict | None:
+    """썸네일 설정(cache_dir/size/quality). 스캔 워커 프로세스로 넘길 수 있는 dict."""
     if not _thumbs_enabled(payload):
         return None
 
-    cache_dir = payload.get("thumb_cache_dir") or os.environ.get("NAI_CACHE_DIR")
+    # 경로 미지정 시 core.cache가 NAI_THUMB_DIR/NAI_CACHE_DIR/기본 경로 순으로 결정
+    cache_dir = payload.get("thumb_cache_dir")
     size = _parse_int(payload.get("thumb_size")) or _env_int("NAI_CACHE_THUMB_SIZE") or 256
     quality = (
         _parse_int(payload.get("thumb_quality"))
         or _env_int("NAI_CACHE_THUMB_QUALITY")
         or 85
     )
-    result = ensure_thumbnail(path, cache_dir, size=size, quality=quality)
+    return {"cache_dir": cache_dir, "size": size, "quality": quality}
+
+
+def ensure_preview(payload: dict, path: str) -> str | None:
+    options = thumb_options(payload)
+    if options is None:
+        return None
+
+    result = ensure_thumbnail(
+        path, options["cache_dir"], size=options["size"], quality=options["quality"]
+    )
     return str(result) if result else None
 
 
@@ -40,12 +52,15 @@ def apply_thumb_policy(payload: dict) -> int:
     if not _thumbs_enabled(payload):
         return 0
 
-    max_files = _parse_int(payload.get("thumb_max_files")) or _env_int("NAI_CACHE_MAX_FILES")
-    max_bytes = _parse_int(payload.get("thumb_max_bytes")) or _env_int("NAI_CACHE_MAX_BYTES")
-    if max_files is None and max_bytes is None:
-        return 0
+    env_files, env_bytes = cache_policy_from_env()
+    max_files = _parse_int(payload.get("thumb_max_files"))
+    max_bytes = _parse_int(payload.get("thumb_max_bytes"))
+    if max_files is None:
+        max_files = env_files
+    if max_bytes is None:
+        max_bytes = env_bytes
 
-    cache_dir = payload.get("thumb_cache_dir") or os.environ.get("NAI_CACHE_DIR")
+    cache_dir = payload.get("thumb_cache_dir")
     if cache_dir:
         resolve_cache_dir(Path(str(cache_dir)))
     return prune_cache(cache_dir, max_files=max_files, max_bytes=max_bytes)
@@ -2,6 +2,8 @@ from .handlers import (
     handle_build_nais,
     handle_db_stats,
     handle_move,
+    handle_plan,
+    handle_apply,
     handle_preset_import,
     handle_preset_load,
     handle_preset_save,
@@ -24,6 +26,8 @@ __all__ = [
     "handle_build_nais",
     "handle_db_stats",
     "handle_move",
+    "handle_plan",
+    "handle_apply",
     "handle_preset_import",
     "handle_preset_load",
     "handle_preset_save",
@@ -16,6 +16,8 @@ from sidecar.jobs import (
     handle_build_nais,
     handle_db_stats,
     handle_move,
+    handle_plan,
+    handle_apply,
     handle_rename,
     handle_resume_clear,
     handle_scan,
@@ -53,6 +55,8 @@ def main() -> None:
         "rename": handle_rename,
         "resume_clear": handle_resume_clear,
         "move": handle_move,
+        "plan": handle_plan,
+        "apply": handle_apply,
         "strip_suffix": handle_strip_suffix,
         "build_nais": handle_build_nais,
         "preset_load": handle_preset_load,
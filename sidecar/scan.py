@@ -2,6 +2,9 @@ from __future__ import annotations
 
 import os
 
+from PIL import Image
+
+from core.cache import ensure_thumbnail
 from core.extract import extract_payloads_from_image
 from core.normalize.novelai import normalize_novelai_payload
 
@@ -17,7 +20,32 @@ def _dedupe(items: list[str]) -> list[str]:
     return result
 
 
-def extract_task(args: tuple[str, bool, int | None, int | None]) -> tuple[
+def _decode_and_extract(path: str, thumb: dict | None) -> list[dict]:
+    """이미지를 한 번만 디코딩해서 스텔스/EXIF 추출과 썸네일 생성에 함께 사용."""
+    if thumb is None:
+        return extract_payloads_from_image(path)
+    try:
+        img = Image.open(path)
+        img.load()
+    except Exception:
+        return extract_payloads_from_image(path)
+    with img:
+        payloads = extract_payloads_from_image(path, image=img)
+        try:
+            ensure_thumbnail(
+                path,
+                thumb.get("cache_dir"),
+                size=thumb.get("size") or 256,
+                quality=thumb.get("quality") or 85,
+                image=img,
+            )
+        except Exception:
+            # 썸네일 실패는 태그 추출 결과에 영향을 주지 않는다.
+            pass
+    return payloads
+
+
+def extract_task(args: tuple[str, bool, int | None, int | None, dict | None]) -> tuple[
     str,
     int | None,
     int | None,
@@ -28,13 +56,13 @@ def extract_task(args: tuple[str, bool, int | None, int | None]) -> tuple[
     list[tuple[str, str | None, int | None]] | None,
     str | None,
 ]:
-    path, include_negative, mtime, size = args
+    path, include_negative, mtime, size, thumb = args
     try:
         if mtime is None or size is None:
             stat = os.stat(path)
             mtime = int(stat.st_mtime)
             size = int(stat.st_size)
-        payloads = extract_payloads_from_image(path)
+        payloads = _decode_and_extract(path, thumb)
 
         pos_tags: list[str] = []
         neg_tags: list[str] = []
@@ -0,0 +1,86 @@
+"""핸들러 테스트 공용 도우미: 변수 정의, 이미지/태그 DB 준비, JobContext 메시지 수집."""
+
+from tests import _bootstrap  # noqa: F401
+
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Callable
+
+from PIL import Image, PngImagePlugin
+
+from core.db.schema import ensure_schema
+from core.db.storage import replace_tags, upsert_image
+from sidecar.job_manager import JobContext
+
+
+VARIABLES = [
+    {"name": "char", "values": [{"name": "alice", "tags": ["alice"]}, {"name": "bob", "tags": ["bob"]}]},
+]
+
+
+def write_image(path: Path, prompt: str | None = None) -> Path:
+    """4x4 PNG. prompt를 주면 NAI Comment 메타데이터로 넣는다."""
+    info = None
+    if prompt is not None:
+        info = PngImagePlugin.PngInfo()
+        info.add_text("Comment", json.dumps({"prompt": prompt}))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", (4, 4)).save(path, pnginfo=info)
+    return path
+
+
+def seed_images(conn: sqlite3.Connection, folder: Path, tags_by_name: dict[str, list[str]]) -> list[Path]:
+    """이미지 파일을 만들고 태그를 DB에 기록 (스캔을 거친 상태)."""
+    paths: list[Path] = []
+    for name, tags in tags_by_name.items():
+        path = write_image(folder / name)
+        image_id = upsert_image(conn, str(path), 1, 1, None, tags_pos=tags, tags_neg=[], tags_char=[])
+        replace_tags(conn, image_id, [(tag, "pos", None) for tag in tags])
+        paths.append(path)
+    conn.commit()
+    return paths
+
+
+def make_context(
+    payload: dict,
+    *,
+    is_cancelled: Callable[[], bool] | None = None,
+) -> tuple[JobContext, list[dict]]:
+    """emit/error 메시지를 모으는 JobContext."""
+    messages: list[dict] = []
+    ctx = JobContext(
+        job_id="j",
+        payload=payload,
+        emit=messages.append,
+        error=lambda _job_id, message: messages.append({"type": "error", "message": message}),
+        is_cancelled=is_cancelled or (lambda: False),
+        clear_cancel=lambda: None,
+    )
+    return ctx, messages
+
+
+def run_handler(handler, conn: sqlite3.Connection, payload: dict, **kwargs) -> list[dict]:
+    ctx, messages = make_context(payload, **kwargs)
+    handler(ctx, conn)
+    return messages
+
+
+def of_type(messages: list[dict], kind: str) -> list[dict]:
+    return [msg for msg in messages if msg.get("type") == kind]
+
+
+class HandlerTestCase(unittest.TestCase):
+    """임시 폴더(self.root)와 스키마가 적용된 메모리 DB(self.conn)."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.conn = sqlite3.connect(":memory:")
+        ensure_schema(self.conn)
+
+    def tearDown(self) -> None:
+        self.conn.close()
+        self._tmp.cleanup()
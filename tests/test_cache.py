@@ -0,0 +1,256 @@
+from tests import _bootstrap  # noqa: F401
+
+import io
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from core.cache import pack as pack_module
+from core.cache import thumbs as thumbs_module
+from core.cache import (
+    ThumbPack,
+    cache_stats,
+    close_packs,
+    ensure_thumbnail,
+    has_thumbnail,
+    load_thumbnail,
+    prune_cache,
+    render_thumbnail,
+    thumbnail_key,
+)
+
+
+class ThumbCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.cache_dir = self.root / "cache"
+
+    def tearDown(self) -> None:
+        close_packs()
+        self._tmp.cleanup()
+
+    def _image(self, name: str, size=(640, 480), color=(200, 10, 10)) -> Path:
+        path = self.root / name
+        Image.new("RGB", size, color).save(path)
+        return path
+
+    def _decode(self, data) -> Image.Image:
+        img = Image.open(io.BytesIO(bytes(data)))
+        img.load()
+        return img
+
+    def test_load_thumbnail_returns_bounded_jpeg(self) -> None:
+        src = self._image("a.png")
+        self.assertFalse(has_thumbnail(src, self.cache_dir, 64))
+        data = load_thumbnail(src, self.cache_dir, size=64)
+        self.assertIsNotNone(data)
+        img = self._decode(data)
+        self.assertEqual(img.format, "JPEG")
+        self.assertEqual(img.size, (64, 48))
+        self.assertTrue(has_thumbnail(src, self.cache_dir, 64))
+        self.assertEqual(ensure_thumbnail(src, self.cache_dir, size=64), thumbnail_key(src, 64))
+        self.assertEqual(cache_stats(self.cache_dir)[0], 1)
+
+    def test_jpeg_draft_path(self) -> None:
+        src = self._image("a.jpg", size=(2048, 1024))
+        img = self._decode(load_thumbnail(src, self.cache_dir, size=128))
+        self.assertEqual(img.size, (128, 64))
+
+    def test_key_is_content_addressed(self) -> None:
+        first = self._image("a.png")
+        second = self.root / "moved.png"
+        second.write_bytes(first.read_bytes())
+        self.assertEqual(thumbnail_key(first), thumbnail_key(second))
+        other = self._image("b.png", color=(0, 0, 255))
+        self.assertNotEqual(thumbnail_key(first), thumbnail_key(other))
+        self.assertNotEqual(thumbnail_key(first, 64), thumbnail_key(first, 128))
+
+    def test_key_covers_whole_file(self) -> None:
+        # 크기와 앞 64KiB가 같고 뒷부분만 다른 두 파일
+        head = bytes(range(256)) * 256
+        first = self.root / "first.bin"
+        second = self.root / "second.bin"
+        first.write_bytes(head + b"a" * 1000)
+        second.write_bytes(head + b"b" * 1000)
+        self.assertNotEqual(thumbnail_key(first), thumbnail_key(second))
+
+        # 제자리 편집(크기 같음, mtime 변경)도 새 키
+        before = thumbnail_key(first)
+        first.write_bytes(head + b"c" * 1000)
+        stat = first.stat()
+        os.utime(first, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertNotEqual(thumbnail_key(first), before)
+
+    def test_key_reads_bounded_sample_of_large_file(self) -> None:
+        big = self.root / "big.bin"
+        body = os.urandom(4 * 1024 * 1024)
+        big.write_bytes(body)
+        reads: list[int] = []
+        real_open = open
+
+        def counting_open(*args, **kwargs):
+            handle = real_open(*args, **kwargs)
+            real_read = handle.read
+
+            def read(*read_args):
+                data = real_read(*read_args)
+                reads.append(len(data))
+                return data
+
+            handle.read = read
+            return handle
+
+        with mock.patch.object(thumbs_module, "open", counting_open, create=True):
+            key = thumbnail_key(big)
+        self.assertLessEqual(sum(reads), 512 * 1024)
+        # 끝부분만 바뀌어도 (크기 같음) 새 키
+        big.write_bytes(body[:-1] + bytes([body[-1] ^ 1]))
+        stat = big.stat()
+        os.utime(big, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertNotEqual(thumbnail_key(big), key)
+
+    def test_render_does_not_modify_shared_image(self) -> None:
+        img = Image.new("RGBA", (1024, 512))
+        thumb = render_thumbnail(img, 100)
+        self.assertEqual(img.size, (1024, 512))
+        self.assertEqual(thumb.size, (100, 50))
+        self.assertEqual(thumb.mode, "RGB")
+
+    def test_missing_source_returns_none(self) -> None:
+        self.assertIsNone(ensure_thumbnail(self.root / "missing.png", self.cache_dir))
+        self.assertIsNone(load_thumbnail(self.root / "missing.png", self.cache_dir))
+
+    def test_prune_cache_limits_count(self) -> None:
+        for idx in range(4):
+            src = self._image(f"{idx}.png", color=(idx * 40, 0, 0))
+            ensure_thumbnail(src, self.cache_dir, size=32)
+        self.assertEqual(prune_cache(self.cache_dir, max_files=2), 2)
+        self.assertEqual(cache_stats(self.cache_dir)[0], 2)
+
+
+class ThumbPackTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.pack = ThumbPack(self.root)
+
+    def tearDown(self) -> None:
+        self.pack.close()
+        self._tmp.cleanup()
+
+    def _pack_files(self) -> list[Path]:
+        return sorted((self.root / "packs").glob("pack-*.dat"))
+
+    def test_put_get_roundtrip(self) -> None:
+        self.pack.put("a", b"alpha")
+        self.pack.put("b", b"beta")
+        self.assertEqual(bytes(self.pack.get("a")), b"alpha")
+        self.assertEqual(bytes(self.pack.get("b")), b"beta")
+        self.assertIsNone(self.pack.get("missing"))
+        self.assertEqual(self.pack.stats(), (2, 9))
+        self.assertEqual(len(self._pack_files()), 1)
+
+    def test_reopen_reads_existing_entries(self) -> None:
+        self.pack.put("a", b"alpha")
+        self.pack.close()
+        self.pack = ThumbPack(self.root)
+        self.assertEqual(bytes(self.pack.get("a")), b"alpha")
+
+    def test_overwrite_replaces_entry(self) -> None:
+        self.pack.put("a", b"old")
+        self.pack.put("a", b"newer")
+        self.assertEqual(bytes(self.pack.get("a")), b"newer")
+        self.assertEqual(self.pack.stats(), (1, 5))
+
+    def test_prune_drops_least_recently_used(self) -> None:
+        for key in ("a", "b", "c"):
+            self.pack.put(key, key.encode() * 10)
+        self.pack.get("a")
+        self.assertEqual(self.pack.prune(max_files=2), 1)
+        self.assertIsNone(self.pack.get("b"))
+        self.assertIsNotNone(self.pack.get("a"))
+        self.assertEqual(self.pack.prune(max_bytes=10), 1)
+        self.assertEqual(self.pack.stats()[0], 1)
+
+    def test_totals_follow_index_changes(self) -> None:
+        self.pack.put("a", b"x" * 10)
+        self.pack.put("b", b"y" * 20)
+        self.pack.put("a", b"z" * 5)
+        self.assertEqual(self.pack.stats(), (2, 25))
+        self.pack.prune(max_files=1)
+        self.assertEqual(self.pack.stats()[0], 1)
+        self.pack.close()
+        self.pack = ThumbPack(self.root)
+        count, total = self.pack.stats()
+        self.assertEqual(count, 1)
+        self.assertIn(total, (5, 20))
+
+    def test_access_times_are_batched(self) -> None:
+        self.pack.put("a", b"alpha")
+        before = self.pack._conn.execute(
+            "SELECT last_access FROM thumbs WHERE key = 'a'"
+        ).fetchone()[0]
+        time.sleep(0.01)
+        self.pack.get("a")
+        stored = self.pack._conn.execute(
+            "SELECT last_access FROM thumbs WHERE key = 'a'"
+        ).fetchone()[0]
+        self.assertEqual(stored, before)
+        self.pack.flush()
+        stored = self.pack._conn.execute(
+            "SELECT last_access FROM thumbs WHERE key = 'a'"
+        ).fetchone()[0]
+        self.assertGreater(stored, before)
+
+    def test_compact_moves_live_entries_and_removes_pack(self) -> None:
+        for idx in range(10):
+            self.pack.put(f"k{idx}", bytes([idx]) * 100)
+        self.pack.close()
+        self.pack = ThumbPack(self.root)
+        old_files = self._pack_files()
+        self.pack.prune(max_files=2)
+        reclaimed = self.pack.compact()
+        self.assertEqual(reclaimed, 800)
+        new_files = self._pack_files()
+        self.assertTrue(set(old_files).isdisjoint(new_files))
+        self.assertEqual(sum(p.stat().st_size for p in new_files), 200)
+        self.assertEqual(bytes(self.pack.get("k9")), bytes([9]) * 100)
+        self.assertEqual(bytes(self.pack.get("k8")), bytes([8]) * 100)
+
+    def test_compact_merges_small_sealed_packs(self) -> None:
+        self.pack.close()
+        for idx in range(3):
+            worker = ThumbPack(self.root)
+            worker.put(f"w{idx}", bytes([idx]) * 100)
+            worker.close()
+        self.pack = ThumbPack(self.root)
+        self.assertTrue(self.pack.needs_merge())
+        self.assertEqual(self.pack.compact(), 0)
+        self.assertEqual(len(self._pack_files()), 1)
+        self.assertFalse(self.pack.needs_merge())
+        for idx in range(3):
+            self.assertEqual(bytes(self.pack.get(f"w{idx}")), bytes([idx]) * 100)
+
+    def test_orphan_scan_keeps_pack_created_concurrently(self) -> None:
+        other = ThumbPack(self.root)
+        real_scandir = os.scandir
+
+        def scandir_after_other_writes(path):
+            # 다른 프로세스가 packs 행을 커밋하고 파일을 만든 직후에 디렉터리를 읽는 상황.
+            other.put("new", b"fresh")
+            return real_scandir(path)
+
+        with mock.patch.object(pack_module.os, "scandir", scandir_after_other_writes):
+            self.pack.compact()
+        self.assertEqual(bytes(other.get("new")), b"fresh")
+        other.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+from tests import _bootstrap  # noqa: F401
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.db.schema import ensure_schema
+from sidecar.handlers.checkpoint import JobCheckpoint
+from sidecar.handlers.resume import handle_resume_clear
+from tests._fixtures import make_context
+
+
+class JobCheckpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.folder = self._tmp.name
+        self.conn = sqlite3.connect(":memory:")
+        ensure_schema(self.conn)
+
+    def tearDown(self) -> None:
+        self.conn.close()
+        self._tmp.cleanup()
+
+    def test_resume_sees_flushed_items(self) -> None:
+        checkpoint = JobCheckpoint(self.conn, "rename", self.folder, resume=False, step=2)
+        self.assertNotIn("a.png", checkpoint)
+        checkpoint.mark("a.png")
+        checkpoint.mark("b.png")
+        checkpoint.mark("c.png")
+        checkpoint.flush()
+
+        resumed = JobCheckpoint(self.conn, "rename", self.folder, resume=True)
+        self.assertIn("a.png", resumed)
+        self.assertIn("c.png", resumed)
+        self.assertNotIn("d.png", resumed)
+        # 다른 종류(move)와는 섞이지 않는다.
+        self.assertNotIn("a.png", JobCheckpoint(self.conn, "move", self.folder, resume=True))
+
+        fresh = JobCheckpoint(self.conn, "rename", self.folder, resume=False)
+        self.assertNotIn("a.png", fresh)
+
+    def test_legacy_file_is_imported_once(self) -> None:
+        legacy = Path(self.folder) / ".nai_resume_move.txt"
+        legacy.write_text("x.png\n\ny.png\n", encoding="utf-8")
+        checkpoint = JobCheckpoint(self.conn, "move", self.folder, resume=True)
+        self.assertIn("x.png", checkpoint)
+        self.assertIn("y.png", checkpoint)
+        self.assertFalse(legacy.exists())
+
+    def test_explicit_resume_file_is_kept_after_import(self) -> None:
+        own = Path(self.folder) / "my_resume.txt"
+        own.write_text("x.png\n", encoding="utf-8")
+        checkpoint = JobCheckpoint(self.conn, "rename", self.folder, resume=True, key=str(own))
+        self.assertIn("x.png", checkpoint)
+        self.assertFalse(own.exists())
+        self.assertEqual((Path(self.folder) / "my_resume.txt.imported").read_text(encoding="utf-8"), "x.png\n")
+
+    def test_resume_clear_removes_checkpoint(self) -> None:
+        checkpoint = JobCheckpoint(self.conn, "rename", self.folder, resume=False)
+        checkpoint.mark("a.png")
+        checkpoint.flush()
+
+        ctx, messages = make_context({"folder": self.folder, "kind": "rename"})
+        handle_resume_clear(ctx, self.conn)
+        self.assertTrue(messages[0]["payload"]["removed"])
+        self.assertNotIn("a.png", JobCheckpoint(self.conn, "rename", self.folder, resume=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+from tests import _bootstrap  # noqa: F401
+
+import sqlite3
+import unittest
+from unittest import mock
+
+from core.db.schema import ensure_schema
+from core.runner import build_variable_specs, classify_workers
+from sidecar.handlers import classify, common
+from sidecar.handlers.classify import (
+    MIN_PARALLEL,
+    ImageClassifier,
+    match_cache_enabled,
+)
+from tests._fixtures import VARIABLES, HandlerTestCase, seed_images, write_image
+
+
+class ParallelClassifyTests(HandlerTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.paths: list[str] = []
+        for idx in range(MIN_PARALLEL + 6):
+            prompt = ["alice", "bob", "alice, bob", "smile"][idx % 4]
+            self.paths.append(str(write_image(self.root / f"{idx:03d}.png", prompt)))
+        broken = self.root / "broken.png"
+        broken.write_bytes(b"not an image")
+        self.paths.insert(10, str(broken))
+
+    def _classify(self, workers: int) -> tuple[list, int]:
+        classifier = ImageClassifier(
+            self.conn,
+            self.paths,
+            build_variable_specs(VARIABLES),
+            include_negative=False,
+            chunk=MIN_PARALLEL,
+            workers=workers,
+        )
+        results = []
+        try:
+            for path in self.paths:
+                try:
+                    results.append(classifier.match(path))
+                except Exception:
+                    results.append("error")
+        finally:
+            classifier.close()
+        return results, classifier.parallel_images
+
+    def test_workers_match_sequential_results(self) -> None:
+        sequential, parallel_images = self._classify(1)
+        self.assertEqual(parallel_images, 0)
+        self.assertEqual(sequential[0]["char"], {"status": "OK", "values": ["alice"]})
+        results, parallel_images = self._classify(2)
+        # 첫 청크(MIN_PARALLEL개)에서 풀이 뜨고, 남은 작은 청크도 워커로 간다.
+        self.assertEqual(parallel_images, len(self.paths))
+        self.assertEqual(results, sequential)
+
+    def test_workers_read_db_tags_and_save_matches(self) -> None:
+        # 파일 DB면 DB 이미지도 워커가 각자 연결로 태그를 읽어 분류한다.
+        self.conn.close()
+        self.conn = sqlite3.connect(str(self.root / "tags.sqlite"))
+        ensure_schema(self.conn)
+        names = {f"{idx:03d}.png": ["bob"] for idx in range(MIN_PARALLEL)}
+        paths = [str(path) for path in seed_images(self.conn, self.root / "db", names)]
+        classifier = ImageClassifier(
+            self.conn,
+            paths,
+            build_variable_specs(VARIABLES),
+            include_negative=False,
+            store=True,
+            workers=2,
+        )
+        try:
+            results = [classifier.match(path)["char"]["values"] for path in paths]
+        finally:
+            classifier.close()
+        self.assertEqual(results, [["bob"]] * len(paths))
+        self.assertEqual(classifier.parallel_images, len(paths))
+        self.assertEqual(classifier.stored_rows, len(paths))
+        self.assertEqual(classifier._targets, {})
+
+
+class ClassifyDefaultsTests(HandlerTestCase):
+    def test_pool_defaults_to_cpu_count_for_large_jobs(self) -> None:
+        with mock.patch("core.runner.worker.os.cpu_count", return_value=8):
+            self.assertEqual(classify_workers({}), 7)
+            self.assertEqual(classify_workers({}, MIN_PARALLEL), 7)
+            self.assertEqual(classify_workers({}, MIN_PARALLEL - 1), 1)
+            self.assertEqual(classify_workers({"classify_workers": 0}, MIN_PARALLEL), 7)
+            self.assertEqual(classify_workers({"classify_workers": 1}, 10_000), 1)
+            self.assertEqual(classify_workers({"classify_workers": 3}, 10), 3)
+
+    def test_match_cache_is_opt_out(self) -> None:
+        self.assertTrue(match_cache_enabled({}))
+        self.assertFalse(match_cache_enabled({"match_cache": False}))
+
+    def test_db_engine_reads_new_files_without_another_lookup(self) -> None:
+        stored = seed_images(self.conn, self.root / "db", {"a.png": ["alice"]})
+        new = write_image(self.root / "new" / "b.png", "bob")
+        paths = [str(stored[0]), str(new)]
+        lookup = mock.Mock(wraps=classify.get_tags_for_path)
+        with mock.patch.object(classify, "get_tags_for_path", lookup), mock.patch.object(
+            common, "get_tags_for_path", lookup
+        ):
+            classifier = ImageClassifier(
+                self.conn, paths, build_variable_specs(VARIABLES), include_negative=False, engine="db"
+            )
+            try:
+                results = [classifier.match(path)["char"]["values"] for path in paths]
+            finally:
+                classifier.close()
+        self.assertEqual(results, [["alice"], ["bob"]])
+        self.assertEqual(classifier.db_classified, 1)
+        lookup.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
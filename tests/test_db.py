@@ -3,6 +3,12 @@ from tests import _bootstrap  # noqa: F401
 import sqlite3
 import unittest
 
+from core.db.classify import (
+    classify_paths_in_db,
+    drop_classify_specs,
+    load_classify_specs,
+    rebase_matches,
+)
 from core.db.query import (
     count_images,
     count_matches,
@@ -11,17 +17,27 @@ from core.db.query import (
     get_tags_for_path,
     get_template,
     get_preset,
+    get_scan_checkpoint_id,
+    get_scan_dir_state,
+    get_stored_matches,
     list_presets,
     list_templates,
+    load_scan_checkpoint,
     search_by_tags,
 )
 from core.db.schema import ensure_schema
 from core.db.storage import (
     delete_preset,
+    delete_scan_checkpoint,
     delete_template,
+    mark_checkpoint_dir,
+    mark_checkpoint_file,
     replace_tags,
+    save_matches,
     save_preset,
+    start_scan_checkpoint,
     upsert_image,
+    upsert_scan_dir,
     upsert_template,
 )
 
@@ -54,6 +70,32 @@ class DbTests(unittest.TestCase):
         self.assertEqual(count_images(self.conn), 1)
         self.assertEqual(get_image_meta(self.conn, "a.png"), (10, 20))
 
+    def test_scan_dir_state_roundtrip(self) -> None:
+        self.assertIsNone(get_scan_dir_state(self.conn, "images/a"))
+        upsert_scan_dir(self.conn, "images/a", 1_000_000_000, 3)
+        self.assertEqual(get_scan_dir_state(self.conn, "images/a"), (1_000_000_000, 3))
+        upsert_scan_dir(self.conn, "images/a", 2_000_000_000, 4)
+        self.assertEqual(get_scan_dir_state(self.conn, "images/a"), (2_000_000_000, 4))
+
+    def test_scan_checkpoint_roundtrip(self) -> None:
+        checkpoint_id = start_scan_checkpoint(self.conn, "images", reset=True)
+        self.assertEqual(get_scan_checkpoint_id(self.conn, "images"), checkpoint_id)
+        mark_checkpoint_file(self.conn, checkpoint_id, "images/a", "images/a/1.png")
+        mark_checkpoint_file(self.conn, checkpoint_id, "images/b", "images/b/1.png")
+        mark_checkpoint_dir(self.conn, checkpoint_id, "images/a")
+        dirs, files = load_scan_checkpoint(self.conn, checkpoint_id)
+        self.assertEqual(dirs, {"images/a"})
+        self.assertEqual(files, {"images/b/1.png"})
+
+        self.assertEqual(start_scan_checkpoint(self.conn, "images", reset=False), checkpoint_id)
+        self.assertEqual(load_scan_checkpoint(self.conn, checkpoint_id)[0], {"images/a"})
+        start_scan_checkpoint(self.conn, "images", reset=True)
+        self.assertEqual(load_scan_checkpoint(self.conn, checkpoint_id), (set(), set()))
+
+        self.assertTrue(delete_scan_checkpoint(self.conn, "images"))
+        self.assertIsNone(get_scan_checkpoint_id(self.conn, "images"))
+        self.assertFalse(delete_scan_checkpoint(self.conn, "images"))
+
     def test_get_tags_fallback_to_table(self) -> None:
         image_id = upsert_image(
             self.conn,
@@ -135,6 +177,77 @@ class DbTests(unittest.TestCase):
         self.assertEqual(fetched["name"], "emo-pack")
         self.assertTrue(delete_preset(self.conn, preset_id))
 
+    def test_classify_paths_in_db(self) -> None:
+        specs = [
+            {
+                "name": "char",
+                "values": [
+                    {"name": "A", "tag_set": {"t1"}},
+                    {"name": "B", "tag_set": {"t1", "t2"}},
+                    {"name": "empty", "tag_set": set()},
+                ],
+            },
+            {"name": "neg", "values": [{"name": "N", "tag_set": {"bad"}}]},
+        ]
+        tags = {
+            "a.png": [("t1", "pos", None), ("t2", "char", 0)],
+            "b.png": [("t1", "pos", None), ("bad", "neg", None)],
+        }
+        for path, rows in tags.items():
+            image_id = upsert_image(
+                self.conn, path, 1, 2, None, tags_pos=[], tags_neg=[], tags_char=[]
+            )
+            replace_tags(self.conn, image_id, rows)
+        upsert_image(self.conn, "no_tags.png", 1, 2, None, tags_pos=[], tags_neg=[], tags_char=[])
+
+        load_classify_specs(self.conn, specs)
+        untagged: set[str] = set()
+        results = classify_paths_in_db(
+            self.conn, ["a.png", "b.png", "no_tags.png", "x.png"], specs, untagged=untagged
+        )
+        self.assertEqual(set(results), {"a.png", "b.png"})
+        self.assertEqual(untagged, {"no_tags.png"})
+        self.assertEqual(results["a.png"]["char"], {"status": "CONFLICT", "values": ["A", "B"]})
+        self.assertEqual(results["b.png"]["char"], {"status": "OK", "values": ["A"]})
+        self.assertEqual(results["b.png"]["neg"]["status"], "UNKNOWN")
+
+        results = classify_paths_in_db(self.conn, ["b.png"], specs, include_negative=True)
+        self.assertEqual(results["b.png"]["neg"], {"status": "OK", "values": ["N"]})
+        drop_classify_specs(self.conn)
+
+
+    def test_stored_matches_roundtrip(self) -> None:
+        image_id = upsert_image(self.conn, "m.png", 1, 2, None, tags_pos=["t1"], tags_neg=[], tags_char=[])
+        self.assertEqual(get_stored_matches(self.conn, ["m.png", "x.png"]), {"m.png": (image_id, 0, {})})
+
+        save_matches(self.conn, [(image_id, "char", "OK", ["A"], "h1", 0)])
+        save_matches(self.conn, [(image_id, "char", "CONFLICT", ["A", "B"], "h2", 0)])
+        stored = get_stored_matches(self.conn, ["m.png"])
+        self.assertEqual(stored["m.png"][2], {"char": ("h2", 0, "CONFLICT", ["A", "B"])})
+        self.assertEqual(count_matches(self.conn), 1)
+
+        # 같은 태그로 다시 스캔하면 버전 유지, 태그가 바뀌면 증가
+        upsert_image(self.conn, "m.png", 3, 2, None, tags_pos=["t1"], tags_neg=[], tags_char=[])
+        self.assertEqual(get_stored_matches(self.conn, ["m.png"])["m.png"][1], 0)
+        upsert_image(self.conn, "m.png", 4, 2, None, tags_pos=["t1", "t2"], tags_neg=[], tags_char=[])
+        self.assertEqual(get_stored_matches(self.conn, ["m.png"])["m.png"][1], 1)
+
+    def test_rebase_matches_skips_affected_images(self) -> None:
+        ids = {}
+        for path, tags in {"a.png": ["smile"], "b.png": ["tears"], "c.png": ["tears"]}.items():
+            ids[path] = upsert_image(self.conn, path, 1, 2, None, tags_pos=tags, tags_neg=[], tags_char=[])
+            replace_tags(self.conn, ids[path], [(tag, "pos", None) for tag in tags])
+            save_matches(self.conn, [(ids[path], "emo", "UNKNOWN", [], "old", 0)])
+        # c.png는 태그가 바뀌어 tag_version이 올라갔다 → 옮기지 않는다.
+        upsert_image(self.conn, "c.png", 1, 2, None, tags_pos=["tears", "x"], tags_neg=[], tags_char=[])
+
+        moved = rebase_matches(self.conn, "emo", "old", "new", [frozenset({"smile"})])
+        self.assertEqual(moved, 1)
+        stored = get_stored_matches(self.conn, ["a.png", "b.png", "c.png"])
+        self.assertEqual(
+            {path: entry[2]["emo"][0] for path, entry in stored.items()},
+            {"a.png": "old", "b.png": "new", "c.png": "old"},
+        )
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,13 @@
 from tests import _bootstrap  # noqa: F401
 
 import json
+import tempfile
 import unittest
+from pathlib import Path
 
-from core.extract import unwrap_comment_payload
+from PIL import Image, PngImagePlugin
+
+from core.extract import extract_payloads_from_image, unwrap_comment_payload
 
 
 class ExtractTests(unittest.TestCase):
@@ -19,6 +23,19 @@ class ExtractTests(unittest.TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0].get("prompt"), "1girl")
 
+    def test_payloads_from_decoded_image(self) -> None:
+        info = PngImagePlugin.PngInfo()
+        info.add_text("Comment", json.dumps({"prompt": "1girl, smile"}))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "a.png")
+            Image.new("RGBA", (16, 16)).save(path, pnginfo=info)
+            expected = extract_payloads_from_image(path)
+            with Image.open(path) as img:
+                img.load()
+                shared = extract_payloads_from_image(path, image=img)
+        self.assertEqual(shared, expected)
+        self.assertEqual(shared[0].get("prompt"), "1girl, smile")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,59 @@
+from tests import _bootstrap  # noqa: F401
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.utils import FileOpExecutor
+
+
+class FileOpExecutorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.src = self.root / "src"
+        self.dst = self.root / "dst"
+        self.src.mkdir()
+        self.dst.mkdir()
+        for idx in range(6):
+            (self.src / f"{idx}.bin").write_bytes(bytes([idx]) * 1000)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _run(self, executor: FileOpExecutor) -> list:
+        results = []
+        executor.submit(str(self.src / "0.bin"), str(self.dst / "0.bin"), 0)
+        executor.submit(str(self.src / "missing.bin"), str(self.dst / "missing.bin"), 1)
+        executor.submit(str(self.src / "1.bin"), None, 2)
+        for idx in range(2, 6):
+            executor.submit(str(self.src / f"{idx}.bin"), str(self.dst / f"{idx}.bin"), idx + 1)
+            results.extend(executor.completed())
+        results.extend(executor.drain())
+        executor.shutdown()
+        return results
+
+    def test_same_device_renames_in_order(self) -> None:
+        executor = FileOpExecutor()
+        results = self._run(executor)
+        self.assertEqual([result.context for result in results], list(range(7)))
+        self.assertIsNotNone(results[1].error)
+        self.assertEqual(executor.renamed, 5)
+        self.assertTrue((self.src / "1.bin").exists())
+        self.assertEqual((self.dst / "5.bin").read_bytes(), bytes([5]) * 1000)
+
+    def test_cross_device_copies_in_order(self) -> None:
+        executor = FileOpExecutor(device_workers=2, max_pending=2)
+        # 대상 폴더를 다른 장치로 보이게 해서 복사 경로를 탄다.
+        real_device = executor._device
+        executor._device = lambda folder: -1 if folder == str(self.dst) else real_device(folder)
+        results = self._run(executor)
+        self.assertEqual([result.context for result in results], list(range(7)))
+        self.assertEqual([result.error is None for result in results], [True, False, True, True, True, True, True])
+        self.assertEqual((executor.copied, executor.renamed), (5, 0))
+        self.assertEqual(sorted(p.name for p in self.dst.iterdir()), ["0.bin", "2.bin", "3.bin", "4.bin", "5.bin"])
+        self.assertEqual(sorted(p.name for p in self.src.iterdir()), ["1.bin"])
+
+
+if __name__ == "__main__":
+    unittest.main()
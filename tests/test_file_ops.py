@@ -0,0 +1,37 @@
+from tests import _bootstrap  # noqa: F401
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.utils import FolderNameIndex, ensure_unique_name
+
+
+class FolderNameIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.folder = Path(self._tmp.name)
+        for name in ["alice.png", "alice@@@1.png", "alice@@@3.png", "bob.png"]:
+            (self.folder / name).write_bytes(b"")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_matches_ensure_unique_name(self) -> None:
+        index = FolderNameIndex(self.folder)
+        reserved: set[str] = set()
+        for base, ext in [("alice", ".png")] * 4 + [("bob", "png"), ("carol", ".png"), ("a/b", ".webp")]:
+            expected = ensure_unique_name(self.folder, base, ext, reserved)
+            self.assertEqual(index.allocate(base, ext), expected)
+        self.assertIn("ALICE@@@5.PNG", index)
+
+    def test_missing_folder_starts_empty(self) -> None:
+        index = FolderNameIndex(self.folder / "new")
+        self.assertEqual(index.allocate("x", ".png"), "x.png")
+        self.assertEqual(index.allocate("x", ".png"), "x@@@1.png")
+        index.add("X@@@2.PNG")
+        self.assertEqual(index.allocate("x", ".png"), "x@@@3.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,20 @@
 from tests import _bootstrap  # noqa: F401
 
+import random
 import unittest
 
 from core.match import classify_tags, match_tag_and
 from core.preset import MatchStatus, Variable, VariableValue
+from core.runner import (
+    BatchClassifier,
+    TagSetCache,
+    build_variable_specs,
+    changed_value_tag_sets,
+    compile_variable_specs,
+    match_variable_specs,
+    variable_spec_hashes,
+    variable_spec_texts,
+)
 
 
 class MatchTests(unittest.TestCase):
@@ -44,5 +55,86 @@ class MatchTests(unittest.TestCase):
         self.assertEqual(result.variables[0].status, MatchStatus.UNKNOWN)
 
 
+class CompiledMatcherTests(unittest.TestCase):
+    def test_matches_reference_implementation(self) -> None:
+        rng = random.Random(7)
+        vocab = [f"tag{idx}" for idx in range(40)]
+        variables = []
+        for var_idx in range(3):
+            values = []
+            for value_idx in range(30):
+                count = rng.randint(0, 3)
+                values.append({"name": f"v{var_idx}_{value_idx}", "tags": rng.sample(vocab, count)})
+            values.append({"name": "dup", "tags": ["tag1"]})
+            values.append({"name": "dup", "tags": ["  tag1 "]})
+            variables.append({"name": f"var{var_idx}", "values": values})
+        specs = build_variable_specs(variables)
+        matcher = compile_variable_specs(specs)
+
+        batch = BatchClassifier(specs)
+        images = [rng.sample(vocab, rng.randint(0, 12)) for _ in range(300)]
+        expected = [match_variable_specs(specs, tags) for tags in images]
+        self.assertEqual([matcher.match(tags) for tags in images], expected)
+        self.assertEqual(batch.match_tag_sets([set(tags) for tags in images]), expected)
+        cache = TagSetCache(matcher)
+        self.assertEqual(cache.match_many(images + images, batch), expected + expected)
+
+    def test_empty_value_tags_never_match(self) -> None:
+        specs = build_variable_specs(
+            [{"name": "Emotion", "values": [{"name": "a", "tags": []}, {"name": "b", "tags": ["x"]}]}]
+        )
+        matches = compile_variable_specs(specs).match(["x", "y"])
+        self.assertEqual(matches["Emotion"], {"status": "OK", "values": ["b"]})
+
+    def test_tag_set_cache_classifies_each_set_once(self) -> None:
+        specs = build_variable_specs([{"name": "Char", "values": [{"name": "a", "tags": ["x"]}]}])
+        cache = TagSetCache(compile_variable_specs(specs))
+        first = cache.match(["x", "y"])
+        second = cache.match(["y ", "x", "x"])
+        third = cache.match(["z"])
+        self.assertIs(first, second)
+        self.assertEqual(third["Char"]["status"], "UNKNOWN")
+        self.assertEqual((cache.images, cache.distinct), (3, 2))
+
+
+
+class SpecDiffTests(unittest.TestCase):
+    def _texts(self, values, include_negative=False):
+        specs = build_variable_specs([{"name": "Emotion", "values": values}])
+        return variable_spec_texts(specs, include_negative=include_negative)["Emotion"]
+
+    def test_hash_changes_only_for_edited_variable(self) -> None:
+        variables = [
+            {"name": "Char", "values": [{"name": "a", "tags": ["x"]}]},
+            {"name": "Emotion", "values": [{"name": "happy", "tags": ["smile"]}]},
+        ]
+        before = variable_spec_hashes(build_variable_specs(variables))
+        variables[1]["values"][0]["tags"] = ["smile", "open mouth"]
+        after = variable_spec_hashes(build_variable_specs(variables))
+        self.assertEqual(before["Char"], after["Char"])
+        self.assertNotEqual(before["Emotion"], after["Emotion"])
+
+    def test_changed_values(self) -> None:
+        old = self._texts([{"name": "happy", "tags": ["smile"]}, {"name": "sad", "tags": ["tears"]}])
+        new = self._texts(
+            [
+                {"name": "happy", "tags": ["smile", "open mouth"]},
+                {"name": "sad", "tags": ["tears"]},
+                {"name": "none", "tags": []},
+            ]
+        )
+        changed = changed_value_tag_sets(old, new)
+        self.assertEqual(sorted(map(sorted, changed)), [["open mouth", "smile"], ["smile"]])
+        self.assertEqual(changed_value_tag_sets(old, old), [])
+
+    def test_reorder_or_negative_requires_full_rematch(self) -> None:
+        old = self._texts([{"name": "happy", "tags": ["smile"]}, {"name": "sad", "tags": ["tears"]}])
+        reordered = self._texts([{"name": "sad", "tags": ["tears"]}, {"name": "happy", "tags": ["smile"]}])
+        self.assertIsNone(changed_value_tag_sets(old, reordered))
+        negative = self._texts(
+            [{"name": "happy", "tags": ["smile"]}, {"name": "sad", "tags": ["tears"]}], include_negative=True
+        )
+        self.assertIsNone(changed_value_tag_sets(old, negative))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,62 @@
+from tests import _bootstrap  # noqa: F401
+
+import unittest
+
+from sidecar.handlers.move import handle_move
+from tests._fixtures import VARIABLES, HandlerTestCase, of_type, run_handler, seed_images
+
+
+class MoveBatchTests(HandlerTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.folder = self.root / "imgs"
+        seed_images(
+            self.conn,
+            self.folder,
+            {f"{idx}.png": [["alice"], ["bob"], ["x"]][idx % 3] for idx in range(7)},
+        )
+        (self.root / "out" / "alice").mkdir(parents=True)
+        (self.root / "out" / "alice" / "0.png").write_bytes(b"")
+
+    def _move(self, **payload) -> list[dict]:
+        return run_handler(
+            handle_move,
+            self.conn,
+            {
+                "folder": str(self.folder),
+                "variable_name": "char",
+                "target_root": str(self.root / "out"),
+                "variables": VARIABLES,
+                "dry_run": False,
+                **payload,
+            },
+        )
+
+    def test_moves_grouped_by_target_folder(self) -> None:
+        messages = self._move()
+
+        results = of_type(messages, "result")
+        # 대상 폴더별로 이어서 처리되고, 폴더 안에서는 원본 경로 순
+        folders = [msg.get("folder") for msg in results]
+        runs = [folder for idx, folder in enumerate(folders) if idx == 0 or folders[idx - 1] != folder]
+        self.assertEqual(sorted(runs, key=str), [None, "alice", "bob"])
+        for folder in runs:
+            sources = [msg["source"] for msg in results if msg.get("folder") == folder]
+            self.assertEqual(sources, sorted(sources))
+        # 시작 + move_batch 묶음 끝
+        progress = [msg["processed"] for msg in of_type(messages, "progress")]
+        self.assertEqual(progress, [0, 7])
+        self.assertEqual(
+            sorted(p.name for p in (self.root / "out" / "alice").iterdir()),
+            ["0.png", "0@@@1.png", "3.png", "6.png"],
+        )
+        self.assertEqual(sorted(p.name for p in self.folder.iterdir()), ["2.png", "5.png"])
+
+    def test_progress_follows_progress_step(self) -> None:
+        messages = self._move(progress_step=2, dry_run=True)
+        progress = [msg["processed"] for msg in of_type(messages, "progress")]
+        self.assertEqual(progress, [0, 2, 4, 6, 7])
+
+
+if __name__ == "__main__":
+    unittest.main()
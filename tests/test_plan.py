@@ -0,0 +1,85 @@
+from tests import _bootstrap  # noqa: F401
+
+import unittest
+from pathlib import Path
+
+from core.db.query import get_plan, list_plan_items
+from sidecar.handlers.plan import handle_apply, handle_plan
+from tests._fixtures import VARIABLES, HandlerTestCase, of_type, run_handler, seed_images
+
+
+class PlanApplyTests(HandlerTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.folder = self.root / "imgs"
+        seed_images(self.conn, self.folder, {"1.png": ["alice"], "2.png": ["bob"], "3.png": ["x"]})
+
+    def _run(self, handler, payload: dict) -> list[dict]:
+        return run_handler(handler, self.conn, payload)
+
+    def _plan(self) -> int:
+        messages = self._run(
+            handle_plan,
+            {"kind": "rename", "folder": str(self.folder), "order": ["char"], "variables": VARIABLES},
+        )
+        return of_type(messages, "done")[0]["plan_id"]
+
+    def test_plan_stores_items_without_touching_files(self) -> None:
+        plan_id = self._plan()
+        plan = get_plan(self.conn, plan_id)
+        self.assertEqual(plan["status"], "ready")
+        self.assertEqual(plan["counts"], {"pending": 2, "skipped": 1})
+        self.assertEqual(sorted(p.name for p in self.folder.iterdir()), ["1.png", "2.png", "3.png"])
+
+    def test_plan_keeps_real_resume_file(self) -> None:
+        resume = self.folder / ".nai_resume_rename.txt"
+        resume.write_text("C:/done.png\n", encoding="utf-8")
+        self._plan()
+        self.assertEqual(resume.read_text(encoding="utf-8"), "C:/done.png\n")
+
+    def test_apply_runs_plan_and_resumes(self) -> None:
+        plan_id = self._plan()
+        first = list_plan_items(self.conn, plan_id, state="pending", limit=1)[0]
+        # 이전 apply가 파일 작업 직후 끊긴 상황
+        Path(first["source"]).rename(first["target"])
+
+        messages = self._run(handle_apply, {"plan_id": plan_id})
+        done = of_type(messages, "done")[0]
+        self.assertEqual((done["processed"], done["errors"]), (2, 0))
+        self.assertEqual(sorted(p.name for p in self.folder.iterdir()), ["3.png", "alice.png", "bob.png"])
+        plan = get_plan(self.conn, plan_id)
+        self.assertEqual((plan["status"], plan["counts"]), ("applied", {"done": 2, "skipped": 1}))
+
+        again = self._run(handle_apply, {"plan_id": plan_id})
+        self.assertEqual(again[0]["type"], "error")
+
+    def test_apply_move_plan_by_target_folder(self) -> None:
+        seed_images(self.conn, self.folder, {"4.png": ["alice"]})
+        out = self.root / "out"
+        messages = self._run(
+            handle_plan,
+            {
+                "kind": "move",
+                "folder": str(self.folder),
+                "variable_tree": ["char"],
+                "target_root": str(out),
+                "variables": VARIABLES,
+            },
+        )
+        plan_id = of_type(messages, "done")[0]["plan_id"]
+        # 대상이 이미 있으면 덮어쓰지 않고 실패로 남긴다
+        (out / "bob").mkdir(parents=True)
+        (out / "bob" / "2.png").write_bytes(b"x")
+
+        messages = self._run(handle_apply, {"plan_id": plan_id, "file_workers": 2})
+        done = of_type(messages, "done")[0]
+        self.assertEqual((done["processed"], done["errors"]), (3, 1))
+        self.assertEqual(sorted(p.name for p in (out / "alice").iterdir()), ["1.png", "4.png"])
+        self.assertEqual(sorted(p.name for p in self.folder.iterdir()), ["2.png", "3.png"])
+        errors = [msg for msg in of_type(messages, "result") if msg["status"] == "ERROR"]
+        self.assertEqual([msg["message"] for msg in errors], ["target exists"])
+        self.assertEqual(get_plan(self.conn, plan_id)["counts"], {"done": 2, "failed": 1, "skipped": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
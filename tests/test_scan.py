@@ -0,0 +1,112 @@
+from tests import _bootstrap  # noqa: F401
+
+import os
+import unittest
+from unittest import mock
+
+from core.db.query import (
+    get_image_meta,
+    get_scan_checkpoint_id,
+    get_scan_dir_state,
+    load_scan_checkpoint,
+)
+from sidecar.handlers.scan import handle_scan, scan_checkpoint_key
+from tests._fixtures import HandlerTestCase, of_type, run_handler, write_image
+
+
+class IncrementalScanTests(HandlerTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.folder = self.root / "imgs"
+        for name in ("a/1.png", "a/2.png", "b/3.png"):
+            write_image(self.folder / name, "alice")
+        self.locked: set[str] = set()
+        self.statted: list[str] = []
+
+    def _stat(self, real_stat):
+        def stat(path, *args, **kwargs):
+            if str(path) in self.locked:
+                raise PermissionError(13, "locked", str(path))
+            self.statted.append(str(path))
+            return real_stat(path, *args, **kwargs)
+
+        return stat
+
+    def _run(self, is_cancelled=None, **payload) -> list[dict]:
+        payload = {"folder": str(self.folder), "incremental": True, "workers": 1, **payload}
+        with mock.patch("os.stat", self._stat(os.stat)):
+            return run_handler(handle_scan, self.conn, payload, is_cancelled=is_cancelled)
+
+    def _scan(self, **payload) -> dict:
+        return of_type(self._run(**payload), "done")[0]
+
+    def test_unchanged_directories_are_skipped_without_file_stats(self) -> None:
+        done = self._scan(skip_unchanged_dirs=True)
+        self.assertEqual((done["processed"], done["errors"], done["skipped"]), (3, 0, 0))
+        self.assertIsNotNone(get_scan_dir_state(self.conn, str(self.folder / "a")))
+
+        self.statted.clear()
+        done = self._scan(skip_unchanged_dirs=True)
+        self.assertEqual((done["processed"], done["errors"], done["skipped"]), (3, 0, 3))
+        self.assertFalse([path for path in self.statted if path.endswith(".png")])
+
+    def test_directory_with_failed_file_is_rescanned(self) -> None:
+        failed = str(self.folder / "a" / "2.png")
+        self.locked.add(failed)
+        done = self._scan(skip_unchanged_dirs=True)
+        self.assertEqual((done["errors"], done["skipped"]), (1, 0))
+        self.assertIsNone(get_scan_dir_state(self.conn, str(self.folder / "a")))
+        self.assertIsNotNone(get_scan_dir_state(self.conn, str(self.folder / "b")))
+        self.assertIsNone(get_image_meta(self.conn, failed))
+
+        self.locked.clear()
+        done = self._scan(skip_unchanged_dirs=True)
+        # b는 통째로 건너뛰고, a는 다시 보되 이미 저장된 1.png는 파일 단위로 건너뜀
+        self.assertEqual((done["errors"], done["skipped"]), (0, 2))
+        self.assertIsNotNone(get_image_meta(self.conn, failed))
+        self.assertIsNotNone(get_scan_dir_state(self.conn, str(self.folder / "a")))
+
+    def test_file_overwritten_in_place_is_rescanned_by_default(self) -> None:
+        self._scan()
+        target = self.folder / "a" / "1.png"
+        dir_stat = os.stat(target.parent)
+        file_stat = os.stat(target)
+        write_image(target, "bob, smile")
+        # 같은 이름으로 덮어써서 디렉터리 mtime은 그대로, 파일 mtime만 바뀐 상황
+        os.utime(target, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 5_000_000_000))
+        os.utime(target.parent, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+
+        done = self._scan()
+        self.assertEqual((done["errors"], done["skipped"]), (0, 2))
+        self.assertIn(str(target), self.statted)
+
+    def test_cancelled_scan_resumes_and_retries_failed_files(self) -> None:
+        write_image(self.folder / "b" / "4.png", "bob")
+        failed = str(self.folder / "b" / "4.png")
+        self.locked.add(failed)
+
+        def cancel_after_two() -> bool:
+            return self.conn.execute("SELECT COUNT(*) FROM images").fetchone()[0] >= 2
+
+        messages = self._run(is_cancelled=cancel_after_two)
+        self.assertTrue(of_type(messages, "done")[0]["cancelled"])
+        checkpoint_id = get_scan_checkpoint_id(self.conn, scan_checkpoint_key(str(self.folder)))
+        done_dirs, done_files = load_scan_checkpoint(self.conn, checkpoint_id)
+        self.assertTrue(done_dirs or done_files)
+        # 오류 난 파일과 그 디렉터리는 완료로 남기지 않는다.
+        self.assertNotIn(failed, done_files)
+        self.assertNotIn(str(self.folder / "b"), done_dirs)
+
+        self.locked.clear()
+        messages = self._run(resume_mode=True)
+        self.assertTrue(any(msg["message"].startswith("scan resume") for msg in of_type(messages, "log")))
+        done = of_type(messages, "done")[0]
+        self.assertEqual((done["processed"], done["errors"]), (4, 0))
+        self.assertGreaterEqual(done["skipped"], 2)
+        for name in ("a/1.png", "a/2.png", "b/3.png", "b/4.png"):
+            self.assertIsNotNone(get_image_meta(self.conn, str(self.folder / name)), name)
+        self.assertIsNone(get_scan_checkpoint_id(self.conn, scan_checkpoint_key(str(self.folder))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+from tests import _bootstrap  # noqa: F401
+
+import asyncio
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from core.db.query import count_job_results, list_job_result_folders, list_job_results
+from core.db.schema import ensure_schema
+from core.db.storage import add_job_results, delete_job_results
+from server.channel import JobChannel
+from server.results import JobResultStore
+
+
+class _MemoryStore:
+    def __init__(self) -> None:
+        self.rows: list[tuple[int, dict]] = []
+
+    def add(self, job_id: str, items: list[tuple[int, dict]], *, wait: bool = True) -> None:
+        self.rows.extend(items)
+
+    def wait_writable(self) -> None:
+        pass
+
+    def list(self, job_id: str, after_seq: int, before_seq: int | None, limit: int) -> list[dict]:
+        rows = [msg for seq, msg in self.rows if after_seq < seq and (before_seq is None or seq < before_seq)]
+        return rows[:limit]
+
+
+class JobChannelTests(unittest.TestCase):
+    def test_thread_messages_arrive_in_order_with_latest_progress(self) -> None:
+        async def run() -> list[dict]:
+            channel = JobChannel(asyncio.get_running_loop(), "j")
+
+            def emit() -> None:
+                for idx in range(5):
+                    channel.put({"type": "progress", "processed": idx})
+                    channel.put({"type": "result", "source": str(idx)})
+                channel.put({"type": "done"})
+
+            thread = threading.Thread(target=emit)
+            thread.start()
+            thread.join()
+            self.assertEqual(channel.coalesced, 4)
+            await channel.wait(0, timeout=5)
+            messages, gap_end, cursor = channel.read(0)
+            self.assertIsNone(gap_end)
+            self.assertEqual(cursor, 11)
+            self.assertTrue(channel.closed)
+            # 다시 읽으면(재접속) 같은 내용, cursor 이후는 없음
+            self.assertEqual(channel.read(0)[0], messages)
+            self.assertEqual(channel.read(cursor)[0], [])
+            return messages
+
+        messages = asyncio.run(run())
+        self.assertEqual(
+            [(msg["type"], msg.get("source", msg.get("processed"))) for msg in messages],
+            [
+                ("result", "0"),
+                ("result", "1"),
+                ("result", "2"),
+                ("result", "3"),
+                ("progress", 4),
+                ("result", "4"),
+                ("done", None),
+            ],
+        )
+
+    def test_wait_wakes_on_next_put(self) -> None:
+        async def run() -> list[dict]:
+            channel = JobChannel(asyncio.get_running_loop(), "j")
+            cursor = channel.put({"type": "log"})
+            await asyncio.sleep(0)  # put이 예약한 깨우기를 먼저 소비
+            with self.assertRaises(asyncio.TimeoutError):
+                await channel.wait(cursor, timeout=0.01)
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.01, lambda: threading.Thread(target=channel.put, args=({"type": "done"},)).start())
+            await channel.wait(cursor, timeout=5)
+            return channel.read(cursor)[0]
+
+        self.assertEqual(asyncio.run(run()), [{"type": "done", "seq": 2}])
+
+    def test_results_are_stored_and_overflow_replayed(self) -> None:
+        async def run() -> None:
+            store = _MemoryStore()
+            channel = JobChannel(asyncio.get_running_loop(), "j", store=store, limit=100)
+            for idx in range(250):
+                channel.put({"type": "result", "status": "OK" if idx % 5 else "UNKNOWN", "source": str(idx)})
+                if idx == 10:
+                    channel.put({"type": "log"})
+            self.assertEqual((channel.dropped, channel.pending()), (1, 100))
+            self.assertEqual(channel.status_counts(), {"OK": 200, "UNKNOWN": 50})
+
+            messages, gap_end, cursor = channel.read(5)
+            self.assertEqual(gap_end, 151)
+            replayed = channel.replay(5, gap_end, 1000)
+            self.assertEqual([msg["seq"] for msg in replayed + messages], [seq for seq in range(6, 252) if seq != 12])
+            self.assertEqual(cursor, 251)
+            # 버퍼에 남은 것까지 모든 result가 저장소에
+            self.assertEqual((channel.stored, len(store.rows)), (250, 250))
+
+        asyncio.run(run())
+
+
+class JobResultStoreTests(unittest.TestCase):
+    def test_storage_roundtrip(self) -> None:
+        conn = sqlite3.connect(":memory:")
+        ensure_schema(conn)
+        add_job_results(conn, "j", [(3, {"type": "result", "status": "OK", "source": "a"})])
+        add_job_results(conn, "k", [(1, {"type": "result", "status": "OK", "source": "b"})])
+        self.assertEqual(
+            list_job_results(conn, "j"), [{"type": "result", "status": "OK", "source": "a", "seq": 3}]
+        )
+        self.assertEqual(list_job_results(conn, "j", after_seq=3), [])
+        self.assertEqual(delete_job_results(conn, "j"), 1)
+        self.assertEqual(len(list_job_results(conn, "k")), 1)
+        conn.close()
+
+    def test_filtered_pages_counts_and_folders(self) -> None:
+        conn = sqlite3.connect(":memory:")
+        ensure_schema(conn)
+        items = []
+        for seq in range(1, 31):
+            message = {"type": "result", "status": "OK" if seq % 3 else "UNKNOWN", "source": f"C:/in/{seq}.png"}
+            if message["status"] == "OK":
+                message["target"] = f"C:/out/{'a' if seq % 2 else 'b'}/{seq}.png"
+                message["folder"] = "a" if seq % 2 else "b"
+            items.append((seq, message))
+        add_job_results(conn, "j", items)
+
+        self.assertEqual(count_job_results(conn, "j"), {"OK": 20, "UNKNOWN": 10})
+        self.assertEqual(count_job_results(conn, "j", folder="a"), {"OK": 10})
+        page = list_job_results(conn, "j", statuses=["UNKNOWN"], limit=4)
+        self.assertEqual([msg["seq"] for msg in page], [3, 6, 9, 12])
+        page = list_job_results(conn, "j", statuses=["UNKNOWN"], after_seq=12, limit=4)
+        self.assertEqual([msg["seq"] for msg in page], [15, 18, 21, 24])
+        self.assertEqual(list_job_results(conn, "j", statuses=[]), [])
+        self.assertEqual(
+            [msg["seq"] for msg in list_job_results(conn, "j", target="C:/out/b/", offset=1, limit=2)],
+            [4, 8],
+        )
+        self.assertEqual(
+            [msg["seq"] for msg in list_job_results(conn, "j", search="/2")],
+            [2, *range(20, 30)],
+        )
+        self.assertEqual(list_job_results(conn, "j", search="%"), [])
+        self.assertEqual(
+            list_job_result_folders(conn, "j"),
+            [
+                {"folder": "", "count": 10, "preview": "C:/in/3.png"},
+                {"folder": "a", "count": 10, "preview": "C:/in/1.png"},
+                {"folder": "b", "count": 10, "preview": "C:/in/2.png"},
+            ],
+        )
+        conn.close()
+
+    def test_reads_see_queued_writes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = JobResultStore(str(Path(tmp) / "db.sqlite"))
+            store.add("j", [(seq, {"type": "result", "source": str(seq)}) for seq in range(1, 6)])
+            self.assertEqual([msg["seq"] for msg in store.list("j", 1, 5, 10)], [2, 3, 4])
+            store.delete("j")
+            self.assertEqual(store.list("j", 0, None, 10), [])
+            store.close()
+
+    def test_add_blocks_while_writes_are_backed_up(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = JobResultStore(str(Path(tmp) / "db.sqlite"), max_pending=1)
+            gate = threading.Event()
+            store._add = lambda job_id, items: gate.wait(5)
+            store.add("j", [(1, {"type": "result"})])
+            second = threading.Thread(target=store.add, args=("j", [(2, {"type": "result"})]))
+            second.start()
+            second.join(0.05)
+            self.assertTrue(second.is_alive())
+            # wait=False(채널 잠금 안)는 기다리지 않는다
+            store.add("j", [(3, {"type": "result"})], wait=False)
+            gate.set()
+            second.join(5)
+            self.assertFalse(second.is_alive())
+            store.close()
+
+    def test_sources_window_skips_errors(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = JobResultStore(str(Path(tmp) / "db.sqlite"))
+            store.add(
+                "j",
+                [
+                    (seq, {"type": "result", "status": "ERROR" if seq % 4 == 0 else "OK", "source": str(seq)})
+                    for seq in range(1, 21)
+                ],
+            )
+            self.assertEqual(store.sources("j", offset=2, limit=4), ["3", "5", "6", "7"])
+            self.assertEqual(store.sources("other", offset=0, limit=4), [])
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
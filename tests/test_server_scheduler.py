@@ -0,0 +1,86 @@
+from tests import _bootstrap  # noqa: F401
+
+import threading
+import unittest
+from unittest import mock
+
+from server.scheduler import RESOURCE_CPU, RESOURCE_IO, JobScheduler, resource_class
+
+
+class JobSchedulerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.scheduler = JobScheduler(max_jobs=2, slots={RESOURCE_CPU: 1, RESOURCE_IO: 2})
+        self.release: dict[str, threading.Event] = {}
+        self.started: dict[str, threading.Event] = {}
+        self.positions: dict[str, list[int]] = {}
+
+    def tearDown(self) -> None:
+        for event in self.release.values():
+            event.set()
+
+    def _submit(self, job_id: str, op: str, priority: int = 0, payload: dict | None = None) -> int:
+        self.release[job_id] = threading.Event()
+        self.started[job_id] = threading.Event()
+        self.positions[job_id] = []
+
+        def run() -> None:
+            self.started[job_id].set()
+            self.release[job_id].wait(5)
+
+        return self.scheduler.submit(
+            job_id, op, run, priority=priority, notify=self.positions[job_id].append, payload=payload
+        )
+
+    def test_resource_slots_and_priority_queue(self) -> None:
+        self.assertEqual(self._submit("scan1", "scan"), 0)
+        # CPU 자리는 하나 → 두 번째 스캔은 대기, io 작업은 바로 시작
+        self.assertEqual(self._submit("scan2", "scan"), 1)
+        self.assertEqual(self._submit("move1", "move"), 0)
+        # 전체 2개가 차서 io도 대기. 우선순위가 높으면 앞으로
+        self.assertEqual(self._submit("move2", "move"), 2)
+        self.assertEqual(self._submit("move3", "move", priority=5), 1)
+        # instant 작업은 대기하지 않는다.
+        self.assertEqual(self._submit("stats", "db_stats"), 0)
+        self.assertTrue(self.started["stats"].wait(5))
+        self.assertEqual(self.positions["scan2"], [1, 2])
+
+        self.assertTrue(self.scheduler.cancel("move2"))
+        self.assertFalse(self.scheduler.cancel("move1"))
+
+        self.release["move1"].set()
+        self.assertTrue(self.started["move3"].wait(5))
+        self.assertEqual(self.positions["move3"][-1], 0)
+        self.assertEqual(self.scheduler.position("scan2"), 1)
+
+        self.release["scan1"].set()
+        self.assertTrue(self.started["scan2"].wait(5))
+        self.assertFalse(self.started["move2"].is_set())
+        self.assertEqual(self.positions["scan2"][-1], 0)
+
+    def test_long_waiting_job_is_not_overtaken(self) -> None:
+        self.scheduler = JobScheduler(max_jobs=2, slots={RESOURCE_CPU: 1, RESOURCE_IO: 2}, max_wait=0)
+        self.assertEqual(self._submit("scan1", "scan"), 0)
+        self.assertEqual(self._submit("scan2", "scan"), 1)
+        # scan2가 max_wait를 넘겨 기다리는 중이라 io 자리가 비어 있어도 뒤 작업은 앞지르지 못한다.
+        self.assertEqual(self._submit("move1", "move"), 2)
+        self.assertEqual(self._submit("stats", "db_stats"), 0)
+        self.assertFalse(self.started["move1"].wait(0.05))
+
+        self.release["scan1"].set()
+        self.assertTrue(self.started["scan2"].wait(5))
+        self.assertTrue(self.started["move1"].wait(5))
+
+    def test_pool_classifying_jobs_count_as_cpu(self) -> None:
+        self.assertEqual(resource_class("move"), RESOURCE_IO)
+        self.assertEqual(resource_class("move", {"classify_workers": 1}), RESOURCE_IO)
+        with mock.patch("core.runner.worker.os.cpu_count", return_value=8):
+            self.assertEqual(resource_class("move", {}), RESOURCE_CPU)
+        self.assertEqual(resource_class("rename", {"classify_workers": 4}), RESOURCE_CPU)
+        self.assertEqual(resource_class("plan", {"classify_workers": 1}), RESOURCE_IO)
+        self.assertEqual(resource_class("plan", {"classify_workers": 4}), RESOURCE_CPU)
+        self.assertEqual(self._submit("scan1", "scan"), 0)
+        self.assertEqual(self._submit("move1", "move", payload={"classify_workers": 4}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+from tests import _bootstrap  # noqa: F401
+
+import asyncio
+import io
+import struct
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+from core.cache import close_packs
+from server.thumbs import ThumbPrefetcher, ThumbService, build_sprite, encode_bundle
+
+
+class ThumbServiceTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.image = self.root / "a.png"
+        Image.new("RGB", (320, 240), (10, 200, 10)).save(self.image)
+        self.service = ThumbService(self.root / "cache", size=64, workers=2)
+
+    def tearDown(self) -> None:
+        self.service.shutdown()
+        close_packs()
+        self._tmp.cleanup()
+
+    def test_concurrent_loads_share_one_job(self) -> None:
+        calls = []
+        release = threading.Event()
+        original = self.service._load_blocking
+
+        def slow_load(source):
+            calls.append(source.key)
+            release.wait(5)
+            return original(source)
+
+        self.service._load_blocking = slow_load
+
+        async def run():
+            source = await self.service.resolve(str(self.image))
+            pending = [asyncio.ensure_future(self.service.load(source)) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*pending)
+
+        results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(bytes(data) == bytes(results[0]) for data in results))
+        self.assertEqual(self.service._inflight, {})
+
+    def test_conditional_headers(self) -> None:
+        source = asyncio.run(self.service.resolve(str(self.image)))
+        headers = source.headers()
+        self.assertTrue(source.not_modified(headers["ETag"], None))
+        self.assertTrue(source.not_modified(f"W/{headers['ETag']}, \"other\"", None))
+        self.assertFalse(source.not_modified('"other"', headers["Last-Modified"]))
+        self.assertTrue(source.not_modified(None, headers["Last-Modified"]))
+        self.assertFalse(source.not_modified(None, "Thu, 01 Jan 1970 00:00:00 GMT"))
+
+    def test_missing_file_resolves_to_none(self) -> None:
+        self.assertIsNone(asyncio.run(self.service.resolve(str(self.root / "missing.png"))))
+
+
+    def test_load_many_keeps_request_order(self) -> None:
+        other = self.root / "b.png"
+        Image.new("RGB", (100, 200), (0, 0, 200)).save(other)
+        paths = [str(self.image), str(self.root / "missing.png"), str(other)]
+        items = asyncio.run(self.service.load_many(paths))
+        self.assertIsNone(items[1])
+        sizes = [Image.open(io.BytesIO(bytes(data))).size for data in (items[0], items[2])]
+        self.assertEqual(sizes, [(64, 48), (32, 64)])
+
+
+class ThumbBatchEncodingTests(unittest.TestCase):
+    def _jpeg(self, size) -> bytes:
+        buf = io.BytesIO()
+        Image.new("RGB", size, (255, 0, 0)).save(buf, "JPEG")
+        return buf.getvalue()
+
+    def test_bundle_is_length_prefixed(self) -> None:
+        first = self._jpeg((10, 10))
+        bundle = encode_bundle([first, None, b"xyz"])
+        length = struct.unpack(">I", bundle[:4])[0]
+        self.assertEqual(bundle[4 : 4 + length], first)
+        rest = bundle[4 + length :]
+        self.assertEqual(rest, struct.pack(">I", 0) + struct.pack(">I", 3) + b"xyz")
+
+    def test_sprite_places_tiles_on_grid(self) -> None:
+        image, tiles = build_sprite([self._jpeg((32, 16)), None, self._jpeg((8, 32))], 32, 2)
+        sheet = Image.open(io.BytesIO(image))
+        self.assertEqual(sheet.size, (64, 64))
+        self.assertEqual(tiles[0], {"x": 0, "y": 0, "w": 32, "h": 16})
+        self.assertIsNone(tiles[1])
+        self.assertEqual(tiles[2], {"x": 0, "y": 32, "w": 8, "h": 32})
+
+
+class ThumbPrefetcherTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.service = ThumbService(Path(self._tmp.name), workers=2)
+        self.prefetcher = ThumbPrefetcher(self.service, concurrency=1)
+
+    def tearDown(self) -> None:
+        self.prefetcher.shutdown()
+        self.service.shutdown()
+        close_packs()
+        self._tmp.cleanup()
+
+    def test_order_puts_visible_first(self) -> None:
+        paths = [str(idx) for idx in range(10)]
+        ordered = ThumbPrefetcher.order(paths, 4, 6, 2)
+        self.assertEqual(ordered, ["4", "5", "6", "7", "3", "2"])
+
+    def test_viewport_update_drops_stale_work(self) -> None:
+        handled: list[str] = []
+
+        async def fake_resolve(path):
+            handled.append(path)
+            await asyncio.sleep(0.01)
+            return None
+
+        self.service.resolve = fake_resolve
+
+        async def run():
+            self.prefetcher.update([f"old{idx}" for idx in range(20)])
+            await asyncio.sleep(0.015)
+            self.prefetcher.update(["new0", "new1"])
+            while self.prefetcher.pending():
+                await asyncio.sleep(0.005)
+            await asyncio.sleep(0.02)
+
+        asyncio.run(run())
+        self.assertLess(len([p for p in handled if p.startswith("old")]), 5)
+        self.assertEqual([p for p in handled if p.startswith("new")], ["new0", "new1"])
+        self.assertEqual(self.prefetcher.update(["new0"]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
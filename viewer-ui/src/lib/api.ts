@@ -37,6 +37,62 @@ export async function cancelJob(jobId: string): Promise<void> {
   });
 }
 
+export interface JobResultsPage<T = Record<string, unknown>> {
+  job_id: string;
+  done: boolean;
+  total: number;
+  counts: Record<string, number>;
+  items: T[];
+  next: number | null;
+  error?: string;
+}
+
+export interface JobResultsQuery {
+  status?: string[];
+  folder?: string;
+  q?: string;
+  after?: number;
+  limit?: number;
+}
+
+function resultsParams(query: JobResultsQuery): URLSearchParams {
+  const params = new URLSearchParams();
+  if (query.status) params.set("status", query.status.join(","));
+  if (query.folder !== undefined) params.set("folder", query.folder);
+  if (query.q) params.set("q", query.q);
+  if (query.after) params.set("after", String(query.after));
+  if (query.limit) params.set("limit", String(query.limit));
+  return params;
+}
+
+/**
+ * One page of a job's results (서버에서 필터/페이지, 상태별 개수 포함)
+ */
+export async function getJobResults<T = Record<string, unknown>>(
+  jobId: string,
+  query: JobResultsQuery = {}
+): Promise<JobResultsPage<T>> {
+  const res = await fetch(`${API_BASE}/api/job/${jobId}/results?${resultsParams(query)}`);
+  return res.json();
+}
+
+export interface JobResultFolder {
+  folder: string;
+  count: number;
+  preview: string | null;
+}
+
+/**
+ * Result counts per classified folder (move 작업)
+ */
+export async function getJobResultFolders(
+  jobId: string,
+  query: Pick<JobResultsQuery, "status" | "q"> = {}
+): Promise<{ folders: JobResultFolder[]; error?: string }> {
+  const res = await fetch(`${API_BASE}/api/job/${jobId}/results/folders?${resultsParams(query)}`);
+  return res.json();
+}
+
 /**
  * Run a simple job synchronously (for quick operations)
  */
@@ -100,6 +156,90 @@ export function getThumbnailUrl(imagePath: string): string {
   return `${API_BASE}/api/thumbs/${encodeURIComponent(imagePath)}`;
 }
 
+/**
+ * Fetch thumbnails for a grid page in one request.
+ * Returns object URLs in request order (null when the thumbnail is unavailable).
+ * Revoke them with URL.revokeObjectURL when the tiles are discarded.
+ */
+export async function fetchThumbnailBatch(paths: string[]): Promise<(string | null)[]> {
+  const res = await fetch(`${API_BASE}/api/thumbs/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ paths, format: "bundle" }),
+  });
+  if (!res.ok) throw new Error(`thumbnail batch failed: ${res.status}`);
+  const buf = await res.arrayBuffer();
+  const view = new DataView(buf);
+  const urls: (string | null)[] = [];
+  let offset = 0;
+  while (offset + 4 <= buf.byteLength && urls.length < paths.length) {
+    const length = view.getUint32(offset);
+    offset += 4;
+    urls.push(
+      length > 0
+        ? URL.createObjectURL(new Blob([buf.slice(offset, offset + length)], { type: "image/jpeg" }))
+        : null
+    );
+    offset += length;
+  }
+  return urls;
+}
+
+const THUMB_BATCH_MAX = 500; // 서버 BATCH_MAX_PATHS와 같게
+const THUMB_BATCH_DELAY_MS = 30;
+
+/**
+ * Queue grid tiles' thumbnail requests and fetch them with fetchThumbnailBatch.
+ * Tiles that scroll into view within delayMs of each other share one request.
+ * load() resolves to an object URL (null when unavailable); revoke it once the image has loaded.
+ */
+export function createThumbnailBatcher(delayMs: number = THUMB_BATCH_DELAY_MS) {
+  let queue: { path: string; resolve: (url: string | null) => void }[] = [];
+  let timer: ReturnType<typeof setTimeout> | null = null;
+
+  async function flush() {
+    timer = null;
+    const pending = queue;
+    queue = [];
+    for (let i = 0; i < pending.length; i += THUMB_BATCH_MAX) {
+      const chunk = pending.slice(i, i + THUMB_BATCH_MAX);
+      try {
+        const urls = await fetchThumbnailBatch(chunk.map(item => item.path));
+        chunk.forEach((item, idx) => item.resolve(urls[idx] ?? null));
+      } catch (err) {
+        console.error("썸네일 배치 로드 실패:", err);
+        chunk.forEach(item => item.resolve(null));
+      }
+    }
+  }
+
+  return {
+    load(path: string): Promise<string | null> {
+      return new Promise(resolve => {
+        queue.push({ path, resolve });
+        if (!timer) timer = setTimeout(flush, delayMs);
+      });
+    },
+  };
+}
+
+/**
+ * Tell the server which thumbnails are on screen so it prefetches around them.
+ * Replaces any prefetch work queued for the previous viewport.
+ */
+export async function prefetchThumbnails(
+  paths: string[],
+  start: number,
+  end: number,
+  lookahead: number = 100
+): Promise<void> {
+  await fetch(`${API_BASE}/api/thumbs/prefetch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ paths, start, end, lookahead }),
+  });
+}
+
 /**
  * Get DB stats
  */
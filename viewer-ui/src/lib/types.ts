@@ -3,15 +3,18 @@
 export interface IpcProgress {
   id: string;
   type: "progress";
+  seq?: number;
   processed: number;
   total: number;
   errors: number;
   skipped?: number;
+  counts?: Record<string, number>;
 }
 
 export interface IpcResult {
   id: string;
   type: "result";
+  seq?: number;
   status: "OK" | "UNKNOWN" | "CONFLICT" | "ERROR" | "SKIP";
   source: string;
   target?: string;
@@ -19,9 +22,16 @@ export interface IpcResult {
   preview?: string;
 }
 
+export interface IpcResultBatch {
+  id: string;
+  type: "results";
+  items: IpcResult[];
+}
+
 export interface IpcDone {
   id: string;
   type: "done";
+  seq?: number;
   processed?: number;
   errors?: number;
   skipped?: number;
@@ -29,26 +39,37 @@ export interface IpcDone {
   completed?: boolean;
   stats?: Record<string, unknown>;
   payload?: unknown;
+  counts?: Record<string, number>;
 }
 
 export interface IpcError {
   id: string;
   type: "error";
+  seq?: number;
   message: string;
 }
 
 export interface IpcLog {
   id?: string;
   type: "log";
+  seq?: number;
   message: string;
 }
 
 export interface IpcAck {
   id: string;
   type: "ack";
+  seq?: number;
   op: string;
 }
 
+export interface IpcQueue {
+  id: string;
+  type: "queue";
+  seq?: number;
+  position: number;
+}
+
 export interface IpcPing {
   type: "ping";
 }
@@ -60,6 +81,7 @@ export type IpcMessage =
   | IpcError
   | IpcLog
   | IpcAck
+  | IpcQueue
   | IpcPing;
 
 export type ResultStatus = "OK" | "UNKNOWN" | "CONFLICT" | "ERROR" | "SKIP";
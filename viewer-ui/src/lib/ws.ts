@@ -1,11 +1,13 @@
 // WebSocket client for job updates
 
-import type { IpcMessage } from "./types";
+import type { IpcMessage, IpcResultBatch } from "./types";
 
 export type MessageHandler = (message: IpcMessage) => void;
 
 // In development, API is on :8000
 const WS_HOST = import.meta.env.DEV ? "localhost:8000" : window.location.host;
+const MAX_RECONNECTS = 5;
+const RECONNECT_DELAY_MS = 1000;
 
 /**
  * Connect to a job's WebSocket and receive updates
@@ -13,39 +15,70 @@ const WS_HOST = import.meta.env.DEV ? "localhost:8000" : window.location.host;
 export function connectJob(
   jobId: string,
   onMessage: MessageHandler,
-  onClose?: () => void
+  onClose?: () => void,
+  options: { page?: number } = {}
 ): { close: () => void } {
   const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
-  const wsUrl = `${protocol}//${WS_HOST}/ws/job/${jobId}`;
-  
-  const ws = new WebSocket(wsUrl);
-  
-  ws.onopen = () => {
-    console.log(`[WS] Connected to job ${jobId}`);
-  };
-  
-  ws.onmessage = (event) => {
-    try {
-      const message = JSON.parse(event.data) as IpcMessage;
-      if (message.type !== "ping") {
-        onMessage(message);
+  // 마지막으로 받은 seq. 연결이 끊기면 since=lastSeq로 다시 붙어 빠진 메시지만 받는다
+  let lastSeq = 0;
+  let finished = false;
+  let retries = 0;
+  let ws: WebSocket;
+
+  const open = () => {
+    // batch=1: 결과 메시지를 서버에서 묶어 받는다 ({"type": "results", "items": [...]})
+    // page=N: 결과는 처음 N개만 받고 나머지는 getJobResults로 (progress/done에 상태별 개수)
+    const page = options.page ? `&page=${options.page}` : "";
+    const wsUrl = `${protocol}//${WS_HOST}/ws/job/${jobId}?batch=1&since=${lastSeq}${page}`;
+    ws = new WebSocket(wsUrl);
+
+    ws.onopen = () => {
+      retries = 0;
+      console.log(`[WS] Connected to job ${jobId} (since ${lastSeq})`);
+    };
+
+    ws.onmessage = (event) => {
+      try {
+        const message = JSON.parse(event.data) as IpcMessage | IpcResultBatch;
+        if (message.type === "results") {
+          for (const item of message.items) {
+            lastSeq = Math.max(lastSeq, item.seq ?? 0);
+            onMessage(item);
+          }
+        } else if (message.type !== "ping") {
+          lastSeq = Math.max(lastSeq, message.seq ?? 0);
+          if (message.type === "done" || message.type === "error") {
+            finished = true;
+          }
+          onMessage(message);
+        }
+      } catch (err) {
+        console.error("[WS] Failed to parse message:", err);
       }
-    } catch (err) {
-      console.error("[WS] Failed to parse message:", err);
-    }
-  };
-  
-  ws.onerror = (err) => {
-    console.error("[WS] Error:", err);
-  };
-  
-  ws.onclose = () => {
-    console.log(`[WS] Disconnected from job ${jobId}`);
-    onClose?.();
+    };
+
+    ws.onerror = (err) => {
+      console.error("[WS] Error:", err);
+    };
+
+    ws.onclose = () => {
+      console.log(`[WS] Disconnected from job ${jobId}`);
+      if (!finished && retries < MAX_RECONNECTS) {
+        retries += 1;
+        setTimeout(open, RECONNECT_DELAY_MS * retries);
+        return;
+      }
+      onClose?.();
+    };
   };
-  
+
+  open();
+
   return {
-    close: () => ws.close(),
+    close: () => {
+      finished = true;
+      ws.close();
+    },
   };
 }
 